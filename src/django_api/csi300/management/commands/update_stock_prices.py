@@ -4,18 +4,45 @@ Usage:
     python manage.py update_stock_prices
     python manage.py update_stock_prices --exchange HKEX
     python manage.py update_stock_prices --symbol 0700.HK
+    python manage.py update_stock_prices --workers 8 --rate 5
+    python manage.py update_stock_prices --resume   # continue a failed run
+
+Bars are fetched by a bounded worker pool (paced by --rate on top of the shared
+AkShare budget) and the computed price fields are written with chunked
+bulk_update. Tickers are recorded in a checkpoint file after each chunk is
+committed; --resume skips them when the checkpoint is from the same selection
+and market day. The checkpoint is removed when a run finishes without
+failures. Tickers AkShare cannot serve (e.g. HKEX) are skipped, not failed.
 """
 
+import json
 import logging
-from datetime import UTC, datetime, timedelta
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from pathlib import Path
 
 import pandas as pd
 from csi300.models import Company
 from django.core.management.base import BaseCommand
-from stocks.akshare_client import get_daily_data, normalize_symbol
+from django.db import connection
+from django.utils import timezone
+from stocks import bar_store
+from stocks.akshare_client import normalize_symbol
+from stocks.upstream import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+PRICE_FIELDS = [
+    "price_local_currency",
+    "previous_close",
+    "price_52w_high",
+    "price_52w_low",
+    "last_trade_date",
+]
+DEFAULT_CHECKPOINT = Path(tempfile.gettempdir()) / "update_stock_prices.checkpoint.json"
+
 
 class Command(BaseCommand):
     help = "Update stock prices (open, previous close, 52w high/low, last trade date) for all companies"
@@ -38,17 +65,46 @@ class Command(BaseCommand):
             action="store_true",
             help="Perform a dry run without saving to database",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Concurrent bar fetches (default: 8; 1 runs serially)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0.0,
+            help="Max fetches started per second (default: no extra limit beyond the AkShare budget)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Companies per bulk_update (default: 200)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=Path,
+            default=DEFAULT_CHECKPOINT,
+            help=f"Checkpoint file (default: {DEFAULT_CHECKPOINT})",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip tickers already written by a previous run of the same selection",
+        )
 
     @staticmethod
     def fetch_daily_bars(symbol: str, days: int = 460) -> pd.DataFrame:
         """
-        Fetch recent daily bars from AkShare for the specified security.
+        Load recent daily bars for the specified security from the daily bar
+        store, syncing only the bars AkShare has published since the last run.
         Defaults to ~18 months of data to compute 52-week metrics.
         """
-        end_time = datetime.now(tz=UTC)
-        start_time = end_time - timedelta(days=days)
+        start = bar_store.market_today() - timedelta(days=days)
 
-        df = get_daily_data(symbol, start_time, end_time)
+        df = bar_store.get_daily_bars(symbol, start=start)
         if df.empty:
             return df
 
@@ -70,10 +126,95 @@ class Command(BaseCommand):
 
         return df
 
+    @staticmethod
+    def compute_price_fields(hist: pd.DataFrame) -> dict:
+        """Price fields from ``fetch_daily_bars`` output; fields that cannot be computed are omitted."""
+        last_row = hist.iloc[-1]
+        open_price = float(last_row["open"])
+        last_close = float(last_row["close"])
+
+        if pd.notna(last_row.get("pre_close")):
+            previous_close = float(last_row["pre_close"])
+        elif len(hist) > 1:
+            previous_close = float(hist["close"].iloc[-2])
+        else:
+            previous_close = last_close
+
+        recent_window = hist.tail(260)
+        if recent_window.empty:
+            recent_window = hist
+
+        fields = {
+            "price_local_currency": open_price,
+            "previous_close": previous_close,
+            "price_52w_high": float(recent_window["high"].max()),
+            "price_52w_low": float(recent_window["low"].min()),
+            "last_trade_date": last_row["trade_date"].date(),
+        }
+        return {field: value for field, value in fields.items() if pd.notna(value)}
+
+    def _fetch(self, ticker: str, limiter: TokenBucket | None) -> pd.DataFrame:
+        """Worker-thread fetch; closes this thread's DB connection when done."""
+        try:
+            if limiter is not None:
+                while (wait := limiter.take()) > 0:
+                    time.sleep(wait)
+            return self.fetch_daily_bars(ticker)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _load_checkpoint(path: Path, selection: dict) -> set[str]:
+        """Tickers done by an earlier run of ``selection`` on the current market day."""
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return set()
+        if state.get("selection") != selection:
+            return set()
+        if state.get("run_date") != bar_store.market_today().isoformat():
+            return set()
+        return set(state.get("done", []))
+
+    @staticmethod
+    def _save_checkpoint(path: Path, selection: dict, done: set[str]) -> None:
+        state = {
+            "selection": selection,
+            "run_date": bar_store.market_today().isoformat(),
+            "done": sorted(done),
+        }
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        tmp.replace(path)
+
+    def _flush(self, pending: list, batch_size: int, checkpoint: Path, selection: dict, done: set):
+        """Write collected companies in one chunked bulk_update and checkpoint them."""
+        if not pending:
+            return
+        now = timezone.now()
+        fields = set()
+        for company, update_data in pending:
+            for field, value in update_data.items():
+                setattr(company, field, value)
+            company.updated_at = now
+            fields.update(update_data)
+        Company.objects.bulk_update(
+            [company for company, _ in pending],
+            fields=[field for field in PRICE_FIELDS if field in fields] + ["updated_at"],
+            batch_size=batch_size,
+        )
+        done.update(company.ticker for company, _ in pending)
+        self._save_checkpoint(checkpoint, selection, done)
+        pending.clear()
+
     def handle(self, *args, **options):
         symbol_filter = options.get("symbol")
         exchange_filter = options.get("exchange")
         dry_run = options.get("dry_run", False)
+        workers = max(1, options.get("workers") or 1)
+        rate = options.get("rate") or 0.0
+        batch_size = max(1, options.get("batch_size") or 200)
+        checkpoint = options.get("checkpoint") or DEFAULT_CHECKPOINT
 
         if dry_run:
             self.stdout.write(self.style.WARNING("DRY RUN MODE - No changes will be saved"))
@@ -91,123 +232,101 @@ class Command(BaseCommand):
             queryset = queryset.filter(exchange=exchange_filter)
             self.stdout.write(f"Filtering by exchange: {exchange_filter}")
 
-        companies = queryset
-        total = companies.count()
+        companies = list(queryset.only("id", "ticker", "name", "exchange", *PRICE_FIELDS))
+        total = len(companies)
         updated = 0
         failed = 0
+        skipped = 0
+
+        selection = {"symbol": symbol_filter, "exchange": exchange_filter}
+        done = self._load_checkpoint(checkpoint, selection) if options.get("resume") else set()
+        if done:
+            companies = [company for company in companies if company.ticker not in done]
+            self.stdout.write(
+                self.style.WARNING(f"Resuming: {total - len(companies)} already updated")
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updating {len(companies)} companies with {workers} workers...")
+        )
 
-        self.stdout.write(self.style.SUCCESS(f"Updating {total} companies..."))
-
+        runnable = []
         for company in companies:
-            try:
-                if not company.ticker:
-                    self.stdout.write(self.style.WARNING(f"Skipping {company.name}: No ticker"))
-                    continue
-
-                if not normalize_symbol(company.ticker):
-                    self.stdout.write(
-                        self.style.ERROR(f"{company.ticker}: Unsupported ticker format for AkShare")
-                    )
-                    failed += 1
-                    continue
-
-                hist = self.fetch_daily_bars(company.ticker)
-                if hist.empty:
-                    self.stdout.write(
-                        self.style.WARNING(f"{company.ticker}: No AkShare data returned")
-                    )
-                    failed += 1
-                    continue
-
-                last_row = hist.iloc[-1]
-                open_price = float(last_row["open"])
-                last_close = float(last_row["close"])
-
-                if pd.notna(last_row.get("pre_close")):
-                    previous_close = float(last_row["pre_close"])
-                elif len(hist) > 1:
-                    previous_close = float(hist["close"].iloc[-2])
-                else:
-                    previous_close = last_close
-
-                recent_window = hist.tail(260)
-                if recent_window.empty:
-                    recent_window = hist
-
-                fifty_two_week_high = (
-                    float(recent_window["high"].max()) if not recent_window.empty else None
-                )
-                fifty_two_week_low = (
-                    float(recent_window["low"].min()) if not recent_window.empty else None
-                )
-
-                if pd.isna(fifty_two_week_high):
-                    fifty_two_week_high = None
-                if pd.isna(fifty_two_week_low):
-                    fifty_two_week_low = None
-
-                if pd.isna(open_price):
-                    open_price = None
-                if pd.isna(previous_close):
-                    previous_close = None
-                if pd.isna(last_close):
-                    last_close = None
-
-                last_trade_date = last_row["trade_date"].date()
-
-                # Prepare update data
-                update_data = {}
-
-                if open_price is not None:
-                    update_data["price_local_currency"] = open_price
-
-                if previous_close is not None:
-                    update_data["previous_close"] = previous_close
-
-                if fifty_two_week_high is not None:
-                    update_data["price_52w_high"] = fifty_two_week_high
-
-                if fifty_two_week_low is not None:
-                    update_data["price_52w_low"] = fifty_two_week_low
-
-                if last_trade_date is not None:
-                    update_data["last_trade_date"] = last_trade_date
-
-                # Display update info
-                open_str = f"{open_price:.2f}" if open_price is not None else "N/A"
-                prev_close_str = f"{previous_close:.2f}" if previous_close is not None else "N/A"
-                high_str = (
-                    f"{fifty_two_week_high:.2f}" if fifty_two_week_high is not None else "N/A"
-                )
-                low_str = f"{fifty_two_week_low:.2f}" if fifty_two_week_low is not None else "N/A"
-
+            if not company.ticker:
+                self.stdout.write(self.style.WARNING(f"Skipping {company.name}: No ticker"))
+                skipped += 1
+                continue
+            if not normalize_symbol(company.ticker):
                 self.stdout.write(
-                    f"{company.ticker} ({company.name[:30]}) [{company.exchange}]: "
-                    f"Open={open_str}, "
-                    f"Prev Close={prev_close_str}, "
-                    f"52W H/L={high_str}/{low_str}, "
-                    f"Last Trade={last_trade_date}"
+                    self.style.WARNING(
+                        f"Skipping {company.ticker}: Unsupported ticker format for AkShare"
+                    )
                 )
+                skipped += 1
+                continue
+            runnable.append(company)
 
-                # Save to database (unless dry run)
-                if not dry_run and update_data:
-                    for field, value in update_data.items():
-                        setattr(company, field, value)
-                    company.save(update_fields=[*list(update_data.keys()), "updated_at"])
+        limiter = TokenBucket(rate, burst=1) if rate > 0 else None
+        pending: list[tuple[Company, dict]] = []
+        started = time.monotonic()
 
-                updated += 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="price-fetch") as pool:
+            futures = {
+                pool.submit(self._fetch, company.ticker, limiter): company for company in runnable
+            }
+            for future in as_completed(futures):
+                company = futures[future]
+                try:
+                    hist = future.result()
+                    if hist.empty:
+                        self.stdout.write(
+                            self.style.WARNING(f"{company.ticker}: No AkShare data returned")
+                        )
+                        failed += 1
+                        continue
+
+                    update_data = self.compute_price_fields(hist)
+                    self.stdout.write(self._describe(company, update_data))
+                    if not dry_run and update_data:
+                        pending.append((company, update_data))
+                        if len(pending) >= batch_size:
+                            self._flush(pending, batch_size, checkpoint, selection, done)
+                    updated += 1
+
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"{company.ticker}: {e!s}"))
+                    logger.exception("Failed to update %s", company.ticker)
+                    failed += 1
 
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"{company.ticker}: {e!s}"))
-                logger.exception("Failed to update %s", company.ticker)
-                failed += 1
+        self._flush(pending, batch_size, checkpoint, selection, done)
+        if not dry_run and not failed:
+            checkpoint.unlink(missing_ok=True)
 
         # Summary
         self.stdout.write(self.style.SUCCESS("\nUpdate Summary:"))
         self.stdout.write(f"   Total: {total}")
         self.stdout.write(self.style.SUCCESS(f"   Updated: {updated}"))
+        if skipped > 0:
+            self.stdout.write(self.style.WARNING(f"   Skipped: {skipped}"))
         if failed > 0:
             self.stdout.write(self.style.ERROR(f"   Failed: {failed}"))
+            if not dry_run:
+                self.stdout.write("   Re-run with --resume to retry only the remaining tickers")
+        self.stdout.write(f"   Elapsed: {time.monotonic() - started:.1f}s")
 
         if dry_run:
             self.stdout.write(self.style.WARNING("\nDRY RUN COMPLETE - No changes were saved"))
+
+    @staticmethod
+    def _describe(company, update_data: dict) -> str:
+        def price(field):
+            value = update_data.get(field)
+            return f"{value:.2f}" if value is not None else "N/A"
+
+        return (
+            f"{company.ticker} ({company.name[:30]}) [{company.exchange}]: "
+            f"Open={price('price_local_currency')}, "
+            f"Prev Close={price('previous_close')}, "
+            f"52W H/L={price('price_52w_high')}/{price('price_52w_low')}, "
+            f"Last Trade={update_data.get('last_trade_date')}"
+        )
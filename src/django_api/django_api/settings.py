@@ -15,6 +15,8 @@ import os
 import sys
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # 尝试加载环境变量（如果dotenv可用且不在生产环境）
 # 生产环境 (Docker/ECS) 中环境变量由容器运行时提供，不需要 dotenv
 if os.getenv("ENVIRONMENT") != "production":
@@ -409,6 +411,10 @@ else:
 
 ASGI_APPLICATION = "django_api.asgi.application"
 
+# Serve the stock chart endpoints (intraday/historical/batch) with async-native
+# views. Enable when running under the ASGI server; WSGI keeps the DRF views.
+STOCKS_ASYNC_VIEWS = os.getenv("STOCKS_ASYNC_VIEWS", "false").lower() == "true"
+
 # Channel layer configuration
 # In production, use Redis; in development, use in-memory layer by default
 REDIS_HOST = os.getenv("REDIS_HOST", "")
@@ -434,6 +440,34 @@ else:
         },
     }
 
+# Caches. The "stocks" alias (stocks.stock_cache) is Redis when configured, so
+# its job locks, rotation cursors and cached stock data are shared by every web
+# and Celery process; without Redis it falls back to a per-process local-memory
+# cache that only suits single-process development. The default cache is
+# unchanged.
+CACHE_REDIS_URL = os.getenv("REDIS_URL") or (
+    f"redis://{REDIS_HOST}:{REDIS_PORT}/1" if REDIS_HOST else ""
+)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "stocks": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "stocks",
+    },
+}
+if CACHE_REDIS_URL:
+    CACHES["stocks"] = {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": CACHE_REDIS_URL,
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": 1.5,
+            "SOCKET_TIMEOUT": 1.5,
+        },
+    }
+
 # =============================================================================
 # Celery Configuration (Async Task Queue)
 # =============================================================================
@@ -475,6 +509,65 @@ CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Fetch one task at a time
 # Task tracking
 CELERY_TASK_TRACK_STARTED = True
 
+# Periodic tasks (run with `celery -A django_api worker -B` or a separate beat).
+# Hours are in CELERY_TIMEZONE, which shares UTC+8 with the China A-share market.
+CELERY_BEAT_SCHEDULE = {
+    # Intraday 1m caches, every minute across the trading sessions; the task
+    # itself skips the lunch break and pre-open minutes.
+    "stocks-warm-intraday-caches": {
+        "task": "stocks.tasks.warm_intraday_caches",
+        "schedule": crontab(minute="*", hour="9-15", day_of_week="mon-fri"),
+        "options": {"expires": 55},
+    },
+    "stocks-warm-daily-caches": {
+        "task": "stocks.tasks.warm_daily_caches",
+        "schedule": crontab(minute="*/15", hour="9-14", day_of_week="mon-fri"),
+        "options": {"expires": 600},
+    },
+    # One full rebuild once the close is final.
+    "stocks-rebuild-daily-caches": {
+        "task": "stocks.tasks.warm_daily_caches",
+        "schedule": crontab(minute=10, hour=15, day_of_week="mon-fri"),
+        "kwargs": {"after_close": True},
+    },
+    # Archive the day's final minute bars.
+    "stocks-archive-intraday-bars": {
+        "task": "stocks.tasks.archive_intraday_bars",
+        "schedule": crontab(minute=20, hour=15, day_of_week="mon-fri"),
+    },
+    # Daily scores from the rebuilt bars.
+    "stocks-calculate-scores": {
+        "task": "stocks.tasks.calculate_stock_scores",
+        "schedule": crontab(minute=30, hour=15, day_of_week="mon-fri"),
+        "kwargs": {"after_close": True},
+    },
+    # Sector indices from the rebuilt bars.
+    "stocks-compute-sector-indices": {
+        "task": "stocks.tasks.compute_sector_indices",
+        "schedule": crontab(minute=35, hour=15, day_of_week="mon-fri"),
+        "kwargs": {"after_close": True},
+    },
+    # Nightly return correlation matrices and betas.
+    "stocks-compute-correlations": {
+        "task": "stocks.tasks.compute_correlation_matrices",
+        "schedule": crontab(minute=0, hour=18, day_of_week="mon-fri"),
+        "kwargs": {"after_close": True},
+    },
+}
+
+# =============================================================================
+# Stock Cache Warmer Configuration
+# =============================================================================
+# Upstream (AkShare) request budget shared by the cache warming tasks.
+STOCK_WARMER_RATE_PER_SECOND = float(os.getenv("STOCK_WARMER_RATE_PER_SECOND", "5"))
+STOCK_WARMER_CONCURRENCY = int(os.getenv("STOCK_WARMER_CONCURRENCY", "4"))
+# Memory-mapped daily bar and indicator columns published by the daily warm job; empty disables.
+STOCK_ARRAY_STORE_DIR = os.getenv("STOCK_ARRAY_STORE_DIR", str(BASE_DIR / "data" / "arrays"))
+# Compressed per-day 1-minute bar blocks written after the close (~2 KB per symbol-day).
+STOCK_INTRADAY_ARCHIVE_DIR = os.getenv(
+    "STOCK_INTRADAY_ARCHIVE_DIR", str(BASE_DIR / "data" / "intraday")
+)
+
 # =============================================================================
 # Automation Module Configuration
 # =============================================================================
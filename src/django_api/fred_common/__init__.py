@@ -19,6 +19,7 @@ from .base_serializers import (
     BaseObservationSerializer,
     BaseStatusSerializer,
 )
+from .bulk_upsert import BulkUpsertResult, bulk_upsert_observations
 from .constants import (
     DEFAULT_DATE_FORMAT,
     DEFAULT_TIMEOUT,
@@ -52,10 +53,12 @@ __all__ = [
     "BaseLatestValueSerializer",
     "BaseObservationSerializer",
     "BaseStatusSerializer",
+    "BulkUpsertResult",
     "ErrorResponseMixin",
     "FredViewSetMixin",
     "HealthCheckMixin",
     "StatusMixin",
+    "bulk_upsert_observations",
     "calculate_yoy_change",
     "clean_numeric_value",
     "format_date",
@@ -0,0 +1,90 @@
+"""
+FRED Bulk Upsert - 观测数据批量写入
+按 (series_id, date) 批量插入或更新FRED观测数据
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any
+
+from django.db import transaction
+
+from .utils import clean_numeric_value
+
+logger = logging.getLogger(__name__)
+
+BULK_UPSERT_CHUNK_SIZE = 500
+
+
+@dataclass(frozen=True)
+class BulkUpsertResult:
+    """批量写入结果"""
+
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.inserted + self.updated
+
+
+def bulk_upsert_observations(
+    model,
+    series_id: str,
+    observations: list[dict],
+    *,
+    defaults: dict[str, Any],
+    chunk_size: int = BULK_UPSERT_CHUNK_SIZE,
+) -> BulkUpsertResult:
+    """
+    批量写入一个系列的观测数据
+
+    每个分块先用一次索引查询统计已存在的日期，再执行一条
+    INSERT ... ON CONFLICT (series_id, date) DO UPDATE 语句。
+
+    Args:
+        model: BaseFredModel 子类
+        series_id: FRED系列ID
+        observations: FRED API返回的观测数据列表 ({"date": ..., "value": ...})
+        defaults: 每行共用的字段值 (indicator_name, indicator_type, source, metadata)，
+            冲突时与 value 一起更新
+        chunk_size: 每条语句写入的最大行数
+
+    Returns:
+        新增、更新和跳过的记录数
+    """
+    values = {}
+    skipped = 0
+    for observation in observations:
+        date = observation.get("date")
+        value = clean_numeric_value(observation.get("value"))
+        if not date or value is None or not math.isfinite(value):
+            skipped += 1
+            continue
+        # 同一语句内的重复日期会触发冲突错误，保留最后一个值
+        values[date] = value
+
+    inserted = updated = 0
+    dates = list(values)
+    for start in range(0, len(dates), chunk_size):
+        chunk = dates[start : start + chunk_size]
+        rows = [
+            model(series_id=series_id, date=date, value=values[date], **defaults) for date in chunk
+        ]
+        with transaction.atomic():
+            existing = model.objects.filter(series_id=series_id, date__in=chunk).count()
+            model.objects.bulk_create(
+                rows,
+                batch_size=chunk_size,
+                update_conflicts=True,
+                unique_fields=["series_id", "date"],
+                update_fields=[*defaults, "value", "updated_at"],
+            )
+        inserted += len(chunk) - existing
+        updated += existing
+
+    if skipped:
+        logger.warning(f"跳过无效数据点 {series_id}: {skipped} 条")
+    return BulkUpsertResult(inserted=inserted, updated=updated, skipped=skipped)
@@ -9,8 +9,10 @@ from datetime import UTC, datetime
 from typing import Any
 
 from fred_common.base_fetcher import BaseFredDataFetcher
+from fred_common.bulk_upsert import bulk_upsert_observations
 
 from .config_manager import JapanFredConfigManager
+from .models import FredJpIndicator
 
 logger = logging.getLogger(__name__)
 
@@ -391,10 +393,34 @@ class JapanFredDataFetcher(BaseFredDataFetcher):
         Returns:
             保存的记录数
         """
+        indicator_type = next(
+            (
+                name
+                for name, config in self.config_manager.JAPAN_INDICATORS.items()
+                if config["series_id"] == series_id
+            ),
+            "unknown",
+        )
+        config = self.config_manager.get_indicator_config(indicator_type) or {}
+
         try:
-            # 这里应该保存到数据库，但目前只记录日志
-            logger.info(f"保存观测数据: {series_id} - {len(observations)}条记录")
-            return len(observations)
+            result = bulk_upsert_observations(
+                FredJpIndicator,
+                series_id,
+                observations,
+                defaults={
+                    "indicator_name": config.get("name", f"Japan {series_id}"),
+                    "indicator_type": indicator_type,
+                    "source": "FRED",
+                    "unit": config.get("unit"),
+                    "frequency": config.get("frequency"),
+                    "metadata": {"country": "JP", "original_series_id": series_id},
+                },
+            )
+            logger.info(
+                f"保存观测数据: {series_id} - 新增 {result.inserted} 条, 更新 {result.updated} 条记录"
+            )
+            return result.saved
         except Exception:
             logger.exception("保存观测数据失败")
             return 0
@@ -7,6 +7,7 @@ import logging
 from typing import Any
 
 from fred_common.base_fetcher import BaseFredDataFetcher
+from fred_common.bulk_upsert import bulk_upsert_observations
 
 from .models import FredUsIndicator, FredUsSeriesInfo
 
@@ -46,42 +47,27 @@ class UsFredDataFetcher(BaseFredDataFetcher):
 
     def save_observations(self, series_id: str, observations: list[dict]) -> int:
         """保存观测数据到美国FRED数据库 - 实现基类抽象方法"""
-        saved_count = 0
         indicator_mapping = self.get_indicator_mapping()
         indicator_type = indicator_mapping.get(series_id, "unknown")
         indicator_name = f"US {indicator_type.replace('_', ' ').title()}"
 
         try:
-            for observation in observations:
-                date = observation.get("date")
-                value = observation.get("value")
-
-                if date and value and value != ".":
-                    try:
-                        _indicator_obj, created = FredUsIndicator.objects.update_or_create(
-                            series_id=series_id,
-                            date=date,
-                            defaults={
-                                "indicator_name": indicator_name,
-                                "indicator_type": indicator_type,
-                                "value": float(value),
-                                "source": "FRED",
-                                "metadata": {
-                                    "country": self.country,
-                                    "original_series_id": series_id,
-                                },
-                            },
-                        )
-
-                        if created:
-                            saved_count += 1
-
-                    except (ValueError, TypeError) as e:
-                        logger.warning(f"跳过无效数据点 {series_id} {date}: {value} - {e}")
-                        continue
-
-            logger.info(f"成功保存美国观测数据: {series_id}, 新增 {saved_count} 条记录")
-            return saved_count
+            result = bulk_upsert_observations(
+                FredUsIndicator,
+                series_id,
+                observations,
+                defaults={
+                    "indicator_name": indicator_name,
+                    "indicator_type": indicator_type,
+                    "source": "FRED",
+                    "metadata": {"country": self.country, "original_series_id": series_id},
+                },
+            )
+            logger.info(
+                f"成功保存美国观测数据: {series_id}, 新增 {result.inserted} 条, "
+                f"更新 {result.updated} 条记录"
+            )
+            return result.inserted
 
         except Exception:
             logger.exception("保存美国观测数据失败 {series_id}")
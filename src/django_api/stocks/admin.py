@@ -1,6 +1,15 @@
 from django.contrib import admin
+from django.db import transaction
 
-from .models import ScoreCalculationLog, StockScore
+from . import latest_scores
+from .models import (
+    CorrelationMatrix,
+    DailyBar,
+    LatestStockScore,
+    ScoreCalculationLog,
+    SectorIndexBar,
+    StockScore,
+)
 
 
 @admin.register(StockScore)
@@ -11,13 +20,42 @@ class StockScoreAdmin(admin.ModelAdmin):
         "total_score",
         "recommended_action",
         "last_trading_date",
+        "score_version",
     )
-    list_filter = ("calculation_date", "recommended_action")
+    list_filter = ("calculation_date", "recommended_action", "score_version")
     search_fields = ("ticker", "company_name")
     ordering = ("-calculation_date", "ticker")
     readonly_fields = ("created_at", "updated_at")
     exclude = ("buy_score", "buy_reasons", "sell_score", "sell_reasons")
 
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if change:
+                # The edit may have moved the score to another ticker or an earlier date.
+                latest_scores.reproject([obj.ticker, form.initial.get("ticker", obj.ticker)])
+            else:
+                latest_scores.record([obj])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            latest_scores.reproject([obj.ticker])
+
+    def delete_queryset(self, request, queryset):
+        tickers = list(queryset.values_list("ticker", flat=True).distinct())
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            latest_scores.reproject(tickers)
+
+
+@admin.register(LatestStockScore)
+class LatestStockScoreAdmin(admin.ModelAdmin):
+    list_display = ("ticker", "calculation_date", "updated_at")
+    search_fields = ("ticker",)
+    ordering = ("ticker",)
+    readonly_fields = ("ticker", "calculation_date", "snapshot", "updated_at")
+
 
 @admin.register(ScoreCalculationLog)
 class ScoreCalculationLogAdmin(admin.ModelAdmin):
@@ -33,3 +71,38 @@ class ScoreCalculationLogAdmin(admin.ModelAdmin):
     list_filter = ("status",)
     search_fields = ("calculation_date",)
     ordering = ("-calculation_date",)
+
+
+@admin.register(DailyBar)
+class DailyBarAdmin(admin.ModelAdmin):
+    list_display = ("ticker", "trade_date", "open", "high", "low", "close", "volume")
+    list_filter = ("trade_date",)
+    search_fields = ("ticker",)
+    ordering = ("ticker", "-trade_date")
+    readonly_fields = ("updated_at",)
+
+
+@admin.register(SectorIndexBar)
+class SectorIndexBarAdmin(admin.ModelAdmin):
+    list_display = (
+        "grouping",
+        "sector",
+        "trade_date",
+        "cap_weighted",
+        "equal_weighted",
+        "breadth",
+        "members",
+    )
+    list_filter = ("grouping", "trade_date")
+    search_fields = ("sector",)
+    ordering = ("grouping", "sector", "-trade_date")
+    readonly_fields = ("updated_at",)
+
+
+@admin.register(CorrelationMatrix)
+class CorrelationMatrixAdmin(admin.ModelAdmin):
+    list_display = ("as_of", "window", "updated_at")
+    list_filter = ("window",)
+    ordering = ("-as_of", "window")
+    exclude = ("upper_triangle",)
+    readonly_fields = ("symbols", "exposures", "created_at", "updated_at")
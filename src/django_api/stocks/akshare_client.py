@@ -1,11 +1,36 @@
 import logging
+import os
 from datetime import datetime
 
 import akshare as ak
 import pandas as pd
 
+from . import cache_codec
+from .stock_cache import cache
+from .upstream import UpstreamGuard, UpstreamUnavailableError, create_redis_client
+
 logger = logging.getLogger(__name__)
 
+# All AkShare traffic (charts, sparklines, warmers, price updates) shares one
+# budget and worker pool; see stocks/upstream.py.
+upstream = UpstreamGuard(
+    "akshare",
+    rate=float(os.getenv("STOCK_AKSHARE_RATE_PER_SECOND", "5")),
+    burst=float(os.getenv("STOCK_AKSHARE_BURST", "10")),
+    max_workers=int(os.getenv("STOCK_AKSHARE_MAX_WORKERS", "8")),
+    max_wait=float(os.getenv("STOCK_AKSHARE_MAX_WAIT", "10")),
+    timeouts={
+        "stock_zh_a_hist": 20.0,
+        "stock_zh_a_hist_tx": 20.0,
+        "stock_zh_a_minute": 10.0,
+    },
+    failure_threshold=int(os.getenv("STOCK_AKSHARE_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("STOCK_AKSHARE_BREAKER_RESET", "30")),
+    redis_client=create_redis_client(os.getenv("REDIS_URL")),
+)
+# Last good minute series per symbol/period, served while upstream is failing.
+STALE_MINUTE_TIMEOUT = 24 * 3600
+
 # Mapping of application intervals to AkShare period strings
 MINUTE_PERIOD_MAP = {
     "1m": "1",
@@ -50,11 +75,21 @@ def get_minute_data(symbol: str, interval: str = "1m", adjust: str = "") -> pd.D
         return pd.DataFrame()
 
     period = MINUTE_PERIOD_MAP.get(interval, "1")
+    stale_key = f"akshare:stale:minute:{symbol}:{period}:{adjust}"
     try:
-        df_raw = ak.stock_zh_a_minute(symbol=ak_symbol, period=period, adjust=adjust)
+        df_raw = upstream.call(
+            "stock_zh_a_minute",
+            ak.stock_zh_a_minute,
+            symbol=ak_symbol,
+            period=period,
+            adjust=adjust,
+        )
+    except UpstreamUnavailableError as exc:
+        logger.warning("AkShare minute data unavailable for %s (%s); serving stale", symbol, exc)
+        return _stale_frame(stale_key)
     except Exception:  # pragma: no cover - upstream network issues
         logger.exception("AkShare minute data request failed for %s", symbol)
-        return pd.DataFrame()
+        return _stale_frame(stale_key)
 
     if df_raw is None or df_raw.empty:
         return pd.DataFrame()
@@ -89,11 +124,30 @@ def get_minute_data(symbol: str, interval: str = "1m", adjust: str = "") -> pd.D
     df_raw = df_raw[~df_raw.index.duplicated(keep="first")]
     df_raw["Volume"] = df_raw["Volume"].fillna(0).round().astype(int)
 
-    return df_raw[["Open", "High", "Low", "Close", "Volume"]]
+    df = df_raw[["Open", "High", "Low", "Close", "Volume"]]
+    if not df.empty:
+        cache.set(stale_key, cache_codec.encode_dataframe(df), timeout=STALE_MINUTE_TIMEOUT)
+    return df
+
+
+def _stale_frame(key: str) -> pd.DataFrame:
+    payload = cache.get(key)
+    if not payload:
+        return pd.DataFrame()
+    try:
+        return cache_codec.decode_dataframe(payload)
+    except ValueError:
+        cache.delete(key)
+        return pd.DataFrame()
 
 
 def get_daily_data(symbol: str, start: datetime, end: datetime, adjust: str = "") -> pd.DataFrame:
-    """Fetch daily data via AkShare, with Tencent fallback when necessary."""
+    """
+    Fetch daily data via AkShare, with Tencent fallback when necessary.
+
+    Returns an empty frame when both sources fail or are short-circuited;
+    ``bar_store`` then keeps serving the stored bars.
+    """
     ak_symbol = normalize_symbol(symbol)
     if not ak_symbol:
         return pd.DataFrame()
@@ -104,7 +158,9 @@ def get_daily_data(symbol: str, start: datetime, end: datetime, adjust: str = ""
     df_raw = pd.DataFrame()
 
     try:
-        df_raw = ak.stock_zh_a_hist(
+        df_raw = upstream.call(
+            "stock_zh_a_hist",
+            ak.stock_zh_a_hist,
             symbol=ak_symbol,
             period="daily",
             start_date=start_str,
@@ -116,11 +172,16 @@ def get_daily_data(symbol: str, start: datetime, end: datetime, adjust: str = ""
 
     if df_raw is None or df_raw.empty:
         try:
-            df_raw = ak.stock_zh_a_hist_tx(
+            df_raw = upstream.call(
+                "stock_zh_a_hist_tx",
+                ak.stock_zh_a_hist_tx,
                 symbol=ak_symbol,
                 start_date=start_str,
                 end_date=end_str,
             )
+        except UpstreamUnavailableError as exc:
+            logger.warning("AkShare daily data unavailable for %s: %s", symbol, exc)
+            return pd.DataFrame()
         except Exception:  # pragma: no cover
             logger.exception("AkShare daily data request failed for %s", symbol)
             return pd.DataFrame()
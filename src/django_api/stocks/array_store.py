@@ -0,0 +1,161 @@
+"""
+Daily Bar Array Store
+Memory-mapped, fixed-dtype daily bar and indicator columns shared by every
+worker on a host.
+
+Each symbol's full-history indicator frame is written by the daily warm job
+as one raw array file per field inside a fresh generation directory,
+``{root}/v2/{symbol}@{token}/``, and published by atomically replacing the
+``{root}/v2/{symbol}`` symlink. Readers open the columns with
+``numpy.memmap``: there is nothing to deserialize, and all workers share the
+kernel page cache instead of each holding its own copy. A reader that still
+maps a replaced generation keeps a valid view of it.
+"""
+
+import glob
+import logging
+import shutil
+import time
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .indicators import DEFAULT_MA_PERIODS, OBV_MA_PERIODS
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_VERSION = "v2"  # bump when FIELDS changes so old trees are never misread
+BAR_FIELDS = {
+    "Date": np.dtype("datetime64[ns]"),
+    "Open": np.dtype(np.float64),
+    "High": np.dtype(np.float64),
+    "Low": np.dtype(np.float64),
+    "Close": np.dtype(np.float64),
+    "Volume": np.dtype(np.int64),
+}
+INDICATOR_FIELDS = dict.fromkeys(
+    (
+        *(f"MA{period}" for period in DEFAULT_MA_PERIODS),
+        "OBV",
+        *(f"OBV_MA{period}" for period in OBV_MA_PERIODS),
+        "CMF",
+    ),
+    np.dtype(np.float64),
+)
+FIELDS = {**BAR_FIELDS, **INDICATOR_FIELDS}
+# A generation directory no symlink references is only swept once it is this
+# old, so a concurrent writer still filling its directory is never touched.
+ORPHAN_GRACE_SECONDS = 300
+
+_open_frames: dict[str, tuple[str, pd.DataFrame]] = {}
+
+
+def store_root() -> Path | None:
+    """Versioned store directory, or None when ``STOCK_ARRAY_STORE_DIR`` is empty."""
+    root = getattr(settings, "STOCK_ARRAY_STORE_DIR", "")
+    return Path(root) / LAYOUT_VERSION if root else None
+
+
+def _file(directory: Path, field: str) -> Path:
+    return directory / f"{field.lower()}.bin"
+
+
+def write_symbol(symbol: str, frame: pd.DataFrame, *, root: Path | None = None) -> bool:
+    """
+    Publish ``frame`` (the daily indicator frame with ``Date`` as a column) as
+    ``symbol``'s current generation. Returns False when the store is disabled
+    or ``frame`` is empty.
+    """
+    root = root or store_root()
+    if root is None or frame.empty:
+        return False
+    root.mkdir(parents=True, exist_ok=True)
+    generation = root / f"{symbol}@{uuid.uuid4().hex[:12]}"
+    generation.mkdir()
+    for field, dtype in FIELDS.items():
+        np.ascontiguousarray(frame[field].to_numpy(dtype=dtype)).tofile(_file(generation, field))
+
+    link = root / symbol
+    previous = link.readlink().name if link.is_symlink() else None
+    staging = root / f".{generation.name}.link"
+    staging.symlink_to(generation.name)
+    staging.replace(link)
+    _sweep_generations(root, symbol, previous=previous)
+    return True
+
+
+def _sweep_generations(root: Path, symbol: str, *, previous: str | None) -> None:
+    """
+    Remove ``symbol``'s generations the symlink no longer references: the one
+    just replaced right away, and any other (left by a concurrent or crashed
+    writer) once it is older than ``ORPHAN_GRACE_SECONDS``.
+    """
+    try:
+        current = (root / symbol).readlink().name
+    except OSError:
+        return
+    cutoff = time.time() - ORPHAN_GRACE_SECONDS
+    for path in root.glob(f"{glob.escape(symbol)}@*"):
+        if path.name == current:
+            continue
+        try:
+            stale = path.name == previous or path.stat().st_mtime < cutoff
+        except FileNotFoundError:  # removed by a concurrent writer
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def written_at(symbol: str, *, root: Path | None = None) -> datetime | None:
+    """When ``symbol``'s current generation was published (UTC), or None."""
+    root = root or store_root()
+    if root is None:
+        return None
+    try:
+        return datetime.fromtimestamp((root / symbol).lstat().st_mtime, tz=UTC)
+    except FileNotFoundError:
+        return None
+
+
+def read_symbol(symbol: str, *, root: Path | None = None) -> pd.DataFrame | None:
+    """
+    ``symbol``'s bars and indicators as a read-only frame backed by
+    memory-mapped columns, or None when absent. The mapping is reused until a
+    newer generation is published.
+    """
+    root = root or store_root()
+    if root is None:
+        return None
+    try:
+        target = str((root / symbol).readlink())
+    except OSError:
+        return None
+    link = str(root / symbol)
+    cached = _open_frames.get(link)
+    if cached is not None and cached[0] == target:
+        return cached[1]
+
+    generation = root / target
+    columns = {}
+    try:
+        for field, dtype in FIELDS.items():
+            path = _file(generation, field)
+            if path.stat().st_size == 0:
+                return None
+            columns[field] = np.memmap(path, dtype=dtype, mode="r").view(np.ndarray)
+    except FileNotFoundError:  # replaced and removed between readlink and open
+        return None
+    except ValueError as exc:  # truncated file
+        logger.warning("Unreadable array store generation %s: %s", generation, exc)
+        return None
+    if len({len(column) for column in columns.values()}) != 1:
+        logger.warning("Array store generation %s has ragged columns; ignoring", generation)
+        return None
+
+    frame = pd.DataFrame(columns, copy=False)
+    _open_frames[link] = (target, frame)
+    return frame
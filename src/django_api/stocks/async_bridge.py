@@ -0,0 +1,86 @@
+"""
+Async Bridge
+One long-lived event loop for sync callers of the async stock services.
+
+WSGI views and management commands submit coroutines to a daemon thread that
+runs a single event loop for the life of the process, instead of creating and
+tearing down a loop per call. ``LoopLocal`` keeps loop-bound resources such as
+``redis.asyncio`` connection pools attached to the loop that created them, so
+the bridge loop and an ASGI server loop each get their own.
+
+ORM work goes through ``run_db``: it runs on the loop's default executor,
+whose threads outlive any request, so Django's request signals never close
+their connections. ``run_db`` closes stale or expired ones around each call.
+"""
+
+import asyncio
+import threading
+import weakref
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from django.db import close_old_connections
+
+
+class AsyncBridge:
+    """Runs coroutines on a dedicated background event loop from synchronous code."""
+
+    def __init__(self, name: str = "stocks-async-bridge"):
+        self.name = name
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def run(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run ``func(*args, **kwargs)`` on the bridge loop and block until it finishes."""
+        loop = self.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("AsyncBridge.run() would deadlock on its own loop; await instead")
+        return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), loop).result()
+
+
+def _with_db_connections(func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func: Callable[..., Any], /, *args, **kwargs) -> Any:
+    """Run the ORM-touching ``func(*args, **kwargs)`` in a worker thread and await it."""
+    return await asyncio.to_thread(_with_db_connections, func, args, kwargs)
+
+
+class LoopLocal:
+    """Lazily builds one value per running event loop (e.g. a Redis client)."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._values: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._values.get(loop)
+            if value is None:
+                value = self._factory()
+                self._values[loop] = value
+            return value
+
+
+bridge = AsyncBridge()
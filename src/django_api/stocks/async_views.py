@@ -0,0 +1,134 @@
+"""
+Async Stock Views
+Async-native versions of the chart data endpoints for the ASGI deployment.
+
+They await the stock services directly on the server's event loop (sharing
+its Redis pool) instead of handing each request to the sync bridge. Responses
+are rendered with the same JSON conventions as the DRF views. Enabled via
+``STOCKS_ASYNC_VIEWS=true`` (see ``stocks/urls.py``).
+"""
+
+import logging
+
+from asgiref.sync import sync_to_async
+from csi300.models import CSI300Company
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import downsample
+from .services import VWAPCalculationService
+from .views import BATCH_COMPANY_FIELDS, build_batch_payload, company_price_data, parse_batch_params
+
+logger = logging.getLogger(__name__)
+
+# Match DRF's JSONRenderer defaults (UNICODE_JSON, COMPACT_JSON, STRICT_JSON).
+_JSON_DUMPS_PARAMS = {"ensure_ascii": False, "separators": (",", ":"), "allow_nan": False}
+
+
+def _json(payload: dict, status: int = 200) -> JsonResponse:
+    return JsonResponse(
+        payload, status=status, encoder=JSONEncoder, json_dumps_params=_JSON_DUMPS_PARAMS
+    )
+
+
+async def _get_company(symbol: str):
+    try:
+        return await CSI300Company.objects.aget(ticker=symbol)
+    except CSI300Company.DoesNotExist:
+        return None
+
+
+@require_GET
+async def intraday_data(request):
+    """获取分时数据（1分钟K线）- async"""
+    symbol = request.GET.get("symbol")
+    try:
+        layout = request.GET.get("layout", "points")
+        if not symbol:
+            return _json({"success": False, "error": "Symbol parameter is required"}, 400)
+
+        company = await _get_company(symbol)
+        if company is None:
+            return _json(
+                {"success": False, "error": f"Symbol {symbol} not found in CSI300 database"}, 404
+            )
+
+        df = await VWAPCalculationService.aget_intraday_data(symbol, "CN")
+        # Formatting looks up the latest stock score through the ORM.
+        result = await sync_to_async(VWAPCalculationService.format_intraday_response)(
+            df, symbol, company.name, company_price_data(company), layout=layout
+        )
+        return _json(result)
+
+    except Exception as e:
+        logger.exception("Error fetching intraday data for %s", symbol)
+        return _json({"success": False, "error": str(e)}, 500)
+
+
+@require_GET
+async def historical_data(request):
+    """获取历史数据（支持不同时间间隔的K线数据）- async"""
+    symbol = request.GET.get("symbol")
+    try:
+        days = int(request.GET.get("days", 30))
+        interval = request.GET.get("interval", "1d")
+        period = request.GET.get("period", None)
+        layout = request.GET.get("layout", "points")
+        if not symbol:
+            return _json({"success": False, "error": "Symbol parameter is required"}, 400)
+        try:
+            max_points = downsample.parse_max_points(request.GET.get("max_points"))
+        except ValueError as exc:
+            return _json({"success": False, "error": f"Invalid max_points: {exc}"}, 400)
+
+        company = await _get_company(symbol)
+        if company is None:
+            return _json(
+                {"success": False, "error": f"Symbol {symbol} not found in CSI300 database"}, 404
+            )
+
+        df = await VWAPCalculationService.aget_historical_data(symbol, days, interval, period)
+        result = await sync_to_async(VWAPCalculationService.format_historical_response)(
+            df,
+            symbol,
+            company.name,
+            company_price_data(company),
+            layout=layout,
+            max_points=max_points,
+        )
+        return _json(result)
+
+    except Exception as e:
+        logger.exception("Error fetching historical data for %s", symbol)
+        return _json({"success": False, "error": str(e)}, 500)
+
+
+@require_GET
+async def batch_data(request):
+    """批量获取多只股票的历史/分时数据（列式返回）- async"""
+    try:
+        params, error = parse_batch_params(request.GET)
+        if error:
+            return _json({"success": False, "error": error}, 400)
+
+        companies = {
+            company.ticker: company
+            async for company in CSI300Company.objects.filter(ticker__in=params["symbols"]).only(
+                *BATCH_COMPANY_FIELDS
+            )
+        }
+        found = [symbol for symbol in params["symbols"] if symbol in companies]
+
+        if params["kind"] == "intraday":
+            frames = await VWAPCalculationService.aget_intraday_batch(found)
+        else:
+            frames = await VWAPCalculationService.aget_historical_batch(
+                found, params["days"], params["interval"]
+            )
+
+        return _json(build_batch_payload(params, companies, frames))
+
+    except Exception as e:
+        logger.exception("Error fetching batch stock data")
+        return _json({"success": False, "error": str(e)}, 500)
@@ -0,0 +1,339 @@
+"""
+Score Backtest
+Replays stored ``StockScore`` signals against the daily bar store.
+
+Every score at or above ``min_score`` opens a trade at the next bar's open
+(T+1), sized by its ``suggested_position_pct``. From the following bar on
+(A-share T+1 selling) the trade exits at its stop-loss or take-profit
+price, or otherwise at the close of its last holding day. If one bar crosses
+both levels, the stop is assumed to fill first, and a gap through a level
+fills at the open. All trades are simulated at once over a
+``(trades, holding_days)`` window cut from the universe panel; there is no
+per-day loop.
+
+Capital is split into ``holding_days`` staggered sleeves, and each day's
+signals are sized from one of them: when a day's positions add up to more
+than its sleeve, they are scaled down pro rata to fit. A trade is held for
+at most ``holding_days`` bars, so at most that many sleeves are ever open
+and gross exposure never exceeds 1. Results are cached per parameter set
+until new scores arrive.
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from . import bar_store, latest_scores, market_calendar, scoring
+from .models import StockScore
+from .panel import Panel, load_panel_between
+from .stock_cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "stocks:backtest"
+CACHE_TIMEOUT = 3600
+DEFAULT_LOOKBACK_DAYS = 365
+DEFAULT_HOLDING_DAYS = 10
+MAX_HOLDING_DAYS = 60
+MAX_COST_BPS = 500.0
+
+
+class BacktestError(ValueError):
+    """The backtest parameters are invalid."""
+
+
+@dataclass(frozen=True)
+class BacktestParams:
+    start: date
+    end: date
+    holding_days: int = DEFAULT_HOLDING_DAYS
+    min_score: float = float(scoring.BUY_THRESHOLD)
+    cost_bps: float = 0.0
+    symbols: tuple[str, ...] = field(default=())
+
+    def as_dict(self) -> dict:
+        params = asdict(self)
+        params.update(
+            start=self.start.isoformat(), end=self.end.isoformat(), symbols=list(self.symbols)
+        )
+        return params
+
+    def cache_key(self, as_of: date | None) -> str:
+        """Key over every parameter and the newest score date, so new scores miss."""
+        payload = json.dumps({**self.as_dict(), "as_of": str(as_of)}, sort_keys=True)
+        return f"{CACHE_PREFIX}:{hashlib.sha256(payload.encode()).hexdigest()[:24]}"
+
+
+def _parse_date(value: str, name: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BacktestError(f"{name} must be an ISO date (YYYY-MM-DD)") from None
+
+
+def _parse_number(query_params, name: str, default, *, cast, bounds: tuple):
+    value = query_params.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        number = cast(value)
+    except ValueError:
+        raise BacktestError(f"{name} must be a number") from None
+    low, high = bounds
+    if not low <= number <= high:
+        raise BacktestError(f"{name} must be between {low} and {high}")
+    return number
+
+
+def parse_params(query_params) -> BacktestParams:
+    """Backtest parameters from a query dict; raises BacktestError when invalid."""
+    today = bar_store.market_today()
+    end = _parse_date(query_params["end"], "end") if query_params.get("end") else today
+    start = (
+        _parse_date(query_params["start"], "start")
+        if query_params.get("start")
+        else end - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+    )
+    if start > end:
+        raise BacktestError("start must not be after end")
+    raw_symbols = query_params.get("symbols") or ""
+    symbols = tuple(sorted({s.strip() for s in raw_symbols.split(",") if s.strip()}))
+    return BacktestParams(
+        start=start,
+        end=min(end, today),
+        holding_days=_parse_number(
+            query_params,
+            "holding_days",
+            DEFAULT_HOLDING_DAYS,
+            cast=int,
+            bounds=(1, MAX_HOLDING_DAYS),
+        ),
+        min_score=_parse_number(
+            query_params,
+            "min_score",
+            float(scoring.BUY_THRESHOLD),
+            cast=float,
+            bounds=(-100.0, 100.0),
+        ),
+        cost_bps=_parse_number(
+            query_params, "cost_bps", 0.0, cast=float, bounds=(0.0, MAX_COST_BPS)
+        ),
+        symbols=symbols,
+    )
+
+
+def load_signals(params: BacktestParams) -> pd.DataFrame:
+    """
+    One row per (ticker, signal bar): the latest score for that bar within the
+    range, with weight, stop and take-profit as floats (NaN when unset).
+    """
+    queryset = StockScore.objects.current().filter(
+        calculation_date__range=(params.start, params.end), total_score__gte=params.min_score
+    )
+    if params.symbols:
+        queryset = queryset.filter(ticker__in=params.symbols)
+    columns = [
+        "ticker",
+        "calculation_date",
+        "last_trading_date",
+        "total_score",
+        "suggested_position_pct",
+        "stop_loss_price",
+        "take_profit_price",
+    ]
+    rows = list(queryset.order_by("calculation_date").values_list(*columns))
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    frame["signal_date"] = frame["last_trading_date"].fillna(frame["calculation_date"])
+    for column in columns[3:]:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").astype(np.float64)
+    # Scores without a stored size use the scorer's own sizing rule.
+    sized = scoring.MAX_POSITION_PCT * frame["total_score"].clip(0, 100) / 100
+    position = frame["suggested_position_pct"]
+    frame["weight"] = position.where(position > 0, sized)
+    return frame.drop_duplicates(["ticker", "signal_date"], keep="last").reset_index(drop=True)
+
+
+def _drawdown(equity: np.ndarray) -> float:
+    if not len(equity):
+        return 0.0
+    return float(np.min(equity / np.maximum.accumulate(equity) - 1))
+
+
+def _entries(panel: Panel, signals: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Entry row (the bar after the signal bar) and symbol column of each
+    tradable signal, plus the mask of tradable signals: the signal bar is in
+    the panel and the symbol traded on the entry bar.
+    """
+    rows_total = len(panel.dates)
+    valid = np.zeros(len(signals), dtype=bool)
+    if not rows_total or signals.empty:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), valid
+
+    positions = {symbol: position for position, symbol in enumerate(panel.symbols)}
+    column = signals["ticker"].map(positions).to_numpy(dtype=np.float64)
+    signal_days = signals["signal_date"].to_numpy(dtype="datetime64[D]")
+    signal_row = np.minimum(np.searchsorted(panel.dates, signal_days), rows_total - 1)
+    valid = ~np.isnan(column) & (panel.dates[signal_row] == signal_days)
+    column = np.where(valid, column, 0).astype(np.int64)
+    entry = signal_row + 1
+    valid &= entry < rows_total
+    valid[valid] &= panel.traded[entry[valid], column[valid]]
+    return entry[valid], column[valid], valid
+
+
+def _capped_sleeves(
+    entry: np.ndarray, weight: np.ndarray, holding_days: int, rows_total: int
+) -> np.ndarray:
+    """
+    Each trade's sleeve (``weight / holding_days``), with every entry day's
+    sleeves scaled pro rata so they sum to at most one sleeve of capital.
+    """
+    sleeve = weight / holding_days
+    day_total = np.bincount(entry, weights=sleeve, minlength=rows_total)[entry]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(day_total > 1 / holding_days, 1 / holding_days / day_total, 1.0)
+    return sleeve * scale
+
+
+def simulate(
+    panel: Panel,
+    signals: pd.DataFrame,
+    *,
+    holding_days: int = DEFAULT_HOLDING_DAYS,
+    cost_bps: float = 0.0,
+) -> dict:
+    """Trades, exit reasons, equity curves and hit rates for ``signals`` over ``panel``."""
+    dates = panel.dates
+    rows_total = len(dates)
+    entry, column, valid = _entries(panel, signals)
+    chosen = signals[valid]
+    count = len(chosen)
+
+    offsets = np.arange(holding_days)
+    window = entry[:, None] + offsets
+    in_range = window < rows_total
+    window = np.minimum(window, rows_total - 1)
+    ticker_column = column[:, None]
+    opens = panel["Open"][window, ticker_column]
+    highs = panel["High"][window, ticker_column]
+    lows = panel["Low"][window, ticker_column]
+    closes = panel["Close"][window, ticker_column]
+
+    stop = chosen["stop_loss_price"].to_numpy(dtype=np.float64)
+    take = chosen["take_profit_price"].to_numpy(dtype=np.float64)
+    can_exit = in_range & (offsets >= 1)
+    stop_hit = can_exit & (lows <= stop[:, None])
+    take_hit = can_exit & (highs >= take[:, None])
+    hit = stop_hit | take_hit
+
+    last = np.minimum(holding_days - 1, rows_total - 1 - entry)
+    first_hit = np.where(hit.any(axis=1), hit.argmax(axis=1), holding_days)
+    triggered = first_hit <= last
+    exit_offset = np.where(triggered, first_hit, last)
+    trade = np.arange(count)
+    is_stop = triggered & stop_hit[trade, exit_offset]
+    is_take = triggered & ~is_stop
+    exit_open = opens[trade, exit_offset]
+    exit_price = np.where(
+        is_stop,
+        np.minimum(exit_open, stop),
+        np.where(is_take, np.maximum(exit_open, take), closes[trade, exit_offset]),
+    )
+    entry_price = opens[:, 0] if count else np.empty(0)
+    cost = cost_bps / 10_000
+    trade_return = exit_price / entry_price - 1 - 2 * cost
+
+    # Daily mark-to-market per trade: entry open -> closes -> exit price.
+    marks = closes.copy()
+    marks[trade, exit_offset] = exit_price
+    previous = np.concatenate([entry_price[:, None], marks[:, :-1]], axis=1)
+    active = offsets <= exit_offset[:, None]
+    daily = np.where(active, marks / previous - 1, 0.0)
+    daily[:, 0] -= cost
+    daily[trade, exit_offset] -= cost
+
+    sleeve = _capped_sleeves(
+        entry, chosen["weight"].to_numpy(dtype=np.float64), holding_days, rows_total
+    )
+    portfolio = np.zeros(rows_total)
+    exposure = np.zeros(rows_total)
+    np.add.at(portfolio, window[active], (daily * sleeve[:, None])[active])
+    np.add.at(exposure, window[active], np.broadcast_to(sleeve[:, None], active.shape)[active])
+
+    close = panel["Close"]
+    moved = panel.traded[1:] & panel.traded[:-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        universe_returns = np.where(moved, close[1:] / close[:-1] - 1, np.nan)
+    benchmark_returns = np.zeros(rows_total)
+    if rows_total > 1 and universe_returns.shape[1]:
+        counted = moved.any(axis=1)
+        benchmark_returns[1:][counted] = np.nanmean(universe_returns[counted], axis=1)
+
+    strategy_equity = np.cumprod(1 + portfolio)
+    benchmark_equity = np.cumprod(1 + benchmark_returns)
+    expired = ~triggered & (last == holding_days - 1)
+    reasons = {
+        "stop_loss": int(is_stop.sum()),
+        "take_profit": int(is_take.sum()),
+        "expired": int(expired.sum()),
+        "open": int((~triggered & ~expired).sum()),
+    }
+    closed = count - reasons["open"]
+
+    def rate(value: int, total: int) -> float | None:
+        return round(value / total, 4) if total else None
+
+    summary = {
+        "trades": count,
+        "signals": len(signals),
+        "win_rate": rate(int((trade_return[triggered | expired] > 0).sum()), closed),
+        "stop_loss_rate": rate(reasons["stop_loss"], closed),
+        "take_profit_rate": rate(reasons["take_profit"], closed),
+        "avg_trade_return": round(float(trade_return.mean()), 6) if count else None,
+        "avg_holding_days": round(float(exit_offset.mean()) + 1, 2) if count else None,
+        "total_return": round(float(strategy_equity[-1] - 1), 6) if rows_total else 0.0,
+        "max_drawdown": round(_drawdown(strategy_equity), 6),
+        "benchmark_return": round(float(benchmark_equity[-1] - 1), 6) if rows_total else 0.0,
+        "benchmark_max_drawdown": round(_drawdown(benchmark_equity), 6),
+    }
+    return {
+        "summary": summary,
+        "exit_reasons": reasons,
+        "equity": {
+            "dates": [str(day) for day in dates],
+            "strategy": np.round(strategy_equity, 6).tolist(),
+            "benchmark": np.round(benchmark_equity, 6).tolist(),
+            "exposure": np.round(exposure, 6).tolist(),
+        },
+    }
+
+
+def run_backtest(params: BacktestParams) -> dict:
+    """Load signals and bars for ``params`` and simulate them (uncached)."""
+    signals = load_signals(params)
+    symbols = list(params.symbols) or sorted(set(signals["ticker"]))
+    # Bars run past ``end`` far enough for the last signals to reach their horizon.
+    bars_end = min(
+        params.end + timedelta(days=params.holding_days * 2 + 10), bar_store.market_today()
+    )
+    panel = load_panel_between(symbols, params.start, bars_end)
+    result = simulate(panel, signals, holding_days=params.holding_days, cost_bps=params.cost_bps)
+    return {"params": params.as_dict(), **result}
+
+
+def get_backtest(params: BacktestParams, *, refresh: bool = False) -> dict:
+    """``run_backtest`` cached under the parameter hash until new scores land."""
+    key = params.cache_key(latest_scores.latest_calculation_date())
+    if not refresh:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    result = run_backtest(params)
+    cache.set(key, result, timeout=market_calendar.daily_ttl(CACHE_TIMEOUT))
+    return result
@@ -0,0 +1,172 @@
+"""
+Daily Bar Store
+Database-backed daily OHLCV history with incremental AkShare sync.
+
+Each sync only requests bars from the last stored trade date onwards (the
+last bar is re-fetched so a partial intraday bar is replaced by the final
+one), so a symbol costs one full backfill and then a bar or two per day.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from django.db.models import Max
+
+from . import market_calendar
+from .akshare_client import get_daily_data, normalize_symbol
+from .market_calendar import MARKET_TZ
+from .models import DailyBar
+from .stock_cache import cache
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_DAYS = 3650  # ~10 years on first sync
+BAR_COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume"]
+_UPSERT_BATCH_SIZE = 1000
+# A still-forming bar for the current session is re-synced once it is older than this.
+LIVE_BAR_MAX_AGE = timedelta(minutes=15)
+
+
+def market_today() -> date:
+    return datetime.now(tz=MARKET_TZ).date()
+
+
+def last_bar_date(symbol: str) -> date | None:
+    return DailyBar.objects.filter(ticker=symbol).aggregate(last=Max("trade_date"))["last"]
+
+
+def is_current(symbol: str) -> bool:
+    """
+    True when the store holds the newest bar the market calendar allows for
+    ``symbol``: a settled bar for the last trading day, or a still-forming one
+    written within ``LIVE_BAR_MAX_AGE``. Nights, weekends and holidays never
+    need an upstream call.
+    """
+    latest = (
+        DailyBar.objects.filter(ticker=symbol)
+        .order_by("-trade_date")
+        .values_list("trade_date", "updated_at")
+        .first()
+    )
+    return latest is not None and is_current_bar(*latest)
+
+
+def is_current_bar(trade_date: date, updated_at: datetime) -> bool:
+    """True when a bar for ``trade_date`` written at ``updated_at`` needs no re-sync."""
+    if trade_date < market_calendar.last_trading_day():
+        return False
+    if updated_at >= market_calendar.settlement(trade_date):
+        return True
+    return market_calendar.now() - updated_at < LIVE_BAR_MAX_AGE
+
+
+def upsert_bars(symbol: str, bars: pd.DataFrame) -> int:
+    """Insert or update ``bars`` (``get_daily_data`` columns) for ``symbol``."""
+    if bars.empty:
+        return 0
+    rows = [
+        DailyBar(
+            ticker=symbol,
+            trade_date=trade_date.date(),
+            open=round(float(open_), 6),
+            high=round(float(high), 6),
+            low=round(float(low), 6),
+            close=round(float(close), 6),
+            volume=int(volume),
+        )
+        for trade_date, open_, high, low, close, volume in zip(
+            pd.to_datetime(bars["Date"]),
+            bars["Open"],
+            bars["High"],
+            bars["Low"],
+            bars["Close"],
+            bars["Volume"],
+            strict=True,
+        )
+    ]
+    DailyBar.objects.bulk_create(
+        rows,
+        batch_size=_UPSERT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["ticker", "trade_date"],
+        update_fields=["open", "high", "low", "close", "volume", "updated_at"],
+    )
+    return len(rows)
+
+
+def sync_symbol(symbol: str, *, backfill_days: int = BACKFILL_DAYS) -> int:
+    """
+    Fetch bars after the last stored bar for ``symbol`` and upsert them.
+    Returns the number of bars written.
+    """
+    if not normalize_symbol(symbol):
+        return 0
+
+    today = market_today()
+    last = last_bar_date(symbol)
+    start = last if last is not None else today - timedelta(days=backfill_days)
+
+    bars = get_daily_data(
+        symbol, datetime.combine(start, datetime.min.time()), datetime.now(tz=MARKET_TZ)
+    )
+    if bars.empty:
+        return 0
+    written = upsert_bars(symbol, bars)
+    logger.debug("Synced %d daily bars for %s from %s", written, symbol, start)
+    return written
+
+
+def load_bars(symbol: str, *, start: date | None = None, limit: int | None = None) -> pd.DataFrame:
+    """
+    Read stored bars as a ``get_daily_data``-shaped frame, oldest first.
+    ``limit`` keeps only the most recent ``limit`` bars.
+    """
+    queryset = DailyBar.objects.filter(ticker=symbol)
+    if start is not None:
+        queryset = queryset.filter(trade_date__gte=start)
+    fields = ("trade_date", "open", "high", "low", "close", "volume")
+    if limit is not None:
+        rows = list(queryset.order_by("-trade_date").values_list(*fields)[:limit])[::-1]
+    else:
+        rows = list(queryset.order_by("trade_date").values_list(*fields))
+    if not rows:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+
+    trade_dates, opens, highs, lows, closes, volumes = zip(*rows, strict=True)
+    return pd.DataFrame(
+        {
+            "Date": pd.to_datetime(trade_dates),
+            "Open": np.asarray(opens, dtype=np.float64),
+            "High": np.asarray(highs, dtype=np.float64),
+            "Low": np.asarray(lows, dtype=np.float64),
+            "Close": np.asarray(closes, dtype=np.float64),
+            "Volume": np.asarray(volumes, dtype=np.int64),
+        }
+    )
+
+
+def claim_sync_check(symbol: str) -> bool:
+    """
+    True at most once per ``LIVE_BAR_MAX_AGE`` per symbol across processes.
+
+    A suspended symbol, or any read between the open and the first bar, never
+    stores a bar for the last trading day; without this every read would ask
+    AkShare again.
+    """
+    return cache.add(
+        f"stocks:bars:checked:{symbol}", 1, timeout=int(LIVE_BAR_MAX_AGE.total_seconds())
+    )
+
+
+def get_daily_bars(
+    symbol: str, *, start: date | None = None, limit: int | None = None
+) -> pd.DataFrame:
+    """Stored bars for ``symbol``, syncing first unless they are current or were just checked."""
+    if not is_current(symbol) and claim_sync_check(symbol):
+        try:
+            sync_symbol(symbol)
+        except Exception:  # pragma: no cover - upstream/database failure
+            logger.exception("Daily bar sync failed for %s; serving stored bars", symbol)
+    return load_bars(symbol, start=start, limit=limit)
@@ -0,0 +1,210 @@
+"""
+DataFrame Cache Codec
+Binary encoding for the stock cache layer (Redis / Django cache).
+
+Frames are stored as raw NumPy column buffers behind a small versioned header,
+optionally zlib-compressed, so dtypes and DatetimeIndex round-trip exactly
+without the parse cost of ``read_json``. Payloads without the header are
+treated as legacy ``to_json(orient="split")`` entries and still decode.
+
+Layout::
+
+    MAGIC (4 bytes) | version (1) | codec id (1) | meta length (4, big-endian)
+    | meta JSON | column buffers (zlib-compressed when codec id is NUMPY_ZLIB)
+"""
+
+import json
+import struct
+import zlib
+from collections.abc import Callable
+from contextlib import suppress
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"SDFC"
+CODEC_VERSION = 1
+_HEADER = struct.Struct(">4sBBI")
+
+CODEC_JSON = "json"
+CODEC_NUMPY = "numpy"
+CODEC_NUMPY_ZLIB = "numpy-zlib"
+DEFAULT_CODEC = CODEC_NUMPY_ZLIB
+
+_CODEC_IDS = {CODEC_NUMPY: 1, CODEC_NUMPY_ZLIB: 2}
+_ZLIB_LEVEL = 1  # favour speed; price series compress well even at level 1
+
+
+class CacheCodecError(ValueError):
+    """Raised when a frame cannot be encoded or a payload cannot be decoded."""
+
+
+def _encode_array(values, name) -> tuple[dict, bytes]:
+    """Describe one column/index array and return its raw buffer."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        utc = pd.DatetimeIndex(values).tz_convert(None).to_numpy()
+        return (
+            {"name": name, "kind": "datetime", "dtype": str(utc.dtype), "tz": str(dtype.tz)},
+            utc.view(np.int64).tobytes(),
+        )
+    if isinstance(dtype, np.dtype) and dtype.kind == "M":
+        array = np.ascontiguousarray(values)
+        return (
+            {"name": name, "kind": "datetime", "dtype": str(dtype), "tz": None},
+            array.view(np.int64).tobytes(),
+        )
+    if isinstance(dtype, np.dtype) and dtype.kind in "biuf":
+        array = np.ascontiguousarray(values)
+        return {"name": name, "kind": "numeric", "dtype": str(dtype)}, array.tobytes()
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        items = [None if pd.isna(item) else item for item in values]
+        if any(item is not None and not isinstance(item, str) for item in items):
+            raise CacheCodecError(f"Column {name!r} holds non-string objects")
+        return {"name": name, "kind": "string", "dtype": str(dtype), "values": items}, b""
+    raise CacheCodecError(f"Unsupported dtype {dtype} for column {name!r}")
+
+
+def _decode_array(spec: dict, body: memoryview, offset: int, rows: int):
+    kind = spec["kind"]
+    if kind == "string":
+        return pd.array(spec["values"], dtype=spec["dtype"]), offset
+    dtype = np.dtype(spec["dtype"])
+    nbytes = dtype.itemsize * rows
+    storage_dtype = np.int64 if kind == "datetime" else dtype
+    array = np.frombuffer(body, dtype=storage_dtype, count=rows, offset=offset)
+    if kind == "datetime":
+        array = array.view(dtype)
+        if spec.get("tz"):
+            localized = pd.DatetimeIndex(array).tz_localize("UTC").tz_convert(spec["tz"])
+            return localized.array, offset + nbytes
+    return array, offset + nbytes
+
+
+def _encode_numpy(df: pd.DataFrame, compress: bool) -> bytes:
+    specs: list[dict] = []
+    buffers: list[bytes] = []
+
+    index = df.index
+    if isinstance(index, pd.RangeIndex):
+        index_spec = {
+            "kind": "range",
+            "name": index.name,
+            "start": index.start,
+            "stop": index.stop,
+            "step": index.step,
+        }
+    else:
+        index_spec, buffer = _encode_array(index, index.name)
+        buffers.append(buffer)
+
+    for name in df.columns:
+        if not isinstance(name, str):
+            raise CacheCodecError(f"Column label {name!r} is not a string")
+        spec, buffer = _encode_array(df[name], name)
+        specs.append(spec)
+        buffers.append(buffer)
+
+    meta = json.dumps(
+        {"rows": len(df), "index": index_spec, "columns": specs}, separators=(",", ":")
+    ).encode()
+    body = b"".join(buffers)
+    codec = CODEC_NUMPY
+    if compress:
+        body = zlib.compress(body, _ZLIB_LEVEL)
+        codec = CODEC_NUMPY_ZLIB
+    header = _HEADER.pack(MAGIC, CODEC_VERSION, _CODEC_IDS[codec], len(meta))
+    return header + meta + body
+
+
+def _decode_numpy(payload: bytes) -> pd.DataFrame:
+    try:
+        _magic, version, codec_id, meta_length = _HEADER.unpack_from(payload)
+    except struct.error as exc:
+        raise CacheCodecError(f"Truncated cache payload header: {exc}") from exc
+    if version != CODEC_VERSION:
+        raise CacheCodecError(f"Unsupported cache codec version {version}")
+    meta_start = _HEADER.size
+    meta = json.loads(payload[meta_start : meta_start + meta_length])
+    raw = payload[meta_start + meta_length :]
+    if codec_id == _CODEC_IDS[CODEC_NUMPY_ZLIB]:
+        try:
+            raw = zlib.decompress(raw)
+        except zlib.error as exc:
+            raise CacheCodecError(f"Corrupt compressed cache payload: {exc}") from exc
+    elif codec_id != _CODEC_IDS[CODEC_NUMPY]:
+        raise CacheCodecError(f"Unknown cache codec id {codec_id}")
+    # A single writable copy of the body backs every column.
+    body = memoryview(bytearray(raw))
+    rows = meta["rows"]
+
+    offset = 0
+    index_spec = meta["index"]
+    if index_spec["kind"] == "range":
+        index = pd.RangeIndex(
+            index_spec["start"], index_spec["stop"], index_spec["step"], name=index_spec["name"]
+        )
+    else:
+        values, offset = _decode_array(index_spec, body, offset, rows)
+        index = pd.Index(values, name=index_spec["name"])
+
+    columns = {}
+    for spec in meta["columns"]:
+        columns[spec["name"]], offset = _decode_array(spec, body, offset, rows)
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _encode_json(df: pd.DataFrame) -> bytes:
+    return df.to_json(orient="split").encode()
+
+
+def _decode_json(payload: bytes | str) -> pd.DataFrame:
+    if isinstance(payload, bytes | bytearray):
+        payload = payload.decode()
+    df = pd.read_json(StringIO(payload), orient="split")
+    return _normalize_json_dataframe(df)
+
+
+def _normalize_json_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Recover datetime columns that ``to_json`` flattened to epoch values."""
+    if isinstance(df.index, pd.Index) and df.index.dtype == object:
+        with suppress(TypeError, ValueError):  # best effort conversion
+            df.index = pd.to_datetime(df.index)
+    for column in ("Timestamp", "Date"):
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            with suppress(TypeError, ValueError):  # best effort conversion
+                df[column] = pd.to_datetime(df[column])
+    return df
+
+
+_ENCODERS: dict[str, Callable[[pd.DataFrame], bytes]] = {
+    CODEC_JSON: _encode_json,
+    CODEC_NUMPY: lambda df: _encode_numpy(df, compress=False),
+    CODEC_NUMPY_ZLIB: lambda df: _encode_numpy(df, compress=True),
+}
+
+AVAILABLE_CODECS = tuple(_ENCODERS)
+
+
+def encode_dataframe(df: pd.DataFrame, codec: str = DEFAULT_CODEC) -> bytes:
+    """
+    Encode ``df`` with the named codec. Frames the binary codecs cannot
+    represent (non-string labels, arbitrary objects) fall back to JSON.
+    """
+    encoder = _ENCODERS.get(codec)
+    if encoder is None:
+        raise CacheCodecError(f"Unknown cache codec {codec!r}")
+    try:
+        return encoder(df)
+    except CacheCodecError:
+        return _encode_json(df)
+
+
+def decode_dataframe(payload: bytes | str) -> pd.DataFrame:
+    """Decode a payload written by any codec version, including legacy JSON strings."""
+    if isinstance(payload, str):
+        return _decode_json(payload)
+    if payload[: len(MAGIC)] == MAGIC:
+        return _decode_numpy(payload)
+    return _decode_json(payload)
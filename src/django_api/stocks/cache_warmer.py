@@ -0,0 +1,116 @@
+"""
+Stock Cache Warmer
+Keeps intraday and daily caches for the CSI300 universe warm so chart
+requests rarely wait on AkShare.
+
+Symbols are refreshed at a paced rate (``STOCK_WARMER_RATE_PER_SECOND``) with
+bounded concurrency. When the universe does not fit in one run's budget, a
+shared cursor (``locks.advance_cursor``) rotates through it across runs.
+"""
+
+import asyncio
+import logging
+
+from csi300.models import CSI300Company
+from django.conf import settings
+
+from . import array_store, intraday_archive, locks, market_calendar
+from .akshare_client import get_minute_data, normalize_symbol
+from .services import (
+    VWAPCalculationService,
+    _get_daily_indicator_frame,
+    _get_full_daily_dataframe,
+    _get_resampled_indicator_frame,
+    _run_async,
+)
+
+logger = logging.getLogger(__name__)
+
+RATE_PER_SECOND = float(getattr(settings, "STOCK_WARMER_RATE_PER_SECOND", 5.0))
+CONCURRENCY = int(getattr(settings, "STOCK_WARMER_CONCURRENCY", 4))
+INTRADAY_RUN_SECONDS = 55  # each intraday run must finish before the next minute's run
+
+
+def universe() -> list[str]:
+    """CSI300 tickers AkShare can serve."""
+    tickers = (
+        CSI300Company.objects.exclude(ticker__isnull=True)
+        .exclude(ticker="")
+        .order_by("ticker")
+        .values_list("ticker", flat=True)
+    )
+    return [ticker for ticker in tickers if normalize_symbol(ticker)]
+
+
+def next_batch(name: str, symbols: list[str], budget: int) -> list[str]:
+    """Up to ``budget`` symbols, continuing from where the previous run of ``name`` stopped."""
+    if budget >= len(symbols):
+        return symbols
+    start = locks.advance_cursor(f"stocks:warmer:{name}:cursor", budget) % len(symbols)
+    return (symbols[start:] + symbols[:start])[:budget]
+
+
+async def _paced(symbols: list[str], warm, *, rate: float, limit: int) -> dict[str, bool]:
+    """Start one ``warm(symbol)`` every ``1 / rate`` seconds, at most ``limit`` in flight."""
+    semaphore = asyncio.Semaphore(max(1, limit))
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def run(position: int, symbol: str) -> bool:
+        await asyncio.sleep(max(0.0, started + position / rate - loop.time()))
+        async with semaphore:
+            try:
+                return await warm(symbol)
+            except Exception as exc:
+                logger.warning("Cache warm failed for %s: %s", symbol, exc)
+                return False
+
+    results = await asyncio.gather(*(run(i, symbol) for i, symbol in enumerate(symbols)))
+    return dict(zip(symbols, results, strict=True))
+
+
+async def _warm_intraday(symbol: str) -> bool:
+    df = await VWAPCalculationService._get_intraday_async(symbol, "CN", refresh=True)
+    return not df.empty
+
+
+async def _warm_daily(symbol: str, *, rebuild: bool = False) -> bool:
+    bars = await _get_full_daily_dataframe(symbol, refresh=True)
+    if bars.empty:
+        return False
+    frame = await _get_daily_indicator_frame(symbol, bars)
+    try:
+        await asyncio.to_thread(array_store.write_symbol, symbol, frame.reset_index())
+    except OSError as exc:
+        logger.warning("Array store write failed for %s: %s", symbol, exc)
+    if rebuild:
+        for interval in ("1wk", "1mo"):
+            await _get_resampled_indicator_frame(symbol, interval, refresh=True)
+    return True
+
+
+async def _archive_intraday(symbol: str) -> bool:
+    # The raw session series: the chart cache drops zero-volume minutes and the auction.
+    bars = await asyncio.to_thread(get_minute_data, symbol, "1m")
+    if bars.empty or bars.index[-1].date() != market_calendar.now().date():
+        return False
+    await asyncio.to_thread(intraday_archive.write_day, symbol, bars)
+    return True
+
+
+def warm_intraday(symbols: list[str]) -> dict[str, bool]:
+    budget = max(1, int(RATE_PER_SECOND * INTRADAY_RUN_SECONDS))
+    batch = next_batch("intraday", symbols, budget)
+    return _run_async(_paced, batch, _warm_intraday, rate=RATE_PER_SECOND, limit=CONCURRENCY)
+
+
+def warm_daily(symbols: list[str], *, rebuild: bool = False) -> dict[str, bool]:
+    async def warm(symbol: str) -> bool:
+        return await _warm_daily(symbol, rebuild=rebuild)
+
+    return _run_async(_paced, symbols, warm, rate=RATE_PER_SECOND, limit=CONCURRENCY)
+
+
+def archive_intraday(symbols: list[str]) -> dict[str, bool]:
+    """Fetch each symbol's final session bars and write them to the intraday archive."""
+    return _run_async(_paced, symbols, _archive_intraday, rate=RATE_PER_SECOND, limit=CONCURRENCY)
@@ -0,0 +1,177 @@
+"""
+Return Correlations
+Nightly universe-wide return correlation matrices and market/sector betas.
+
+For each window, the correlation matrix of every CSI300 pair comes from one
+product of the demeaned daily-return matrix with itself. Days a symbol did
+not trade count as zero deviation, which approximates pairwise-complete
+observations without a per-pair loop. Only the upper triangle is stored,
+as float32 (about 175 KB per window for 300 names). A symbol's peer row is
+gathered from it through precomputed pair offsets, so the peer lookup is
+an indexed read instead of a computation.
+
+Each stored window also holds every symbol's correlation and beta against
+the equal-weighted universe return and its own cap-weighted ``im_sector``
+index, both taken from the same panel.
+"""
+
+import logging
+
+import numpy as np
+from django.db import transaction
+
+from . import sector_index
+from .cache_warmer import universe
+from .models import CorrelationMatrix
+from .panel import load_panel
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = (20, 60, 120, 250)
+DEFAULT_WINDOW = 60
+MIN_COVERAGE = 0.8  # share of the window a symbol must have traded
+RETAINED_DAYS = 5  # as-of dates kept per window
+
+
+def daily_returns(close: np.ndarray, traded: np.ndarray) -> np.ndarray:
+    """Close-to-close returns shaped (dates - 1, symbols); NaN unless both days traded."""
+    moved = traded[1:] & traded[:-1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(moved, close[1:] / close[:-1] - 1, np.nan)
+
+
+def _demeaned(returns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    valid = ~np.isnan(returns)
+    counts = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(valid, returns, 0.0).sum(axis=0) / counts
+    return np.where(valid, returns - means, 0.0), valid
+
+
+def correlation_matrix(returns: np.ndarray, *, min_coverage: float = MIN_COVERAGE) -> np.ndarray:
+    """(symbols, symbols) correlations of ``returns`` columns; NaN for thinly traded symbols."""
+    deviations, valid = _demeaned(returns)
+    covariance = deviations.T @ deviations
+    scale = np.sqrt(np.diag(covariance))
+    enough = (valid.mean(axis=0) >= min_coverage) & (scale > 0)
+    scale = np.where(enough, scale, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return covariance / np.outer(scale, scale)
+
+
+def exposure(returns: np.ndarray, benchmark: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Correlation and beta of each ``returns`` column against the matching
+    ``benchmark`` column (or a single benchmark series), over the days the
+    symbol traded.
+    """
+    if benchmark.ndim == 1:
+        benchmark = np.broadcast_to(benchmark[:, None], returns.shape)
+    deviations, valid = _demeaned(returns)
+    benchmark_deviations, _ = _demeaned(np.where(valid, benchmark, np.nan))
+    covariance = (deviations * benchmark_deviations).sum(axis=0)
+    variance = (benchmark_deviations**2).sum(axis=0)
+    own = (deviations**2).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return covariance / np.sqrt(own * variance), covariance / variance
+
+
+def pack_upper(matrix: np.ndarray) -> np.ndarray:
+    """Entries above the diagonal, row-major, as float32."""
+    return matrix[np.triu_indices(len(matrix), k=1)].astype(np.float32)
+
+
+def pair_offsets(position: int, size: int) -> np.ndarray:
+    """Offsets into ``pack_upper`` output of (position, j) for every j != position."""
+    others = np.delete(np.arange(size), position)
+    low = np.minimum(position, others)
+    high = np.maximum(position, others)
+    return low * (2 * size - low - 1) // 2 + (high - low - 1)
+
+
+def _round(value) -> float | None:
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def compute_correlations(symbols: list[str] | None = None) -> list[dict]:
+    """Compute and store every window's matrix and exposures for the universe."""
+    symbols = symbols or universe()
+    panel = load_panel(symbols, bars=max(WINDOWS) + 1)
+    if len(panel.symbols) < 2 or len(panel.dates) < 2:
+        return []
+    as_of = panel.dates[-1].item()
+
+    returns = daily_returns(panel["Close"], panel.traded)
+    traded_today = ~np.isnan(returns)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        market = np.where(traded_today, returns, 0.0).sum(axis=1) / traded_today.sum(axis=1)
+    market = np.nan_to_num(market)
+
+    members, member_sectors, caps = sector_index.sector_members("im_sector")
+    sectors = dict(zip(members, member_sectors, strict=True))
+    positions = [position for position, symbol in enumerate(panel.symbols) if symbol in sectors]
+    sector_returns = np.full(returns.shape, np.nan)
+    if positions:
+        sector_names, series = sector_index.compute_sector_series(
+            panel, sectors, dict(zip(members, caps.tolist(), strict=True))
+        )
+        column = {name: position for position, name in enumerate(sector_names)}
+        sector_columns = [column[sectors[panel.symbols[position]]] for position in positions]
+        sector_returns[:, positions] = series["cap_return"][1:, sector_columns]
+
+    summaries = []
+    for window in WINDOWS:
+        recent = returns[-window:]
+        matrix = correlation_matrix(recent)
+        market_corr, market_beta = exposure(recent, market[-window:])
+        sector_corr, sector_beta = exposure(recent, sector_returns[-window:])
+        exposures = {
+            symbol: {
+                "universe_corr": _round(market_corr[position]),
+                "universe_beta": _round(market_beta[position]),
+                "sector": sectors.get(symbol),
+                "sector_corr": _round(sector_corr[position]),
+                "sector_beta": _round(sector_beta[position]),
+            }
+            for position, symbol in enumerate(panel.symbols)
+        }
+        with transaction.atomic():
+            CorrelationMatrix.objects.update_or_create(
+                window=window,
+                as_of=as_of,
+                defaults={
+                    "symbols": panel.symbols,
+                    "upper_triangle": pack_upper(matrix).tobytes(),
+                    "exposures": exposures,
+                },
+            )
+            stale = CorrelationMatrix.objects.filter(window=window).values_list("as_of", flat=True)
+            CorrelationMatrix.objects.filter(
+                window=window, as_of__in=list(stale.order_by("-as_of")[RETAINED_DAYS:])
+            ).delete()
+        summaries.append({"window": window, "as_of": as_of.isoformat(), "symbols": len(matrix)})
+    return summaries
+
+
+def latest_matrix(window: int, *, exposures_only: bool = False) -> CorrelationMatrix | None:
+    """The newest stored matrix for ``window``; ``exposures_only`` leaves the triangle unloaded."""
+    queryset = CorrelationMatrix.objects.filter(window=window).order_by("-as_of")
+    if exposures_only:
+        queryset = queryset.defer("upper_triangle")
+    return queryset.first()
+
+
+def peer_correlations(matrix: CorrelationMatrix, symbol: str) -> dict[str, float] | None:
+    """Every other symbol's correlation with ``symbol`` (None when not in the matrix)."""
+    try:
+        position = matrix.symbols.index(symbol)
+    except ValueError:
+        return None
+    packed = np.frombuffer(bytes(matrix.upper_triangle), dtype=np.float32)
+    values = packed[pair_offsets(position, len(matrix.symbols))]
+    others = matrix.symbols[:position] + matrix.symbols[position + 1 :]
+    return {
+        other: round(float(value), 4)
+        for other, value in zip(others, values.tolist(), strict=True)
+        if not np.isnan(value)
+    }
@@ -0,0 +1,104 @@
+"""
+Chart Payload Downsampling
+Bounds the number of points sent to the chart clients.
+
+Candlestick frames are aggregated into at most ``max_points`` buckets that
+keep each bucket's first open, extreme high/low, last close and total volume,
+so spikes survive. Indicator columns take the bucket's last bar, matching the
+close. Line frames (no OHLC columns) keep the rows picked by
+Largest-Triangle-Three-Buckets on ``Close``. Either way every column of a row
+comes from the same bars, so indicators stay aligned with prices.
+"""
+
+import numpy as np
+import pandas as pd
+
+MIN_POINTS = 3
+OHLC_COLUMNS = ("Open", "High", "Low", "Close")
+
+
+def parse_max_points(value) -> int | None:
+    """``max_points`` query value -> int (None when absent); raises ValueError when invalid."""
+    if value in (None, ""):
+        return None
+    points = int(value)
+    if points < MIN_POINTS:
+        raise ValueError(f"max_points must be at least {MIN_POINTS}")
+    return points
+
+
+def bucket_starts(length: int, max_points: int) -> np.ndarray:
+    """Start row of each of ``max_points`` contiguous, near-equal buckets."""
+    return np.linspace(0, length, max_points + 1).astype(np.int64)[:-1]
+
+
+def lttb_indices(values, max_points: int) -> np.ndarray:
+    """
+    Rows kept by Largest-Triangle-Three-Buckets, first and last included.
+
+    Bucket averages are computed in one vectorized pass; each bucket then
+    picks the point forming the largest triangle with the previously kept
+    point and the next bucket's average.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    length = len(y)
+    if max_points >= length or max_points < MIN_POINTS:
+        return np.arange(length)
+
+    edges = np.linspace(1, length - 1, max_points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    filled = np.nan_to_num(y)
+    averages_y = np.add.reduceat(filled, edges[:-1]) / counts
+    averages_x = (edges[:-1] + edges[1:] - 1) / 2
+
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, length - 1
+    anchor = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 1 < len(counts):
+            next_x, next_y = averages_x[bucket + 1], averages_y[bucket + 1]
+        else:
+            next_x, next_y = length - 1, filled[-1]
+        xs = np.arange(start, stop)
+        area = np.abs(
+            (anchor - next_x) * (filled[start:stop] - filled[anchor])
+            - (anchor - xs) * (next_y - filled[anchor])
+        )
+        anchor = start + int(np.argmax(np.where(np.isnan(y[start:stop]), -1.0, area)))
+        kept[bucket + 1] = anchor
+    return kept
+
+
+def aggregate_ohlc(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    ``df`` merged into at most ``max_points`` bars labelled by each bucket's last row.
+
+    Open is the bucket's first open, High/Low its extremes, Volume its sum;
+    every other column (Close, indicators, timestamps) is the last row's.
+    """
+    length = len(df)
+    if max_points >= length:
+        return df
+    starts = bucket_starts(length, max_points)
+    ends = np.append(starts[1:], length) - 1
+
+    result = df.iloc[ends].copy()
+    result["Open"] = df["Open"].to_numpy()[starts]
+    result["High"] = np.fmax.reduceat(df["High"].to_numpy(dtype=np.float64), starts)
+    result["Low"] = np.fmin.reduceat(df["Low"].to_numpy(dtype=np.float64), starts)
+    if "Volume" in df.columns:
+        volume = np.add.reduceat(np.nan_to_num(df["Volume"].to_numpy(dtype=np.float64)), starts)
+        result["Volume"] = volume.astype(df["Volume"].dtype, copy=False)
+    return result
+
+
+def downsample_frame(df: pd.DataFrame, max_points: int | None) -> pd.DataFrame:
+    """``df`` reduced to at most ``max_points`` rows; unchanged when it already fits."""
+    if df is None or max_points is None or len(df) <= max_points:
+        return df
+    if all(column in df.columns for column in OHLC_COLUMNS):
+        return aggregate_ohlc(df, max_points)
+    if "Close" in df.columns:
+        return df.iloc[lttb_indices(df["Close"].to_numpy(dtype=np.float64), max_points)]
+    return df.iloc[np.append(bucket_starts(len(df), max_points)[1:], len(df)) - 1]
@@ -0,0 +1,267 @@
+"""
+Vectorized Technical Indicator Engine
+Computes MA, OBV, CMF and VWAP over contiguous NumPy arrays in a single pass.
+
+All functions accept either 1-D arrays (one symbol) or 2-D arrays shaped
+(dates, symbols) and operate along axis 0, so the same code serves per-symbol
+chart requests and universe-wide panels. Results match the pandas
+``rolling(window)`` semantics: a window containing NaN yields NaN.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_MA_PERIODS = (5, 10)
+OBV_MA_PERIODS = (5, 10)
+CMF_PERIOD = 21
+
+
+def as_float_array(values) -> np.ndarray:
+    """Return ``values`` as a contiguous float64 array without copying when possible."""
+    if isinstance(values, pd.Series | pd.DataFrame):
+        values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling sum along axis 0; the first ``window - 1`` rows are NaN."""
+    values = as_float_array(values)
+    out = np.full(values.shape, np.nan, dtype=np.float64)
+    if window <= 0 or values.shape[0] < window:
+        return out
+    out[window - 1 :] = sliding_window_view(values, window, axis=0).sum(axis=-1)
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing rolling mean along axis 0 (pandas ``rolling(window).mean()``)."""
+    return rolling_sum(values, window) / window
+
+
+def on_balance_volume(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Cumulative OBV starting at zero; unchanged or missing closes carry OBV forward."""
+    close = as_float_array(close)
+    volume = as_float_array(volume)
+    obv = np.zeros(close.shape, dtype=np.float64)
+    if close.shape[0] < 2:
+        return obv
+    direction = np.nan_to_num(np.sign(np.diff(close, axis=0)))
+    flow = np.nan_to_num(direction * volume[1:])
+    np.cumsum(flow, axis=0, out=obv[1:])
+    return obv
+
+
+def money_flow_multiplier(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """Chaikin money flow multiplier; bars with ``High == Low`` contribute zero."""
+    high = as_float_array(high)
+    low = as_float_array(low)
+    close = as_float_array(close)
+    spread = high - low
+    numerator = (close - low) - (high - close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        multiplier = numerator / spread
+    multiplier[spread == 0] = 0.0
+    return multiplier
+
+
+def chaikin_money_flow(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    period: int = CMF_PERIOD,
+) -> np.ndarray:
+    """Chaikin Money Flow over ``period`` bars."""
+    volume = as_float_array(volume)
+    mf_volume = money_flow_multiplier(high, low, close) * volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return rolling_sum(mf_volume, period) / rolling_sum(volume, period)
+
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """Cumulative volume-weighted average of the typical price."""
+    volume = as_float_array(volume)
+    typical = (as_float_array(high) + as_float_array(low) + as_float_array(close)) / 3
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.cumsum(typical * volume, axis=0) / np.cumsum(volume, axis=0)
+
+
+def compute_indicators(
+    high,
+    low,
+    close,
+    volume,
+    *,
+    ma_periods: tuple[int, ...] = DEFAULT_MA_PERIODS,
+    cmf_period: int = CMF_PERIOD,
+    include_vwap: bool = False,
+) -> dict[str, np.ndarray]:
+    """
+    Compute the full indicator set in one pass over the price arrays.
+
+    Returns a mapping of column name (``MA5``, ``OBV``, ``CMF``...) to an array
+    with the same shape as ``close``.
+    """
+    high = as_float_array(high)
+    low = as_float_array(low)
+    close = as_float_array(close)
+    volume = as_float_array(volume)
+
+    result: dict[str, np.ndarray] = {}
+    for period in ma_periods:
+        result[f"MA{period}"] = rolling_mean(close, period)
+
+    obv = on_balance_volume(close, volume)
+    result["OBV"] = obv
+    for period in OBV_MA_PERIODS:
+        result[f"OBV_MA{period}"] = rolling_mean(obv, period)
+
+    result["CMF"] = chaikin_money_flow(high, low, close, volume, cmf_period)
+
+    if include_vwap:
+        result["VWAP"] = vwap(high, low, close, volume)
+
+    return result
+
+
+def apply_indicators(
+    df: pd.DataFrame,
+    *,
+    ma_periods: tuple[int, ...] = DEFAULT_MA_PERIODS,
+    cmf_period: int = CMF_PERIOD,
+    include_vwap: bool = False,
+) -> pd.DataFrame:
+    """Return a new frame with the indicator columns appended (single allocation)."""
+    if df.empty:
+        return df.copy()
+    columns = compute_indicators(
+        df["High"],
+        df["Low"],
+        df["Close"],
+        df["Volume"],
+        ma_periods=ma_periods,
+        cmf_period=cmf_period,
+        include_vwap=include_vwap,
+    )
+    return df.assign(**columns)
+
+
+@dataclass
+class IndicatorState:
+    """
+    Streaming state for extending the indicator set with newly arrived bars.
+
+    Holds only the trailing window of inputs plus the running OBV, so advancing
+    by ``n`` bars costs O(n + window) instead of O(history). Advancing produces
+    exactly the values a full recompute would for the same rows.
+    """
+
+    ma_periods: tuple[int, ...] = DEFAULT_MA_PERIODS
+    cmf_period: int = CMF_PERIOD
+    last_timestamp: pd.Timestamp | None = None
+    bars: int = 0
+    high: np.ndarray = field(default_factory=lambda: np.empty(0))
+    low: np.ndarray = field(default_factory=lambda: np.empty(0))
+    close: np.ndarray = field(default_factory=lambda: np.empty(0))
+    volume: np.ndarray = field(default_factory=lambda: np.empty(0))
+    obv: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+    STATE_VERSION = 1
+    _BUFFERS = ("high", "low", "close", "volume", "obv")
+
+    @property
+    def window(self) -> int:
+        return max(*self.ma_periods, *OBV_MA_PERIODS, self.cmf_period)
+
+    def can_extend(self, df: pd.DataFrame) -> bool:
+        """True when ``df`` still contains the last consumed bar unchanged (no restatement)."""
+        if self.last_timestamp is None:
+            return True
+        if self.last_timestamp not in df.index:
+            return False
+        last_close = float(df.loc[self.last_timestamp, "Close"])
+        return bool(np.isclose(last_close, self.close[-1], rtol=0, atol=1e-9))
+
+    def advance(self, df: pd.DataFrame) -> dict[str, np.ndarray]:
+        """
+        Consume new bars (rows strictly after ``last_timestamp``) and return the
+        indicator columns for those rows only.
+        """
+        if self.last_timestamp is not None:
+            df = df[df.index > self.last_timestamp]
+        size = len(df)
+        if size == 0:
+            return {}
+
+        high = np.concatenate([self.high, as_float_array(df["High"])])
+        low = np.concatenate([self.low, as_float_array(df["Low"])])
+        close = np.concatenate([self.close, as_float_array(df["Close"])])
+        volume = np.concatenate([self.volume, as_float_array(df["Volume"])])
+
+        if self.obv.size:
+            direction = np.nan_to_num(np.sign(np.diff(close[-(size + 1) :])))
+            flow = np.nan_to_num(direction * volume[-size:])
+            new_obv = np.cumsum(np.concatenate([self.obv[-1:], flow]))[1:]
+        else:
+            new_obv = on_balance_volume(close, volume)
+        obv = np.concatenate([self.obv, new_obv])
+
+        result: dict[str, np.ndarray] = {}
+        for period in self.ma_periods:
+            result[f"MA{period}"] = rolling_mean(close, period)[-size:]
+        result["OBV"] = new_obv
+        for period in OBV_MA_PERIODS:
+            result[f"OBV_MA{period}"] = rolling_mean(obv, period)[-size:]
+        result["CMF"] = chaikin_money_flow(high, low, close, volume, self.cmf_period)[-size:]
+
+        keep = self.window
+        self.high, self.low, self.close = high[-keep:], low[-keep:], close[-keep:]
+        self.volume, self.obv = volume[-keep:], obv[-keep:]
+        self.last_timestamp = pd.Timestamp(df.index[-1])
+        self.bars += size
+        return result
+
+    def to_dict(self) -> dict:
+        payload = {
+            "version": self.STATE_VERSION,
+            "ma_periods": list(self.ma_periods),
+            "cmf_period": self.cmf_period,
+            "last_timestamp": self.last_timestamp.isoformat() if self.last_timestamp else None,
+            "bars": self.bars,
+        }
+        for name in self._BUFFERS:
+            payload[name] = getattr(self, name).tolist()
+        return payload
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "IndicatorState | None":
+        if not payload or payload.get("version") != cls.STATE_VERSION:
+            return None
+        last_timestamp = payload.get("last_timestamp")
+        return cls(
+            ma_periods=tuple(payload["ma_periods"]),
+            cmf_period=payload["cmf_period"],
+            last_timestamp=pd.Timestamp(last_timestamp) if last_timestamp else None,
+            bars=payload["bars"],
+            **{name: np.asarray(payload[name], dtype=np.float64) for name in cls._BUFFERS},
+        )
+
+
+def extend_indicator_frame(
+    frame: pd.DataFrame | None, state: IndicatorState, bars: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Append indicator rows for the bars in ``bars`` that ``state`` has not yet
+    consumed onto ``frame`` (a previously computed indicator frame).
+    """
+    if state.last_timestamp is not None:
+        bars = bars[bars.index > state.last_timestamp]
+    if bars.empty:
+        return frame if frame is not None else bars.copy()
+    new_rows = bars.assign(**state.advance(bars))
+    if frame is None or frame.empty:
+        return new_rows
+    return pd.concat([frame, new_rows])
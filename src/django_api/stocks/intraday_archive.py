@@ -0,0 +1,144 @@
+"""
+Intraday Bar Archive
+Compressed per-symbol, per-day blocks of 1-minute bars on local disk.
+
+Each trading day's bars are written once after the close as one file,
+``{root}/{symbol}/{YYYY}/{YYYYMMDD}.bars``. The block stores the bars
+column-wise through the stock cache codec (zlib-compressed NumPy buffers):
+minute offsets and close prices are delta-encoded, open/high/low are offsets
+from the close, and prices are integer ticks of 0.001. A day of CSI300
+minute bars is about 2 KB, so a year for the whole universe is well under
+200 MB. ``load_range`` answers multi-day queries from disk alone.
+"""
+
+import logging
+import tempfile
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from . import cache_codec
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ROOT = Path(getattr(settings, "STOCK_INTRADAY_ARCHIVE_DIR", "data/intraday"))
+PRICE_SCALE = 1000  # 0.001 ticks; exact for exchange-quoted prices
+SUFFIX = ".bars"
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _path(symbol: str, day: date, root: Path | None = None) -> Path:
+    return (root or ARCHIVE_ROOT) / symbol / f"{day:%Y}" / f"{day:%Y%m%d}{SUFFIX}"
+
+
+def encode_day(bars: pd.DataFrame) -> bytes:
+    """One day's minute bars (DatetimeIndex, OHLCV columns) as a compressed block."""
+    index = pd.DatetimeIndex(bars.index)
+    minutes = (index.hour * 60 + index.minute).to_numpy(dtype=np.int16)
+    ticks = {
+        column: np.round(bars[column].to_numpy(dtype=np.float64) * PRICE_SCALE).astype(np.int32)
+        for column in ("Open", "High", "Low", "Close")
+    }
+    close = ticks["Close"]
+    block = pd.DataFrame(
+        {
+            "minute": np.diff(minutes, prepend=np.int16(0)),
+            "open": ticks["Open"] - close,
+            "high": ticks["High"] - close,
+            "low": ticks["Low"] - close,
+            "close": np.diff(close, prepend=np.int32(0)),
+            "volume": bars["Volume"].to_numpy(dtype=np.int64),
+        }
+    )
+    return cache_codec.encode_dataframe(block, codec=cache_codec.CODEC_NUMPY_ZLIB)
+
+
+def decode_day(payload: bytes, day: date) -> pd.DataFrame:
+    """Inverse of ``encode_day``; the index is naive market-local time on ``day``."""
+    block = cache_codec.decode_dataframe(payload)
+    minutes = np.cumsum(block["minute"].to_numpy(dtype=np.int64))
+    close = np.cumsum(block["close"].to_numpy(dtype=np.int64))
+    index = pd.DatetimeIndex(
+        pd.Timestamp(day) + pd.to_timedelta(minutes, unit="min"), name="Datetime"
+    )
+    return pd.DataFrame(
+        {
+            "Open": (block["open"].to_numpy() + close) / PRICE_SCALE,
+            "High": (block["high"].to_numpy() + close) / PRICE_SCALE,
+            "Low": (block["low"].to_numpy() + close) / PRICE_SCALE,
+            "Close": close / PRICE_SCALE,
+            "Volume": block["volume"].to_numpy(dtype=np.int64),
+        },
+        index=index,
+    )
+
+
+def write_day(symbol: str, bars: pd.DataFrame, *, root: Path | None = None) -> date | None:
+    """
+    Archive the last trading day found in ``bars``; returns that day, or None
+    when there is nothing to write. Replaces an existing block atomically.
+    """
+    if bars is None or bars.empty:
+        return None
+    index = pd.DatetimeIndex(bars.index)
+    day = index[-1].date()
+    day_bars = bars[index.normalize() == pd.Timestamp(day)].sort_index()
+
+    payload = encode_day(day_bars)
+    path = _path(symbol, day, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as handle:
+        temp = Path(handle.name)
+        try:
+            handle.write(payload)
+        except BaseException:
+            handle.close()
+            temp.unlink(missing_ok=True)
+            raise
+    temp.replace(path)
+    return day
+
+
+def archived_days(symbol: str, *, root: Path | None = None) -> list[date]:
+    """Days with an archived block for ``symbol``, ascending."""
+    base = (root or ARCHIVE_ROOT) / symbol
+    if not base.is_dir():
+        return []
+    return sorted(
+        date(int(path.stem[:4]), int(path.stem[4:6]), int(path.stem[6:8]))
+        for path in base.glob(f"*/*{SUFFIX}")
+    )
+
+
+def read_day(symbol: str, day: date, *, root: Path | None = None) -> pd.DataFrame:
+    try:
+        payload = _path(symbol, day, root).read_bytes()
+    except FileNotFoundError:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    return decode_day(payload, day)
+
+
+def load_range(
+    symbol: str,
+    days: int,
+    *,
+    end: date | None = None,
+    root: Path | None = None,
+) -> pd.DataFrame:
+    """
+    1-minute bars for the last ``days`` archived trading days on or before
+    ``end`` (default: all), oldest first, in the ``get_minute_data`` layout.
+    """
+    available = [day for day in archived_days(symbol, root=root) if end is None or day <= end]
+    frames = []
+    for day in available[-days:] if days > 0 else []:
+        try:
+            frames.append(read_day(symbol, day, root=root))
+        except cache_codec.CacheCodecError as exc:
+            logger.warning("Skipping unreadable intraday block %s %s: %s", symbol, day, exc)
+    if not frames:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    return pd.concat(frames)
@@ -0,0 +1,152 @@
+"""
+Latest Score Projection
+O(1) reads of each ticker's most recent score and of the latest calculation date.
+
+``LatestStockScore`` keeps one pre-serialized snapshot per ticker, written
+alongside every ``StockScore`` upsert (and rebuilt after deletes), so the intraday and historical
+endpoints read a single row by primary key. The latest calculation date is
+cached so the top-picks endpoints skip the ``MAX(calculation_date)`` query.
+Only scores of the current ``SCORE_VERSION`` are projected.
+"""
+
+import logging
+from datetime import date
+
+from django.db.models import Max, Q
+
+from .models import SCORE_VERSION, LatestStockScore, StockScore
+from .stock_cache import cache
+
+logger = logging.getLogger(__name__)
+
+LATEST_DATE_CACHE_KEY = f"stocks:scores:latest_date:v{SCORE_VERSION}"
+LATEST_DATE_CACHE_TIMEOUT = 300
+
+
+def _to_float(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _iso(value: date | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def snapshot(score: StockScore) -> dict:
+    """The score fields the chart endpoints return for a ticker."""
+    return {
+        "calculation_date": _iso(score.calculation_date),
+        "total_score": _to_float(score.total_score),
+        "recommended_action": score.recommended_action or "",
+        "recommended_action_detail": score.recommended_action_detail or "",
+        "last_trading_date": _iso(score.last_trading_date),
+        "last_close": _to_float(score.last_close),
+        "score_components": score.score_components or {},
+        "signal_date": _iso(score.signal_date),
+        "execution_date": _iso(score.execution_date),
+        "suggested_position_pct": _to_float(score.suggested_position_pct),
+        "stop_loss_price": _to_float(score.stop_loss_price),
+        "take_profit_price": _to_float(score.take_profit_price),
+    }
+
+
+def record(scores: list[StockScore]) -> int:
+    """
+    Project freshly upserted scores; an older calculation never replaces a
+    newer one, and scores of another ``score_version`` are ignored. Returns
+    the number of tickers projected.
+    """
+    scores = [score for score in scores if score.score_version == SCORE_VERSION]
+    current = dict(
+        LatestStockScore.objects.filter(ticker__in=[score.ticker for score in scores]).values_list(
+            "ticker", "calculation_date"
+        )
+    )
+    rows = [
+        LatestStockScore(
+            ticker=score.ticker,
+            calculation_date=score.calculation_date,
+            snapshot=snapshot(score),
+        )
+        for score in scores
+        if current.get(score.ticker) is None or current[score.ticker] <= score.calculation_date
+    ]
+    LatestStockScore.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["ticker"],
+        update_fields=["calculation_date", "snapshot", "updated_at"],
+    )
+    newest = max((row.calculation_date for row in rows), default=None)
+    if newest is not None:
+        cached = latest_calculation_date()
+        if cached is None or cached < newest:
+            cache.set(LATEST_DATE_CACHE_KEY, newest.isoformat(), timeout=LATEST_DATE_CACHE_TIMEOUT)
+    return len(rows)
+
+
+def reproject(tickers: list[str]) -> int:
+    """
+    Rebuild the projection of ``tickers`` from their newest remaining scores,
+    after scores were deleted. Tickers with no score left lose their row.
+    """
+    tickers = list(set(tickers))
+    LatestStockScore.objects.filter(ticker__in=tickers).delete()
+    cache.delete(LATEST_DATE_CACHE_KEY)
+    newest = (
+        StockScore.objects.current()
+        .filter(ticker__in=tickers)
+        .values("ticker")
+        .annotate(last=Max("calculation_date"))
+        .values_list("ticker", "last")
+    )
+    query = Q()
+    for ticker, last in newest:
+        query |= Q(ticker=ticker, calculation_date=last)
+    if not query:
+        return 0
+    return record(list(StockScore.objects.current().filter(query)))
+
+
+def get(symbol: str) -> dict | None:
+    """The ticker's latest score snapshot, by primary key."""
+    row = LatestStockScore.objects.filter(pk=symbol).values_list("snapshot", flat=True).first()
+    if row is not None:
+        return row
+
+    # Scores written before the projection existed: read once, then project.
+    score = (
+        StockScore.objects.current()
+        .filter(ticker=symbol)
+        .order_by("-calculation_date", "-updated_at")
+        .first()
+    )
+    if score is None:
+        return None
+    record([score])
+    return snapshot(score)
+
+
+def total_scores(tickers: list[str]) -> dict[str, float]:
+    """Each projected ticker's latest ``total_score``, in one query."""
+    rows = LatestStockScore.objects.filter(ticker__in=tickers).values_list("ticker", "snapshot")
+    return {
+        ticker: snapshot["total_score"]
+        for ticker, snapshot in rows
+        if snapshot.get("total_score") is not None
+    }
+
+
+def latest_calculation_date() -> date | None:
+    """Most recent calculation date across all scores (cached)."""
+    cached = cache.get(LATEST_DATE_CACHE_KEY)
+    if cached is not None:
+        return date.fromisoformat(cached)
+    latest = StockScore.objects.current().aggregate(latest=Max("calculation_date"))["latest"]
+    if latest is not None:
+        cache.set(LATEST_DATE_CACHE_KEY, latest.isoformat(), timeout=LATEST_DATE_CACHE_TIMEOUT)
+    return latest
@@ -0,0 +1,47 @@
+"""
+Job Locks
+Cross-process exclusion and rotation cursors for the scheduled stock jobs.
+
+Both live in the ``stocks`` cache (``stocks.stock_cache``), which is Redis
+whenever ``REDIS_URL`` or ``REDIS_HOST`` is configured, so they hold across
+Celery prefork children and hosts. A lock is released only by the run
+that took it: a run that outlived its timeout cannot free a newer run's lock.
+"""
+
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .stock_cache import CACHE_ALIAS, cache
+
+
+def cache_is_shared() -> bool:
+    """False when the stocks cache is the per-process local-memory backend."""
+    return not isinstance(caches[CACHE_ALIAS], LocMemCache)
+
+
+@contextmanager
+def job_lock(key: str, timeout: int) -> Iterator[bool]:
+    """Hold ``key`` for up to ``timeout`` seconds; yields False when another run holds it."""
+    token = uuid.uuid4().hex
+    if not cache.add(key, token, timeout=timeout):
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def advance_cursor(key: str, step: int) -> int:
+    """Atomically move the cursor at ``key`` forward by ``step``; returns its previous value."""
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, step) - step
+    except ValueError:  # evicted between add and incr
+        cache.set(key, step, timeout=None)
+        return 0
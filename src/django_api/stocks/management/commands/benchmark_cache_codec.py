@@ -0,0 +1,96 @@
+"""
+Benchmark the stock cache codecs against the legacy JSON payloads.
+Usage:
+    python manage.py benchmark_cache_codec
+    python manage.py benchmark_cache_codec --symbol 600519.SS --iterations 50
+"""
+
+import time
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from stocks import cache_codec, indicators
+from stocks.akshare_client import get_daily_data
+
+
+class Command(BaseCommand):
+    help = "Compare encode/decode time and payload size of the stock cache codecs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--symbol",
+            type=str,
+            help="Benchmark real AkShare daily bars for this symbol instead of synthetic data",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=3650,
+            help="Calendar days of daily bars to benchmark (default: 3650)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Encode/decode repetitions per codec (default: 20)",
+        )
+
+    @staticmethod
+    def synthetic_bars(days: int) -> pd.DataFrame:
+        dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=int(days * 5 / 7))
+        rng = np.random.default_rng(0)
+        close = 50 + rng.standard_normal(len(dates)).cumsum().clip(-40)
+        spread = rng.random(len(dates))
+        return pd.DataFrame(
+            {
+                "Date": dates,
+                "Open": close + rng.standard_normal(len(dates)) * 0.2,
+                "High": close + spread,
+                "Low": close - spread,
+                "Close": close,
+                "Volume": rng.integers(10_000, 5_000_000, len(dates)),
+            }
+        )
+
+    def handle(self, *args, **options):
+        symbol = options.get("symbol")
+        days = options["days"]
+        iterations = max(1, options["iterations"])
+
+        if symbol:
+            end_time = datetime.now(tz=UTC)
+            bars = get_daily_data(symbol, end_time - timedelta(days=days), end_time)
+            if bars.empty:
+                raise CommandError(f"No AkShare data returned for {symbol}")
+        else:
+            bars = self.synthetic_bars(days)
+
+        frames = {
+            "daily-full": bars,
+            "daily-indicators": indicators.apply_indicators(bars.set_index("Date")),
+        }
+
+        for label, frame in frames.items():
+            self.stdout.write(
+                self.style.SUCCESS(f"\n{label}: {len(frame)} rows x {len(frame.columns)} columns")
+            )
+            self.stdout.write(f"{'codec':<12}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+            for codec in cache_codec.AVAILABLE_CODECS:
+                payload = cache_codec.encode_dataframe(frame, codec=codec)
+
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    cache_codec.encode_dataframe(frame, codec=codec)
+                encode_ms = (time.perf_counter() - start) * 1000 / iterations
+
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    cache_codec.decode_dataframe(payload)
+                decode_ms = (time.perf_counter() - start) * 1000 / iterations
+
+                self.stdout.write(
+                    f"{codec:<12}{len(payload):>12,}{encode_ms:>12.2f}{decode_ms:>12.2f}"
+                )
@@ -0,0 +1,70 @@
+"""
+Sync the daily bar store with AkShare, fetching only bars newer than each
+symbol's last stored trading day.
+Usage:
+    python manage.py sync_daily_bars
+    python manage.py sync_daily_bars --exchange SSE
+    python manage.py sync_daily_bars --symbol 600519.SS
+"""
+
+import logging
+
+from csi300.models import CSI300Company
+from django.core.management.base import BaseCommand
+
+from stocks import bar_store
+from stocks.akshare_client import normalize_symbol
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Incrementally sync daily OHLCV bars for CSI300 companies into the bar store"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--symbol",
+            type=str,
+            help="Sync a specific symbol only (e.g., 600519.SS)",
+        )
+        parser.add_argument(
+            "--exchange",
+            type=str,
+            choices=["SSE", "SZSE"],
+            default=None,
+            help="Filter by exchange (SSE, SZSE)",
+        )
+
+    def handle(self, *args, **options):
+        symbol = options.get("symbol")
+        if symbol:
+            symbols = [symbol]
+        else:
+            queryset = CSI300Company.objects.exclude(ticker__isnull=True).exclude(ticker="")
+            if options.get("exchange"):
+                queryset = queryset.filter(exchange=options["exchange"])
+            symbols = list(queryset.order_by("ticker").values_list("ticker", flat=True))
+
+        symbols = [ticker for ticker in symbols if normalize_symbol(ticker)]
+        self.stdout.write(self.style.SUCCESS(f"Syncing daily bars for {len(symbols)} symbols..."))
+
+        written = 0
+        current = 0
+        failed = 0
+        for ticker in symbols:
+            if bar_store.is_current(ticker):
+                current += 1
+                continue
+            try:
+                written += bar_store.sync_symbol(ticker)
+            except Exception as exc:
+                self.stdout.write(self.style.ERROR(f"{ticker}: {exc!s}"))
+                logger.exception("Daily bar sync failed for %s", ticker)
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS("\nSync Summary:"))
+        self.stdout.write(f"   Symbols: {len(symbols)}")
+        self.stdout.write(f"   Already current: {current}")
+        self.stdout.write(self.style.SUCCESS(f"   Bars written: {written}"))
+        if failed:
+            self.stdout.write(self.style.ERROR(f"   Failed: {failed}"))
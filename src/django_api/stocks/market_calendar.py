@@ -0,0 +1,135 @@
+"""
+Market Calendar
+SSE/SZSE trading sessions and holidays, and the cache TTLs derived from them.
+
+Stock data only changes while the market trades, so cached entries get their
+short "live" TTL during sessions and otherwise expire at the next open; daily
+bars expire at the post-close settlement time. Entries therefore invalidate
+themselves at the open instead of being refetched all night.
+
+Holidays are read from a local file (``STOCK_MARKET_HOLIDAYS_FILE``, one ISO
+date per line) so the calendar can be extended without a code change.
+"""
+
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = ZoneInfo("Asia/Shanghai")
+# Continuous sessions (exchange local time), inclusive.
+SESSIONS = (
+    (time(9, 15), time(11, 30)),
+    (time(13, 0), time(15, 0)),
+)
+# Daily bars are final once the close has settled.
+SETTLEMENT_TIME = time(15, 10)
+# The last minute bar of a session arrives shortly after the session ends.
+SESSION_GRACE = timedelta(minutes=2)
+HOLIDAYS_FILE = Path(
+    os.getenv(
+        "STOCK_MARKET_HOLIDAYS_FILE",
+        str(Path(__file__).resolve().parent / "data" / "cn_market_holidays.txt"),
+    )
+)
+_MAX_SCAN_DAYS = 31  # longer than any exchange closure plus its weekends
+
+
+@lru_cache(maxsize=1)
+def holidays() -> frozenset[date]:
+    """Weekday closures from ``HOLIDAYS_FILE`` ('#' starts a comment)."""
+    try:
+        lines = HOLIDAYS_FILE.read_text(encoding="utf-8").splitlines()
+    except OSError as exc:
+        logger.warning(
+            "Market holiday file %s unavailable (%s); treating all weekdays as trading days",
+            HOLIDAYS_FILE,
+            exc,
+        )
+        return frozenset()
+    entries = (line.split("#", 1)[0].strip() for line in lines)
+    return frozenset(date.fromisoformat(entry) for entry in entries if entry)
+
+
+def now() -> datetime:
+    return datetime.now(tz=MARKET_TZ)
+
+
+def _local(moment: datetime | None) -> datetime:
+    return moment.astimezone(MARKET_TZ) if moment is not None else now()
+
+
+def _at(day: date, clock: time) -> datetime:
+    return datetime.combine(day, clock, tzinfo=MARKET_TZ)
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays()
+
+
+def is_trading_session(moment: datetime | None = None) -> bool:
+    """True while a continuous session is open."""
+    local = _local(moment)
+    if not is_trading_day(local.date()):
+        return False
+    current = local.time()
+    return any(start <= current <= end for start, end in SESSIONS)
+
+
+def next_open(moment: datetime | None = None) -> datetime:
+    """Start of the first session that opens after ``moment`` (the lunch break counts)."""
+    local = _local(moment)
+    day = local.date()
+    for _ in range(_MAX_SCAN_DAYS):
+        if is_trading_day(day):
+            for start, _end in SESSIONS:
+                opens = _at(day, start)
+                if opens > local:
+                    return opens
+        day += timedelta(days=1)
+    return local + timedelta(days=1)  # pragma: no cover - malformed holiday file
+
+
+def last_trading_day(moment: datetime | None = None) -> date:
+    """The most recent trading day whose session has opened, i.e. the newest bar that exists."""
+    local = _local(moment)
+    day = local.date()
+    if local.time() < SESSIONS[0][0]:
+        day -= timedelta(days=1)
+    for _ in range(_MAX_SCAN_DAYS):
+        if is_trading_day(day):
+            return day
+        day -= timedelta(days=1)
+    return day  # pragma: no cover - malformed holiday file
+
+
+def settlement(day: date) -> datetime:
+    return _at(day, SETTLEMENT_TIME)
+
+
+def _seconds_until(target: datetime, local: datetime) -> int:
+    return max(1, int((target - local).total_seconds()))
+
+
+def intraday_ttl(live_ttl: int, moment: datetime | None = None) -> int:
+    """``live_ttl`` during a session (plus grace), otherwise until the next open."""
+    local = _local(moment)
+    if is_trading_session(local) or is_trading_session(local - SESSION_GRACE):
+        return live_ttl
+    return _seconds_until(next_open(local), local)
+
+
+def daily_ttl(live_ttl: int, moment: datetime | None = None) -> int:
+    """
+    Between the open and settlement: ``live_ttl``, capped so the entry expires
+    at settlement. Otherwise the day's bar is final: until the next open.
+    """
+    local = _local(moment)
+    day = local.date()
+    if is_trading_day(day) and _at(day, SESSIONS[0][0]) <= local < settlement(day):
+        return min(live_ttl, _seconds_until(settlement(day), local))
+    return _seconds_until(next_open(local), local)
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0002_unified_score_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(help_text='Stock ticker/symbol', max_length=50)),
+                ('trade_date', models.DateField(help_text='Exchange trading date')),
+                ('open', models.DecimalField(decimal_places=6, help_text='Open price', max_digits=20)),
+                ('high', models.DecimalField(decimal_places=6, help_text='High price', max_digits=20)),
+                ('low', models.DecimalField(decimal_places=6, help_text='Low price', max_digits=20)),
+                ('close', models.DecimalField(decimal_places=6, help_text='Close price', max_digits=20)),
+                ('volume', models.BigIntegerField(default=0, help_text='Traded volume')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Bar',
+                'verbose_name_plural': 'Daily Bars',
+                'db_table': 'stock_daily_bars',
+                'ordering': ('ticker', 'trade_date'),
+                'unique_together': {('ticker', 'trade_date')},
+            },
+        ),
+    ]
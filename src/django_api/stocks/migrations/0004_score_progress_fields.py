@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0003_daily_bars'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scorecalculationlog',
+            name='current_stock',
+            field=models.CharField(blank=True, help_text='Currently processing stock symbol', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='scorecalculationlog',
+            name='processed_stocks',
+            field=models.PositiveIntegerField(default=0, help_text='Number of stocks processed so far'),
+        ),
+        migrations.AlterField(
+            model_name='scorecalculationlog',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='Status of the batch', max_length=20),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("stocks", "0004_score_progress_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stockscore",
+            name="sparkline",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Recent closes [{date, close}] captured at scoring time",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockscore",
+            index=models.Index(
+                fields=["calculation_date", "-total_score"], name="idx_score_date_total"
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0005_score_sparkline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestStockScore',
+            fields=[
+                ('ticker', models.CharField(help_text='Stock ticker/symbol', max_length=50, primary_key=True, serialize=False)),
+                ('calculation_date', models.DateField(help_text='Calculation date of the projected score')),
+                ('snapshot', models.JSONField(default=dict, help_text='Serialized score snapshot')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Latest Stock Score',
+                'verbose_name_plural': 'Latest Stock Scores',
+                'db_table': 'stock_latest_scores',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockscore',
+            index=models.Index(fields=['ticker', '-calculation_date'], name='idx_score_ticker_date'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0006_latest_score_projection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectorIndexBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grouping', models.CharField(choices=[('im_sector', 'IM Sector'), ('industry', 'Industry')], help_text='Company field the sector comes from', max_length=20)),
+                ('sector', models.CharField(help_text='Sector or industry name', max_length=500)),
+                ('trade_date', models.DateField(help_text='Exchange trading date')),
+                ('cap_weighted', models.DecimalField(decimal_places=6, help_text='Market-cap-weighted index level', max_digits=20)),
+                ('equal_weighted', models.DecimalField(decimal_places=6, help_text='Equal-weighted index level', max_digits=20)),
+                ('breadth', models.DecimalField(blank=True, decimal_places=4, help_text='Share of members closing above their MA10 (0-1)', max_digits=6, null=True)),
+                ('members', models.PositiveIntegerField(default=0, help_text='Members with a price that day')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sector Index Bar',
+                'verbose_name_plural': 'Sector Index Bars',
+                'db_table': 'stock_sector_index',
+                'ordering': ('grouping', 'sector', 'trade_date'),
+                'unique_together': {('grouping', 'sector', 'trade_date')},
+            },
+        ),
+    ]
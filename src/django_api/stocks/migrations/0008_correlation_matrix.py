@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0007_sector_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorrelationMatrix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.PositiveSmallIntegerField(help_text='Window length in trading days')),
+                ('as_of', models.DateField(help_text='Last trading date in the window')),
+                ('symbols', models.JSONField(default=list, help_text='Tickers in matrix order')),
+                ('upper_triangle', models.BinaryField(help_text='float32 correlations above the diagonal, row-major')),
+                ('exposures', models.JSONField(default=dict, help_text='Per-ticker correlation and beta against universe and sector')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Correlation Matrix',
+                'verbose_name_plural': 'Correlation Matrices',
+                'db_table': 'stock_correlation_matrices',
+                'ordering': ('-as_of', 'window'),
+                'unique_together': {('window', 'as_of')},
+            },
+        ),
+    ]
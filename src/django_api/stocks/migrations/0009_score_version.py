@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+def clear_latest_scores(apps, schema_editor):
+    # The projection was built from legacy scores; it is rebuilt from
+    # current-version rows on the next read or scoring run.
+    apps.get_model('stocks', 'LatestStockScore').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stocks', '0008_correlation_matrix'),
+    ]
+
+    operations = [
+        # Existing rows were written by the retired scoring script (version 1).
+        migrations.AddField(
+            model_name='stockscore',
+            name='score_version',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Scoring model version that produced the row'),
+        ),
+        migrations.AlterField(
+            model_name='stockscore',
+            name='score_version',
+            field=models.PositiveSmallIntegerField(default=2, help_text='Scoring model version that produced the row'),
+        ),
+        migrations.RunPython(clear_latest_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+"""
+Minute Bar Aggregation
+Builds every minute-based chart interval from one 1-minute series.
+
+Bars are labelled by their end time, like AkShare's own minute periods, and
+bucketed from each session's open so no bar spans the 11:30-13:00 lunch
+break: 60m bars end at 10:30, 11:30, 14:00 and 15:00.
+"""
+
+from datetime import time
+
+import numpy as np
+import pandas as pd
+
+from .market_calendar import SESSIONS
+
+# Chart interval -> bar length in minutes.
+MINUTE_INTERVALS = {
+    "1m": 1,
+    "2m": 2,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "60m": 60,
+}
+# Buckets start at continuous trading; the opening call auction folds into the first bar.
+MORNING_ANCHOR = time(9, 30)
+AFTERNOON_ANCHOR = SESSIONS[1][0]
+
+
+def _seconds(clock: time) -> int:
+    return clock.hour * 3600 + clock.minute * 60 + clock.second
+
+
+def aggregate_minute_bars(bars: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """
+    OHLCV bars of ``minutes`` length from 1-minute ``bars`` (DatetimeIndex,
+    Open/High/Low/Close/Volume). Each output bar is labelled with its end time.
+    """
+    if minutes <= 1 or bars.empty:
+        return bars
+
+    index = pd.DatetimeIndex(bars.index)
+    days = index.normalize()
+    seconds = ((index - days) / pd.Timedelta(seconds=1)).to_numpy()
+
+    afternoon = seconds >= _seconds(AFTERNOON_ANCHOR)
+    anchor = np.where(afternoon, _seconds(AFTERNOON_ANCHOR), _seconds(MORNING_ANCHOR))
+    width = minutes * 60
+    # A bar ending exactly on a boundary belongs to the bucket it closes (right-closed).
+    bucket = np.maximum(1, np.ceil((seconds - anchor) / width)).astype(np.int64)
+    labels = days + pd.to_timedelta(anchor + bucket * width, unit="s")
+
+    grouped = bars.groupby(labels, sort=True)
+    aggregated = pd.DataFrame(
+        {
+            "Open": grouped["Open"].first(),
+            "High": grouped["High"].max(),
+            "Low": grouped["Low"].min(),
+            "Close": grouped["Close"].last(),
+            "Volume": grouped["Volume"].sum(),
+        }
+    )
+    aggregated.index.name = bars.index.name
+    return aggregated
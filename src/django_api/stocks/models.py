@@ -1,5 +1,17 @@
 from django.db import models
 
+# Scoring model that produced a StockScore row. Version 1 rows came from the
+# retired scoring script; stocks.scoring writes SCORE_VERSION. The two scales
+# are not comparable, so readers only ever see current-version rows.
+LEGACY_SCORE_VERSION = 1
+SCORE_VERSION = 2
+
+
+class StockScoreQuerySet(models.QuerySet):
+    def current(self):
+        """Scores written by the current scoring model."""
+        return self.filter(score_version=SCORE_VERSION)
+
 
 class StockScore(models.Model):
     """Daily stock scoring snapshot stored alongside CSI300 company data."""
@@ -64,20 +76,51 @@ class StockScore(models.Model):
         null=True,
         help_text="Take-profit trigger price",
     )
+    sparkline = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Recent closes [{date, close}] captured at scoring time",
+    )
+    score_version = models.PositiveSmallIntegerField(
+        default=SCORE_VERSION, help_text="Scoring model version that produced the row"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = StockScoreQuerySet.as_manager()
+
     class Meta:
         db_table = "stock_scores"
         verbose_name = "Stock Score"
         verbose_name_plural = "Stock Scores"
         unique_together = ("calculation_date", "ticker")
         ordering = ("-calculation_date", "ticker")
+        indexes = [
+            models.Index(fields=["calculation_date", "-total_score"], name="idx_score_date_total"),
+            models.Index(fields=["ticker", "-calculation_date"], name="idx_score_ticker_date"),
+        ]
 
     def __str__(self):
         return f"{self.calculation_date} - {self.ticker}"
 
 
+class LatestStockScore(models.Model):
+    """Most recent StockScore per ticker, pre-serialized for the chart endpoints."""
+
+    ticker = models.CharField(max_length=50, primary_key=True, help_text="Stock ticker/symbol")
+    calculation_date = models.DateField(help_text="Calculation date of the projected score")
+    snapshot = models.JSONField(default=dict, help_text="Serialized score snapshot")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "stock_latest_scores"
+        verbose_name = "Latest Stock Score"
+        verbose_name_plural = "Latest Stock Scores"
+
+    def __str__(self):
+        return f"{self.ticker} @ {self.calculation_date}"
+
+
 class ScoreCalculationLog(models.Model):
     """Tracking metadata around each daily scoring run."""
 
@@ -117,3 +160,92 @@ class ScoreCalculationLog(models.Model):
 
     def __str__(self):
         return f"{self.calculation_date} - {self.status}"
+
+
+class DailyBar(models.Model):
+    """Daily OHLCV bar persisted from AkShare so history is only fetched once."""
+
+    ticker = models.CharField(max_length=50, help_text="Stock ticker/symbol")
+    trade_date = models.DateField(help_text="Exchange trading date")
+    open = models.DecimalField(max_digits=20, decimal_places=6, help_text="Open price")
+    high = models.DecimalField(max_digits=20, decimal_places=6, help_text="High price")
+    low = models.DecimalField(max_digits=20, decimal_places=6, help_text="Low price")
+    close = models.DecimalField(max_digits=20, decimal_places=6, help_text="Close price")
+    volume = models.BigIntegerField(default=0, help_text="Traded volume")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "stock_daily_bars"
+        verbose_name = "Daily Bar"
+        verbose_name_plural = "Daily Bars"
+        unique_together = ("ticker", "trade_date")
+        ordering = ("ticker", "trade_date")
+
+    def __str__(self):
+        return f"{self.ticker} - {self.trade_date}"
+
+
+class SectorIndexBar(models.Model):
+    """Daily sector index levels and breadth precomputed from the daily bar store."""
+
+    GROUPING_CHOICES = [
+        ("im_sector", "IM Sector"),
+        ("industry", "Industry"),
+    ]
+
+    grouping = models.CharField(
+        max_length=20, choices=GROUPING_CHOICES, help_text="Company field the sector comes from"
+    )
+    sector = models.CharField(max_length=500, help_text="Sector or industry name")
+    trade_date = models.DateField(help_text="Exchange trading date")
+    cap_weighted = models.DecimalField(
+        max_digits=20, decimal_places=6, help_text="Market-cap-weighted index level"
+    )
+    equal_weighted = models.DecimalField(
+        max_digits=20, decimal_places=6, help_text="Equal-weighted index level"
+    )
+    breadth = models.DecimalField(
+        max_digits=6,
+        decimal_places=4,
+        blank=True,
+        null=True,
+        help_text="Share of members closing above their MA10 (0-1)",
+    )
+    members = models.PositiveIntegerField(default=0, help_text="Members with a price that day")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "stock_sector_index"
+        verbose_name = "Sector Index Bar"
+        verbose_name_plural = "Sector Index Bars"
+        unique_together = ("grouping", "sector", "trade_date")
+        ordering = ("grouping", "sector", "trade_date")
+
+    def __str__(self):
+        return f"{self.grouping}:{self.sector} - {self.trade_date}"
+
+
+class CorrelationMatrix(models.Model):
+    """Pairwise daily-return correlations over one window, packed as a float32 upper triangle."""
+
+    window = models.PositiveSmallIntegerField(help_text="Window length in trading days")
+    as_of = models.DateField(help_text="Last trading date in the window")
+    symbols = models.JSONField(default=list, help_text="Tickers in matrix order")
+    upper_triangle = models.BinaryField(
+        help_text="float32 correlations above the diagonal, row-major"
+    )
+    exposures = models.JSONField(
+        default=dict, help_text="Per-ticker correlation and beta against universe and sector"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "stock_correlation_matrices"
+        verbose_name = "Correlation Matrix"
+        verbose_name_plural = "Correlation Matrices"
+        unique_together = ("window", "as_of")
+        ordering = ("-as_of", "window")
+
+    def __str__(self):
+        return f"{self.window}d @ {self.as_of}"
@@ -0,0 +1,143 @@
+"""
+Universe Price Panel
+Cross-sectional (dates, symbols) price arrays for the CSI300 universe.
+
+One DailyBar query fills a matrix per field, aligned on trading dates. Days a
+symbol did not trade (suspensions) carry its previous close forward with zero
+volume, so the indicator engine runs over the whole universe in one vectorized
+pass and the last row is a cross-section of every symbol.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from . import bar_store, indicators
+from .models import DailyBar
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+LOOKBACK_BARS = 120
+LOOKBACK_DAYS = 200  # calendar days that cover LOOKBACK_BARS trading days
+
+
+@dataclass
+class Panel:
+    """Price matrices shaped (dates, symbols); ``panel["MA10"]`` reads indicators too."""
+
+    dates: np.ndarray  # datetime64[D], ascending
+    symbols: list[str]
+    fields: dict[str, np.ndarray]
+    last_dates: list[date]  # each symbol's latest traded bar
+    traded: np.ndarray  # False where a price was carried forward or is missing
+    _indicators: dict[str, np.ndarray] | None = field(default=None, repr=False)
+
+    @property
+    def indicators(self) -> dict[str, np.ndarray]:
+        """MA, OBV and CMF for every symbol, computed once per panel."""
+        if self._indicators is None:
+            self._indicators = indicators.compute_indicators(
+                self.fields["High"], self.fields["Low"], self.fields["Close"], self.fields["Volume"]
+            )
+        return self._indicators
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name in self.fields:
+            return self.fields[name]
+        return self.indicators[name]
+
+    def latest(self, name: str) -> np.ndarray:
+        """The last row of ``name``: one value per symbol."""
+        return self[name][-1]
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Fill NaN with the previous valid value down each column; leading NaN stay."""
+    rows = np.arange(values.shape[0])[:, None]
+    source = np.where(np.isnan(values), 0, rows)
+    np.maximum.accumulate(source, axis=0, out=source)
+    return values[source, np.arange(values.shape[1])]
+
+
+def build_panel(rows, symbols: list[str], bars: int = LOOKBACK_BARS) -> Panel:
+    """
+    Panel from ``(ticker, trade_date, open, high, low, close, volume)`` rows
+    sorted by ticker then date, keeping the latest ``bars`` trading dates.
+    """
+    columns = {symbol: position for position, symbol in enumerate(symbols)}
+    tickers, days, values = [], [], []
+    last_dates: dict[str, date] = {}
+    for ticker, trade_date, *prices in rows:
+        if ticker not in columns:
+            continue
+        tickers.append(columns[ticker])
+        days.append(trade_date)
+        values.append(prices)
+        last_dates[ticker] = trade_date
+
+    found = [symbol for symbol in symbols if symbol in last_dates]
+    if not found:
+        empty = {name: np.empty((0, 0)) for name in FIELDS}
+        return Panel(np.array([], dtype="datetime64[D]"), [], empty, [], np.empty((0, 0), bool))
+
+    day_values = np.asarray(days, dtype="datetime64[D]")
+    dates = np.unique(day_values)
+    row_index = np.searchsorted(dates, day_values)
+    renumber = np.full(len(symbols), -1)
+    renumber[[columns[symbol] for symbol in found]] = np.arange(len(found))
+    column_index = renumber[np.asarray(tickers)]
+    prices = np.asarray(values, dtype=np.float64)
+
+    matrices = {}
+    for offset, name in enumerate(FIELDS):
+        matrix = np.full((len(dates), len(found)), np.nan)
+        matrix[row_index, column_index] = prices[:, offset]
+        matrices[name] = matrix
+
+    # Fill before trimming so a suspension spanning the window start carries in.
+    close = _forward_fill(matrices["Close"])
+    gaps = np.isnan(matrices["Close"]) & ~np.isnan(close)
+    for name in ("Open", "High", "Low"):
+        matrices[name] = np.where(gaps, close, matrices[name])
+    matrices["Close"] = close
+    matrices["Volume"] = np.where(gaps, 0.0, matrices["Volume"])
+
+    traded = ~np.isnan(matrices["Close"]) & ~gaps
+    matrices = {name: matrix[-bars:] for name, matrix in matrices.items()}
+    return Panel(
+        dates[-bars:], found, matrices, [last_dates[symbol] for symbol in found], traded[-bars:]
+    )
+
+
+def _bar_rows(symbols: list[str], start: date, end: date | None = None):
+    queryset = DailyBar.objects.filter(ticker__in=symbols, trade_date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(trade_date__lte=end)
+    rows = queryset.order_by("ticker", "trade_date").values_list(
+        "ticker", "trade_date", "open", "high", "low", "close", "volume"
+    )
+    return rows.iterator(chunk_size=5000)
+
+
+def load_panel(symbols: list[str], *, bars: int = LOOKBACK_BARS) -> Panel:
+    """Panel of stored daily bars for ``symbols``; symbols without bars are dropped."""
+    start = bar_store.market_today() - timedelta(days=max(LOOKBACK_DAYS, bars * 2))
+    return build_panel(_bar_rows(symbols, start), symbols, bars)
+
+
+def load_panel_between(symbols: list[str], start: date, end: date) -> Panel:
+    """Panel of every stored trading date from ``start`` to ``end`` inclusive."""
+    return build_panel(_bar_rows(symbols, start, end), symbols, (end - start).days + 1)
+
+
+def percentile_rank(values: np.ndarray) -> np.ndarray:
+    """
+    Cross-sectional percentile (0-100) of each value among its row's symbols.
+
+    Accepts one cross-section (symbols,) or a panel (dates, symbols); NaN
+    values are ignored and stay NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ranked = pd.DataFrame(np.atleast_2d(values)).rank(axis=1, pct=True).to_numpy() * 100
+    return ranked.reshape(values.shape)
@@ -0,0 +1,444 @@
+"""
+Stock Scoring Engine
+Scores the CSI300 universe in-process from the daily bar store.
+
+Every score component is computed for the whole universe in one pass over a
+``stocks.panel.Panel``. A component yields a raw score in [-100, 100]
+(positive = bullish), or NaN when the symbol has fewer bars than its
+lookback; the weighted sum of the available ones is the unified
+``total_score``. Rows
+are bulk-upserted into ``StockScore`` in batches and progress is recorded on
+the day's ``ScoreCalculationLog``.
+"""
+
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date
+
+import numpy as np
+from csi300.models import CSI300Company
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import bar_store, indicators, latest_scores, market_calendar
+from .cache_warmer import universe
+from .models import SCORE_VERSION, ScoreCalculationLog, StockScore
+from .panel import Panel, load_panel
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+SYNC_WORKERS = 8
+SPARKLINE_POINTS = 25
+
+# Component weights sum to 1, so total_score stays within [-100, 100].
+COMPONENT_WEIGHTS = {
+    "momentum": 0.15,
+    "rsi": 0.15,
+    "cmf": 0.15,
+    "mfm": 0.10,
+    "obv": 0.10,
+    "dual_ma": 0.15,
+    "divergence": 0.10,
+    "grid": 0.10,
+}
+MOMENTUM_PERIOD = 20
+MOMENTUM_FULL_SCALE = 0.10  # a 10% move over the period scores +/-100
+RSI_PERIOD = 14
+MFM_PERIOD = 5
+OBV_TREND_PERIOD = 10
+DUAL_MA_FULL_SCALE = 0.02  # MA5 2% above/below MA10 scores +/-100
+DIVERGENCE_PERIOD = 20
+GRID_PERIOD = 60
+ATR_PERIOD = 14
+REASON_THRESHOLD = 50  # components at or beyond +/-50 are listed as reasons
+# Bars a symbol needs before each component is defined.
+COMPONENT_LOOKBACK = {
+    "momentum": MOMENTUM_PERIOD + 1,
+    "rsi": RSI_PERIOD + 1,
+    "cmf": indicators.CMF_PERIOD,
+    "mfm": MFM_PERIOD,
+    "obv": OBV_TREND_PERIOD + 1,
+    "dual_ma": max(indicators.DEFAULT_MA_PERIODS),
+    "divergence": DIVERGENCE_PERIOD + 1,
+    "grid": GRID_PERIOD,
+}
+
+BUY_THRESHOLD = 20
+SELL_THRESHOLD = -20
+MAX_POSITION_PCT = 0.10
+STOP_LOSS_ATR = 2.0
+TAKE_PROFIT_ATR = 3.0
+
+SCORE_FIELDS = [
+    "company_name",
+    "buy_score",
+    "buy_reasons",
+    "sell_score",
+    "sell_reasons",
+    "total_score",
+    "score_components",
+    "last_close",
+    "last_trading_date",
+    "cmf_value",
+    "obv_value",
+    "ma5",
+    "ma10",
+    "recommended_action",
+    "recommended_action_detail",
+    "signal_date",
+    "execution_date",
+    "suggested_position_pct",
+    "stop_loss_price",
+    "take_profit_price",
+    "sparkline",
+    "score_version",
+]
+
+
+def _sync_bars(
+    symbols: list[str], workers: int = SYNC_WORKERS, *, timeout: float | None = None
+) -> None:
+    """
+    Bring the bar store up to date for ``symbols`` (AkShare calls share the
+    upstream budget). After ``timeout`` seconds syncs not yet started are
+    cancelled; the ones in flight are waited for, so no sync thread outlives
+    the call, and the caller scores the bars stored so far.
+    """
+
+    def sync(symbol: str) -> None:
+        try:
+            if not bar_store.is_current(symbol):
+                bar_store.sync_symbol(symbol)
+        except Exception as exc:
+            logger.warning("Bar sync failed for %s; scoring stored bars: %s", symbol, exc)
+        finally:
+            connection.close()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="score-sync")
+    _done, pending = wait([pool.submit(sync, symbol) for symbol in symbols], timeout=timeout)
+    if pending:
+        logger.info("Bar sync for %d symbols cut off after %ss", len(pending), timeout)
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _lagged(values: np.ndarray, period: int) -> np.ndarray:
+    """The row ``period`` bars before the latest; NaN when the panel is shorter."""
+    if len(values) <= period:
+        return np.full(values.shape[1:], np.nan)
+    return values[-1 - period]
+
+
+def _change(values: np.ndarray, period: int) -> np.ndarray:
+    """Latest value minus the value ``period`` bars earlier."""
+    return values[-1] - _lagged(values, period)
+
+
+def _scale(values: np.ndarray, full_scale: float) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.clip(values / full_scale, -1.0, 1.0) * 100
+
+
+def score_components(panel: Panel) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    """
+    Raw component scores (one array per component, one value per symbol; NaN
+    where the symbol's history is shorter than ``COMPONENT_LOOKBACK``) and the
+    latest indicator values used to explain and store them.
+    """
+    high, low, close, volume = (panel[c] for c in ("High", "Low", "Close", "Volume"))
+    computed = panel.indicators
+    obv = computed["OBV"]
+
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gains = indicators.rolling_mean(np.clip(delta, 0, None), RSI_PERIOD)[-1]
+    losses = indicators.rolling_mean(np.clip(-delta, 0, None), RSI_PERIOD)[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(losses == 0, 100.0, 100 - 100 / (1 + gains / losses))
+
+    mfm = indicators.rolling_mean(indicators.money_flow_multiplier(high, low, close), MFM_PERIOD)
+    abs_volume = indicators.rolling_sum(np.abs(volume), OBV_TREND_PERIOD)[-1]
+    range_high = np.nanmax(high[-GRID_PERIOD:], axis=0)
+    range_low = np.nanmin(low[-GRID_PERIOD:], axis=0)
+    previous_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    true_range = np.fmax(high - low, np.fmax(abs(high - previous_close), abs(low - previous_close)))
+
+    last_close = close[-1]
+    ma5 = computed["MA5"][-1]
+    ma10 = computed["MA10"][-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_trend = np.sign(_change(close, DIVERGENCE_PERIOD))
+        obv_trend = np.sign(_change(obv, DIVERGENCE_PERIOD))
+        raw = {
+            "momentum": _scale(
+                _change(close, MOMENTUM_PERIOD) / _lagged(close, MOMENTUM_PERIOD),
+                MOMENTUM_FULL_SCALE,
+            ),
+            # Oversold (RSI 30) scores +100, overbought (RSI 70) -100.
+            "rsi": _scale(50 - rsi, 20),
+            "cmf": _scale(computed["CMF"][-1], 0.25),
+            "mfm": mfm[-1] * 100,
+            "obv": _scale(_change(obv, OBV_TREND_PERIOD) / abs_volume, 1.0),
+            "dual_ma": _scale(ma5 / ma10 - 1, DUAL_MA_FULL_SCALE),
+            # OBV rising while price falls is bullish, and vice versa.
+            "divergence": np.where(price_trend != obv_trend, (obv_trend - price_trend) * 50, 0.0),
+            # Near the bottom of the recent range scores +100, near the top -100.
+            "grid": (0.5 - (last_close - range_low) / (range_high - range_low)) * 200,
+        }
+    history = (~np.isnan(close)).sum(axis=0)
+    raw = {
+        name: np.where(
+            history >= COMPONENT_LOOKBACK[name], np.nan_to_num(np.clip(values, -100, 100)), np.nan
+        )
+        for name, values in raw.items()
+    }
+    latest = {
+        "close": last_close,
+        "rsi": rsi,
+        "cmf": computed["CMF"][-1],
+        "obv": obv[-1],
+        "ma5": ma5,
+        "ma10": ma10,
+        "atr": indicators.rolling_mean(true_range, ATR_PERIOD)[-1],
+    }
+    return raw, latest
+
+
+_REASONS = {
+    "momentum": ("Positive 20-day momentum", "Negative 20-day momentum"),
+    "rsi": ("RSI oversold", "RSI overbought"),
+    "cmf": ("Strong money inflow (CMF)", "Strong money outflow (CMF)"),
+    "mfm": ("Closes near daily highs", "Closes near daily lows"),
+    "obv": ("OBV trending up", "OBV trending down"),
+    "dual_ma": ("MA5 above MA10", "MA5 below MA10"),
+    "divergence": ("Bullish OBV divergence", "Bearish OBV divergence"),
+    "grid": ("Near bottom of 60-day range", "Near top of 60-day range"),
+}
+
+
+def recent_closes(panel: Panel, points: int = SPARKLINE_POINTS) -> list[list[dict]]:
+    """The last ``points`` traded closes of each symbol, as stored on ``StockScore``."""
+    dates = panel.dates.astype(str)
+    close = panel["Close"]
+    lines = []
+    for position in range(len(panel.symbols)):
+        rows = np.flatnonzero(panel.traded[:, position])[-points:]
+        lines.append(
+            [{"date": dates[row], "close": round(float(close[row, position]), 6)} for row in rows]
+        )
+    return lines
+
+
+def total_scores(raw: dict[str, np.ndarray]) -> np.ndarray:
+    """Weighted sum of the defined component scores, one value per symbol."""
+    weighted = (np.nan_to_num(raw[name] * weight) for name, weight in COMPONENT_WEIGHTS.items())
+    return np.clip(sum(weighted), -100, 100)
+
+
+def _optional(value: float, digits: int) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def build_scores(
+    symbols: list[str],
+    raw: dict[str, np.ndarray],
+    latest: dict[str, np.ndarray],
+    *,
+    last_dates: list[date],
+    names: dict[str, str],
+    calculation_date: date,
+    sparklines: list[list[dict]] | None = None,
+) -> list[StockScore]:
+    """``StockScore`` rows (unsaved) for the scored symbols."""
+    weighted = {name: raw[name] * weight for name, weight in COMPONENT_WEIGHTS.items()}
+    totals = total_scores(raw)
+
+    scores = []
+    for position, symbol in enumerate(symbols):
+        components = {}
+        buy_reasons, sell_reasons = [], []
+        for name in COMPONENT_WEIGHTS:
+            value = float(raw[name][position])
+            reasons = []
+            if value >= REASON_THRESHOLD:
+                reasons.append(_REASONS[name][0])
+                buy_reasons.extend(reasons)
+            elif value <= -REASON_THRESHOLD:
+                reasons.append(_REASONS[name][1])
+                sell_reasons.extend(reasons)
+            components[name] = {
+                "raw": _optional(value, 2),
+                "weighted": _optional(weighted[name][position], 2),
+                "reasons": reasons,
+            }
+
+        total = round(float(totals[position]), 2)
+        close = float(latest["close"][position])
+        atr = latest["atr"][position]
+        if total >= BUY_THRESHOLD:
+            action = "Buy"
+            position_pct = round(MAX_POSITION_PCT * min(total, 100) / 100, 4)
+        elif total <= SELL_THRESHOLD:
+            action = "Sell"
+            position_pct = 0.0
+        else:
+            action = "Hold"
+            position_pct = 0.0
+        signal_date = last_dates[position]
+        execution_date = market_calendar.next_open(market_calendar.settlement(signal_date)).date()
+
+        scores.append(
+            StockScore(
+                calculation_date=calculation_date,
+                ticker=symbol,
+                company_name=names.get(symbol, symbol),
+                buy_score=round(max(total, 0)),
+                buy_reasons=buy_reasons,
+                sell_score=round(max(-total, 0)),
+                sell_reasons=sell_reasons,
+                total_score=total,
+                score_components=components,
+                last_close=round(close, 6),
+                last_trading_date=signal_date,
+                cmf_value=_optional(latest["cmf"][position], 6),
+                obv_value=int(latest["obv"][position]),
+                ma5=_optional(latest["ma5"][position], 6),
+                ma10=_optional(latest["ma10"][position], 6),
+                recommended_action=action,
+                recommended_action_detail=(
+                    f"{action}: total score {total:+.1f} "
+                    f"({len(buy_reasons)} bullish / {len(sell_reasons)} bearish signals)"
+                ),
+                signal_date=signal_date,
+                execution_date=execution_date,
+                suggested_position_pct=position_pct,
+                stop_loss_price=_optional(close - STOP_LOSS_ATR * atr, 6),
+                take_profit_price=_optional(close + TAKE_PROFIT_ATR * atr, 6),
+                sparkline=sparklines[position] if sparklines else [],
+                score_version=SCORE_VERSION,
+            )
+        )
+    return scores
+
+
+def upsert_scores(scores: list[StockScore]) -> int:
+    with transaction.atomic():
+        StockScore.objects.bulk_create(
+            scores,
+            update_conflicts=True,
+            unique_fields=["calculation_date", "ticker"],
+            update_fields=[*SCORE_FIELDS, "updated_at"],
+        )
+        latest_scores.record(scores)
+    return len(scores)
+
+
+def run_scoring(
+    symbols: list[str] | None = None,
+    *,
+    calculation_date: date | None = None,
+    batch_size: int = BATCH_SIZE,
+    sync: bool = True,
+    sync_timeout: float | None = None,
+    record_log: bool = True,
+    progress: Callable[[ScoreCalculationLog], None] | None = None,
+) -> dict:
+    """
+    Score ``symbols`` (default: the CSI300 universe) and upsert ``StockScore``
+    rows for ``calculation_date`` (default: today in market time).
+
+    Stale symbols are synced from AkShare batch by batch (each batch for at
+    most ``sync_timeout`` seconds), then the universe is scored in one panel
+    pass and upserted batch by batch. The day's ``ScoreCalculationLog`` is
+    updated after every batch unless ``record_log`` is False, which on-demand
+    runs use so they never reset or interleave with the universe run's log.
+    """
+    symbols = list(dict.fromkeys(symbols)) if symbols else universe()
+    calculation_date = calculation_date or bar_store.market_today()
+    names = dict(CSI300Company.objects.filter(ticker__in=symbols).values_list("ticker", "name"))
+
+    progress_fields = {
+        "start_time": timezone.now(),
+        "end_time": None,
+        "status": "running",
+        "total_stocks": len(symbols),
+        "processed_stocks": 0,
+        "successful_stocks": 0,
+        "failed_stocks": 0,
+        "current_stock": "",
+        "error_message": "",
+    }
+    if record_log:
+        log, _ = ScoreCalculationLog.objects.update_or_create(
+            calculation_date=calculation_date, defaults=progress_fields
+        )
+    else:
+        log = ScoreCalculationLog(calculation_date=calculation_date, **progress_fields)
+
+    def save(*fields: str) -> None:
+        if record_log:
+            log.save(update_fields=fields)
+
+    failures: dict[str, str] = {}
+    batches = [
+        symbols[offset : offset + max(1, batch_size)]
+        for offset in range(0, len(symbols), max(1, batch_size))
+    ]
+    try:
+        if sync:
+            for batch in batches:
+                log.current_stock = batch[0]
+                save("current_stock")
+                _sync_bars(batch, timeout=sync_timeout)
+
+        panel = load_panel(symbols)
+        scores = {}
+        if panel.symbols:
+            raw, latest = score_components(panel)
+            for score in build_scores(
+                panel.symbols,
+                raw,
+                latest,
+                last_dates=panel.last_dates,
+                names=names,
+                calculation_date=calculation_date,
+                sparklines=recent_closes(panel),
+            ):
+                scores[score.ticker] = score
+
+        for batch in batches:
+            log.current_stock = batch[0]
+            scored = [scores[symbol] for symbol in batch if symbol in scores]
+            for symbol in batch:
+                if symbol not in scores:
+                    failures[symbol] = "No daily bars available"
+            upsert_scores(scored)
+
+            log.processed_stocks += len(batch)
+            log.successful_stocks += len(scored)
+            log.failed_stocks += len(batch) - len(scored)
+            save("current_stock", "processed_stocks", "successful_stocks", "failed_stocks")
+            if progress is not None:
+                progress(log)
+    except Exception as exc:
+        log.status = "failed"
+        log.error_message = str(exc)
+        log.end_time = timezone.now()
+        save("status", "error_message", "end_time")
+        raise
+
+    log.status = "completed"
+    log.current_stock = ""
+    log.end_time = timezone.now()
+    save("status", "current_stock", "end_time")
+    logger.info(
+        "Scored %d/%d symbols for %s", log.successful_stocks, len(symbols), calculation_date
+    )
+    return {
+        "total": len(symbols),
+        "successful": log.successful_stocks,
+        "failed": log.failed_stocks,
+        "symbols": symbols,
+        "errors": failures,
+        "calculation_date": calculation_date.isoformat(),
+    }
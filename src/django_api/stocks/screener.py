@@ -0,0 +1,196 @@
+"""
+Universe Screener
+Filters the CSI300 universe with expressions such as
+``CMF > 0.1 and Close > MA10``.
+
+The snapshot behind it (latest prices, indicators, score components and their
+cross-sectional percentiles, one row per symbol) comes out of a single panel
+pass; ``total_score`` is the stored score the other endpoints serve. It is
+cached with the stock cache codec until the next bar can change, and the
+post-close jobs rebuild it once the day's bars and scores land. A filter is
+then one boolean array operation over that table.
+"""
+
+import logging
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+from csi300.models import CSI300Company
+
+from . import cache_codec, latest_scores, market_calendar, scoring
+from .cache_warmer import universe
+from .panel import load_panel, percentile_rank
+from .stock_cache import cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_KEY = "stocks:screener:snapshot"
+SNAPSHOT_CACHE_TIMEOUT = 300
+PERCENTILE_SUFFIX = "_pct"
+DEFAULT_SORT = "total_score"
+BASE_COLUMNS = ("Close", "total_score")
+
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+_TERM = r"[A-Za-z_][A-Za-z0-9_]*|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_CONDITION = re.compile(rf"^\s*({_TERM})\s*(>=|<=|==|!=|>|<)\s*({_TERM})\s*$")
+_AND = re.compile(r"\s+and\s+", re.IGNORECASE)
+
+
+class ScreenerError(ValueError):
+    """The filter expression or sort column is invalid."""
+
+
+def build_snapshot(symbols: list[str] | None = None) -> pd.DataFrame:
+    """
+    One row per symbol: latest prices, indicators, component scores, the
+    stored ``total_score`` (NaN when unscored) and their percentiles.
+    """
+    symbols = symbols or universe()
+    panel = load_panel(symbols)
+    if not panel.symbols:
+        return pd.DataFrame(index=pd.Index([], name="symbol", dtype=object))
+
+    raw, latest = scoring.score_components(panel)
+    columns = {name: panel.latest(name) for name in panel.fields}
+    columns.update({name: values[-1] for name, values in panel.indicators.items()})
+    columns["RSI"] = latest["rsi"]
+    columns.update({f"{name}_score": values for name, values in raw.items()})
+    stored = latest_scores.total_scores(panel.symbols)
+    columns["total_score"] = np.asarray(
+        [stored.get(symbol, np.nan) for symbol in panel.symbols], dtype=np.float64
+    )
+    columns.update(
+        {
+            f"{name}{PERCENTILE_SUFFIX}": percentile_rank(values)
+            for name, values in list(columns.items())
+        }
+    )
+
+    names = dict(
+        CSI300Company.objects.filter(ticker__in=panel.symbols).values_list("ticker", "name")
+    )
+    frame = pd.DataFrame(columns, index=pd.Index(panel.symbols, name="symbol", dtype=object))
+    frame.insert(0, "name", [names.get(symbol, "") for symbol in panel.symbols])
+    frame.insert(1, "last_date", pd.to_datetime(panel.last_dates))
+    return frame
+
+
+def get_snapshot(refresh: bool = False) -> pd.DataFrame:
+    """The universe snapshot, from cache when possible."""
+    if not refresh:
+        payload = cache.get(SNAPSHOT_CACHE_KEY)
+        if payload is not None:
+            try:
+                return cache_codec.decode_dataframe(payload)
+            except Exception as exc:
+                logger.warning("Discarding undecodable screener snapshot: %s", exc)
+
+    snapshot = build_snapshot()
+    cache.set(
+        SNAPSHOT_CACHE_KEY,
+        cache_codec.encode_dataframe(snapshot),
+        timeout=market_calendar.daily_ttl(SNAPSHOT_CACHE_TIMEOUT),
+    )
+    return snapshot
+
+
+def refresh_snapshot() -> None:
+    """Rebuild the cached snapshot once new bars or scores have landed."""
+    try:
+        get_snapshot(refresh=True)
+    except Exception:
+        logger.exception("Screener snapshot rebuild failed; dropping the cached one")
+        cache.delete(SNAPSHOT_CACHE_KEY)
+
+
+def _resolve(term: str, lookup: dict[str, str]) -> str | float:
+    try:
+        return float(term)
+    except ValueError:
+        pass
+    column = lookup.get(term.lower())
+    if column is None:
+        raise ScreenerError(f"Unknown field {term!r}")
+    return column
+
+
+def parse_filter(expression: str, columns) -> list[tuple[str | float, str, str | float]]:
+    """``"CMF > 0.1 and Close > MA10"`` -> [("CMF", ">", 0.1), ("Close", ">", "MA10")]."""
+    lookup = {column.lower(): column for column in columns}
+    conditions = []
+    for part in _AND.split(expression.strip()):
+        match = _CONDITION.match(part)
+        if match is None:
+            raise ScreenerError(f"Invalid condition {part.strip()!r}")
+        left, op, right = match.groups()
+        conditions.append((_resolve(left, lookup), op, _resolve(right, lookup)))
+    return conditions
+
+
+def screen(
+    snapshot: pd.DataFrame,
+    expression: str = "",
+    *,
+    sort: str = DEFAULT_SORT,
+    ascending: bool = False,
+) -> tuple[pd.DataFrame, list[str]]:
+    """
+    Rows of ``snapshot`` matching ``expression``, sorted by ``sort``.
+
+    Returns the matches and the columns the expression and sort refer to.
+    NaN never matches a condition.
+    """
+    numeric = [column for column in snapshot.columns if column not in ("name", "last_date")]
+    lookup = {column.lower(): column for column in numeric}
+    sort_column = lookup.get(sort.lower())
+    if sort_column is None:
+        raise ScreenerError(f"Unknown sort field {sort!r}")
+
+    mask = np.ones(len(snapshot), dtype=bool)
+    referenced = []
+    if expression.strip():
+        for left, op, right in parse_filter(expression, numeric):
+            operands = []
+            for term in (left, right):
+                if isinstance(term, str):
+                    referenced.append(term)
+                    operands.append(snapshot[term].to_numpy(dtype=np.float64))
+                else:
+                    operands.append(term)
+            with np.errstate(invalid="ignore"):
+                mask &= _OPERATORS[op](*operands)
+    referenced.append(sort_column)
+
+    matches = snapshot[mask].sort_values(sort_column, ascending=ascending, na_position="last")
+    return matches, list(dict.fromkeys(referenced))
+
+
+def to_records(matches: pd.DataFrame, columns: list[str]) -> list[dict]:
+    """JSON rows for the screener endpoint; NaN becomes None."""
+    columns = list(dict.fromkeys([*BASE_COLUMNS, *columns]))
+    values = matches[columns].astype(np.float64).round(6)
+    values = values.astype(object).where(values.notna(), None)
+    return [
+        {
+            "symbol": symbol,
+            "name": name,
+            "last_date": last_date.date().isoformat() if pd.notna(last_date) else None,
+            **row,
+        }
+        for symbol, name, last_date, row in zip(
+            matches.index,
+            matches["name"],
+            matches["last_date"],
+            values.to_dict(orient="records"),
+            strict=True,
+        )
+    ]
@@ -0,0 +1,226 @@
+"""
+Sector Indices
+Daily market-cap-weighted and equal-weighted sector indices with MA10 breadth.
+
+Companies are grouped by ``im_sector`` or ``industry``. One universe panel
+is reduced to every sector at once by multiplying its return matrix with a
+(symbols, sectors) membership matrix. Cap weights scale each company's
+``market_cap_local`` by its price relative to the latest close, so the
+previous day's capitalization weights each day's return. Returns and
+membership count only days a company actually traded, so suspended names
+neither dilute the equal-weighted index nor inflate ``members``. Indices
+start at ``BASE_LEVEL``. Each run recomputes the trailing
+``INCREMENTAL_LOOKBACK_DAYS`` from the bar store, which picks up late or
+corrected bars, and chains them onto the stored level just before that
+window, so only a few weeks of bars are read once the history exists.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from csi300.models import CSI300Company
+from django.db.models import Max
+
+from . import bar_store, indicators
+from .models import SectorIndexBar
+from .panel import Panel, load_panel_between
+
+logger = logging.getLogger(__name__)
+
+GROUPINGS = ("im_sector", "industry")
+BASE_LEVEL = 1000.0
+BREADTH_MA = 10
+INCREMENTAL_LOOKBACK_DAYS = 30  # trailing calendar days recomputed by each incremental run
+_WARMUP_DAYS = 30  # calendar days before the recomputed window that cover the MA window
+_UPSERT_BATCH_SIZE = 1000
+SERIES_FIELDS = ("cap_weighted", "equal_weighted", "breadth", "members")
+
+
+def sector_members(grouping: str) -> tuple[list[str], list[str], np.ndarray]:
+    """Tickers, their sector under ``grouping`` and market cap (NaN when unknown)."""
+    rows = (
+        CSI300Company.objects.exclude(ticker__isnull=True)
+        .exclude(ticker="")
+        .exclude(**{f"{grouping}__isnull": True})
+        .exclude(**{grouping: ""})
+        .order_by("ticker")
+        .values_list("ticker", grouping, "market_cap_local")
+    )
+    tickers, sectors, caps = [], [], []
+    for ticker, sector, cap in rows:
+        tickers.append(ticker)
+        sectors.append(sector.strip())
+        caps.append(np.nan if cap is None else float(cap))
+    return tickers, sectors, np.asarray(caps, dtype=np.float64)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(
+            denominator > 0, numerator / np.where(denominator > 0, denominator, 1), np.nan
+        )
+
+
+def compute_sector_series(
+    panel: Panel, sectors: dict[str, str], caps: dict[str, float]
+) -> tuple[list[str], dict[str, np.ndarray]]:
+    """
+    Per-sector daily series over ``panel``, each shaped (dates, sectors):
+    ``cap_return`` and ``equal_return`` (0 on the first row and on days no
+    member traded on both days), ``breadth`` and ``members``, over the
+    members that traded that day. Symbols missing from ``sectors`` belong to
+    no sector.
+    """
+    grouped = [
+        (row, sectors[symbol]) for row, symbol in enumerate(panel.symbols) if symbol in sectors
+    ]
+    names = sorted({name for _, name in grouped})
+    positions = {name: position for position, name in enumerate(names)}
+    membership = np.zeros((len(panel.symbols), len(names)))
+    for row, name in grouped:
+        membership[row, positions[name]] = 1.0
+
+    close = panel["Close"]
+    previous = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    moved = panel.traded & np.vstack([np.zeros((1, close.shape[1]), bool), panel.traded[:-1]])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.where(moved, close / previous - 1, 0.0)
+
+    equal = _ratio(returns @ membership, moved.astype(np.float64) @ membership)
+    cap_now = np.asarray([caps.get(symbol, np.nan) for symbol in panel.symbols])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weights = cap_now * previous / close[-1]
+    weights = np.where(moved & ~np.isnan(weights), weights, 0.0)
+    cap_weighted = _ratio((returns * weights) @ membership, weights @ membership)
+    cap_weighted = np.where(np.isnan(cap_weighted), equal, cap_weighted)
+
+    ma = indicators.rolling_mean(close, BREADTH_MA)
+    eligible = ~np.isnan(ma) & panel.traded
+    above = eligible & (close > np.where(eligible, ma, np.inf))
+    breadth = _ratio(
+        above.astype(np.float64) @ membership, eligible.astype(np.float64) @ membership
+    )
+
+    return names, {
+        "cap_return": np.nan_to_num(cap_weighted),
+        "equal_return": np.nan_to_num(equal),
+        "breadth": breadth,
+        "members": panel.traded.astype(np.float64) @ membership,
+    }
+
+
+def _stored_levels(grouping: str, day: date) -> dict[str, tuple[float, float]]:
+    rows = SectorIndexBar.objects.filter(grouping=grouping, trade_date=day).values_list(
+        "sector", "cap_weighted", "equal_weighted"
+    )
+    return {sector: (float(cap), float(equal)) for sector, cap, equal in rows}
+
+
+def _anchor_date(grouping: str) -> date | None:
+    """
+    The last stored day before the trailing recompute window, whose levels the
+    recomputed days chain onto; None when the history does not reach back
+    that far.
+    """
+    last = SectorIndexBar.objects.filter(grouping=grouping).aggregate(last=Max("trade_date"))[
+        "last"
+    ]
+    if last is None:
+        return None
+    cutoff = last - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)
+    return SectorIndexBar.objects.filter(grouping=grouping, trade_date__lte=cutoff).aggregate(
+        anchor=Max("trade_date")
+    )["anchor"]
+
+
+def update_grouping(grouping: str, *, rebuild: bool = False) -> dict:
+    """Recompute and upsert the trailing window of stored bars (all history on rebuild)."""
+    symbols, sector_names, cap_values = sector_members(grouping)
+    today = bar_store.market_today()
+    anchor = None if rebuild else _anchor_date(grouping)
+    start = (
+        today - timedelta(days=bar_store.BACKFILL_DAYS)
+        if anchor is None
+        else anchor - timedelta(days=_WARMUP_DAYS)
+    )
+    panel = load_panel_between(symbols, start, today)
+    if not panel.symbols:
+        return {"grouping": grouping, "sectors": 0, "days": 0}
+
+    sectors = dict(zip(symbols, sector_names, strict=True))
+    caps = dict(zip(symbols, cap_values.tolist(), strict=True))
+    names, series = compute_sector_series(panel, sectors, caps)
+
+    keep = np.ones(len(panel.dates), dtype=bool)
+    if anchor is not None:
+        keep = panel.dates > np.datetime64(anchor, "D")
+    if not keep.any():
+        return {"grouping": grouping, "sectors": len(names), "days": 0}
+
+    base = _stored_levels(grouping, anchor) if anchor is not None else {}
+    base_cap = np.asarray([base.get(name, (BASE_LEVEL, BASE_LEVEL))[0] for name in names])
+    base_equal = np.asarray([base.get(name, (BASE_LEVEL, BASE_LEVEL))[1] for name in names])
+    cap_levels = base_cap * np.cumprod(1 + series["cap_return"][keep], axis=0)
+    equal_levels = base_equal * np.cumprod(1 + series["equal_return"][keep], axis=0)
+    breadth = series["breadth"][keep]
+    members = series["members"][keep]
+
+    rows = [
+        SectorIndexBar(
+            grouping=grouping,
+            sector=name,
+            trade_date=day,
+            cap_weighted=round(float(cap_levels[row, column]), 6),
+            equal_weighted=round(float(equal_levels[row, column]), 6),
+            breadth=None
+            if np.isnan(breadth[row, column])
+            else round(float(breadth[row, column]), 4),
+            members=int(members[row, column]),
+        )
+        for row, day in enumerate(panel.dates[keep].tolist())
+        for column, name in enumerate(names)
+        if members[row, column] > 0
+    ]
+    SectorIndexBar.objects.bulk_create(
+        rows,
+        batch_size=_UPSERT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["grouping", "sector", "trade_date"],
+        update_fields=["cap_weighted", "equal_weighted", "breadth", "members", "updated_at"],
+    )
+    return {"grouping": grouping, "sectors": len(names), "days": int(keep.sum())}
+
+
+def update_sector_indices(*, rebuild: bool = False) -> list[dict]:
+    """Bring every grouping's sector indices up to the latest stored bar."""
+    return [update_grouping(grouping, rebuild=rebuild) for grouping in GROUPINGS]
+
+
+def _value(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def latest_levels(grouping: str) -> tuple[date | None, list[dict]]:
+    """Every sector's most recent stored bar under ``grouping``."""
+    queryset = SectorIndexBar.objects.filter(grouping=grouping)
+    last = queryset.aggregate(last=Max("trade_date"))["last"]
+    if last is None:
+        return None, []
+    rows = queryset.filter(trade_date=last).order_by("sector").values("sector", *SERIES_FIELDS)
+    return last, [{key: _value(value) for key, value in row.items()} for row in rows]
+
+
+def load_series(grouping: str, sector: str, days: int) -> dict[str, list]:
+    """The last ``days`` stored bars of one sector, column-wise and oldest first."""
+    rows = list(
+        SectorIndexBar.objects.filter(grouping=grouping, sector=sector)
+        .order_by("-trade_date")
+        .values_list("trade_date", *SERIES_FIELDS)[:days]
+    )[::-1]
+    columns = list(zip(*rows, strict=True)) if rows else [()] * (len(SERIES_FIELDS) + 1)
+    series = {"dates": [day.isoformat() for day in columns[0]]}
+    for name, values in zip(SERIES_FIELDS, columns[1:], strict=True):
+        series[name] = [_value(value) for value in values]
+    return series
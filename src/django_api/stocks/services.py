@@ -5,46 +5,114 @@ Integrates with AkShare for real-time and historical data
 """
 
 import asyncio
+import json
 import logging
 import os
 from datetime import UTC, datetime, timedelta
-from datetime import time as datetime_time
-from io import StringIO
 
+import numpy as np
 import pandas as pd
-from django.core.cache import cache
+
+from .stock_cache import cache
 
 try:  # Optional dependency for distributed caching
     import redis.asyncio as redis_async  # type: ignore
 except ImportError:  # pragma: no cover - redis not installed
     redis_async = None
 
-from .akshare_client import MINUTE_PERIOD_MAP, get_daily_data, get_minute_data
-from .models import StockScore
+from . import (
+    array_store,
+    async_bridge,
+    bar_store,
+    cache_codec,
+    downsample,
+    indicators,
+    latest_scores,
+    market_calendar,
+    minute_bars,
+)
+from .akshare_client import get_minute_data
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 REDIS_URL = os.getenv("REDIS_URL")
-redis_client = None
+CACHE_CODEC = os.getenv("STOCK_CACHE_CODEC", cache_codec.DEFAULT_CODEC)
+
+
+def _create_redis_client():
+    return redis_async.from_url(
+        REDIS_URL,
+        # Frames are stored as binary codec payloads, so keep responses as bytes.
+        decode_responses=False,
+        socket_connect_timeout=1.5,
+    )
+
+
+# redis.asyncio pools are bound to the loop that opened them: keep one per loop
+# (the sync bridge loop and, under ASGI, the server loop).
+_redis_clients = None
 if redis_async and REDIS_URL:
+    _redis_clients = async_bridge.LoopLocal(_create_redis_client)
+elif not REDIS_URL:
+    logger.info("REDIS_URL not configured; Redis caching disabled for stock services.")
+
+
+def _redis():
+    """Redis client for the running event loop, or None when Redis is disabled."""
+    if _redis_clients is None:
+        return None
     try:
-        redis_client = redis_async.from_url(
-            REDIS_URL,
-            encoding="utf-8",
-            decode_responses=True,
-            socket_connect_timeout=1.5,
-        )
+        return _redis_clients.get()
     except Exception as exc:  # pragma: no cover - connection issues
         logger.warning("Redis unavailable (%s); falling back to local cache only.", exc)
-        redis_client = None
-elif not REDIS_URL:
-    logger.info("REDIS_URL not configured; Redis caching disabled for stock services.")
+        return None
+
+
+# One upstream AkShare fetch per cache key, shared by concurrent callers/processes.
+akshare_flight = SingleFlight("akshare", redis_factory=_redis)
 
 FULL_DAILY_LOOKBACK_DAYS = 3650  # ~10 years
+# Market-data TTLs below apply while the market is live; market_calendar
+# stretches them to the next open (or cuts them at settlement) otherwise.
 FULL_DAILY_CACHE_TIMEOUT = 6 * 3600  # 6 hours
 INTRADAY_CACHE_TIMEOUT = 60
-INTRADAY_INTERVAL_CACHE_TIMEOUT = 120
+INTRADAY_WARM_CACHE_TIMEOUT = 90  # outlives the warmer's one-minute cadence
 DAILY_CACHE_TIMEOUT = 3600
+INDICATOR_STATE_CACHE_TIMEOUT = (
+    7 * 24 * 3600
+)  # outlives the bar cache so refreshes stay incremental
+BATCH_MAX_SYMBOLS = int(os.getenv("STOCK_BATCH_MAX_SYMBOLS", "30"))
+BATCH_CONCURRENCY = int(os.getenv("STOCK_BATCH_CONCURRENCY", "8"))
+
+# Response key -> frame column for historical/intraday payloads ("index" = frame index).
+HISTORICAL_COLUMNS = {
+    "date": "Date_Str",
+    "trading_day": "Trading_Day",
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "volume": "Volume",
+    "ma5": "MA5",
+    "ma10": "MA10",
+    "obv": "OBV",
+    "obv_ma5": "OBV_MA5",
+    "obv_ma10": "OBV_MA10",
+    "cmf": "CMF",
+}
+INTRADAY_COLUMNS = {
+    "time": "index",
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "volume": "Volume",
+    "vwap": "VWAP",
+}
+# Indicator keys that only appear on a data point when the value is not NaN.
+HISTORICAL_OPTIONAL_KEYS = ("ma5", "ma10", "obv", "obv_ma5", "obv_ma10", "cmf")
+_INTEGER_KEYS = frozenset({"trading_day", "volume"})
 
 
 def _determine_lookback_days(requested_days: int, interval: str) -> int:
@@ -54,7 +122,7 @@ def _determine_lookback_days(requested_days: int, interval: str) -> int:
     if requested_days <= 0:
         requested_days = 1
 
-    if interval in MINUTE_PERIOD_MAP:
+    if interval in minute_bars.MINUTE_INTERVALS:
         return min(max(requested_days, 5), 30)
 
     if interval == "1wk":
@@ -79,124 +147,315 @@ def _resample_ohlc(df: pd.DataFrame, rule: str) -> pd.DataFrame:
     return resampled
 
 
-def _normalize_cached_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    if isinstance(df.index, pd.Index) and df.index.dtype == object:
-        try:
-            df.index = pd.to_datetime(df.index)
-        except Exception:  # pragma: no cover - best effort conversion
-            pass
-    for column in ("Timestamp", "Date"):
-        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
-            try:
-                df[column] = pd.to_datetime(df[column])
-            except Exception:  # pragma: no cover - best effort conversion
-                pass
-    return df
-
-
 async def _cache_get_dataframe(key: str) -> pd.DataFrame | None:
+    redis_client = _redis()
     if redis_client is not None:
         try:
             payload = await redis_client.get(key)
-            if payload:
-                df = pd.read_json(StringIO(payload), orient="split")
-                return _normalize_cached_dataframe(df)
         except Exception as exc:  # pragma: no cover
             logger.debug("Redis get failed for %s: %s", key, exc)
+        else:
+            if not payload:
+                return None
+            try:
+                return cache_codec.decode_dataframe(payload)
+            except ValueError:
+                return None
 
+    # The Django cache stands in only when the direct Redis client is unavailable.
     cached = cache.get(key)
     if cached:
         try:
-            df = pd.read_json(StringIO(cached), orient="split")
-            return _normalize_cached_dataframe(df)
+            return cache_codec.decode_dataframe(cached)
         except ValueError:
             cache.delete(key)
     return None
 
 
 async def _cache_set_dataframe(key: str, df: pd.DataFrame, timeout: int) -> None:
-    payload = df.to_json(orient="split")
+    payload = cache_codec.encode_dataframe(df, codec=CACHE_CODEC)
+    redis_client = _redis()
     if redis_client is not None:
         try:
             await redis_client.set(key, payload, ex=timeout)
         except Exception as exc:  # pragma: no cover
             logger.debug("Redis set failed for %s: %s", key, exc)
+        else:
+            return
     cache.set(key, payload, timeout=timeout)
 
 
+async def _gather_bounded(symbols: list[str], fetch, *, limit: int) -> dict:
+    """
+    Run ``fetch(symbol)`` for every symbol with at most ``limit`` in flight.
+    Failures are returned in place of the frame rather than raised.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(symbol: str):
+        async with semaphore:
+            return await fetch(symbol)
+
+    results = await asyncio.gather(*(run(symbol) for symbol in symbols), return_exceptions=True)
+    return dict(zip(symbols, results, strict=True))
+
+
+def _scalar_column(df: pd.DataFrame, column: str, *, integer: bool = False) -> list:
+    """
+    One column as Python scalars, matching the per-cell ``float()``/``int()``
+    conversions of the row-wise formatters. ``index`` formats the frame index.
+    """
+    if column == "index":
+        return df.index.strftime("%Y-%m-%d %H:%M:%S").tolist()
+    array = df[column].to_numpy()
+    if integer:
+        return array.astype(np.int64, copy=False).tolist()
+    if array.dtype.kind in "biuf":
+        return array.astype(np.float64, copy=False).tolist()
+    return array.tolist()
+
+
+def _point_records(
+    df: pd.DataFrame, columns: dict[str, str], optional: tuple[str, ...] = ()
+) -> list[dict]:
+    """
+    Per-row point dicts built column-wise from NumPy arrays. Optional keys are
+    added only where the value is not NaN, in ``columns`` order, so the result
+    serializes identically to the old ``iterrows`` + ``pd.notna`` loop.
+    """
+    keys = [key for key in columns if key not in optional]
+    values = [_scalar_column(df, columns[key], integer=key in _INTEGER_KEYS) for key in keys]
+    points = [dict(zip(keys, row, strict=True)) for row in zip(*values, strict=True)]
+
+    for key in optional:
+        column = columns[key]
+        if column not in df.columns:
+            continue
+        array = df[column].to_numpy(dtype=np.float64)
+        present = np.flatnonzero(~np.isnan(array))
+        for position, value in zip(present.tolist(), array[present].tolist(), strict=True):
+            points[position][key] = value
+    return points
+
+
+def _columnar(df: pd.DataFrame, columns: dict[str, str]) -> dict[str, list]:
+    """Compact column-oriented payload; NaN becomes None and absent columns are skipped."""
+    payload = {}
+    for key, column in columns.items():
+        if column != "index" and column not in df.columns:
+            continue
+        integer = key in _INTEGER_KEYS
+        if column == "index" or integer or df[column].dtype.kind != "f":
+            payload[key] = _scalar_column(df, column, integer=integer)
+            continue
+        array = df[column].to_numpy(dtype=np.float64)
+        values = array.astype(object)
+        values[np.isnan(array)] = None
+        payload[key] = values.tolist()
+    return payload
+
+
 def _run_async(func, *args, **kwargs):
+    """Run an async service call from sync code on the shared bridge loop."""
+    return async_bridge.bridge.run(func, *args, **kwargs)
+
+
+async def _load_dataframe_once(key: str, loader) -> pd.DataFrame:
+    """Run ``loader`` through the AkShare single-flight, re-reading ``key`` for remote results."""
+
+    async def recheck():
+        cached = await _cache_get_dataframe(key)
+        return cached if cached is not None and not cached.empty else None
+
+    return await akshare_flight.do(key, loader, recheck=recheck)
+
+
+def _stored_daily_frame(symbol: str) -> pd.DataFrame | None:
+    """
+    Memory-mapped full daily history with indicators, when the array store
+    holds a current copy.
+    """
+    frame = array_store.read_symbol(symbol)
+    if frame is None or frame.empty:
+        return None
+    written_at = array_store.written_at(symbol)
+    last_date = frame["Date"].iat[-1].date()
+    if written_at is None or not bar_store.is_current_bar(last_date, written_at):
+        return None
+    return frame
+
+
+async def _get_full_daily_dataframe(symbol: str, *, refresh: bool = False) -> pd.DataFrame:
+    if not refresh:
+        stored = _stored_daily_frame(symbol)
+        if stored is not None:
+            return stored[list(array_store.BAR_FIELDS)]
+    cache_key = f"akshare:daily-full:{symbol}"
+    cached = None if refresh else await _cache_get_dataframe(cache_key)
+    if cached is not None and not cached.empty:
+        return cached
+
+    async def load() -> pd.DataFrame:
+        start = bar_store.market_today() - timedelta(days=FULL_DAILY_LOOKBACK_DAYS)
+        df = await async_bridge.run_db(bar_store.get_daily_bars, symbol, start=start)
+        if df.empty:
+            return df
+        await _cache_set_dataframe(
+            cache_key, df, timeout=market_calendar.daily_ttl(FULL_DAILY_CACHE_TIMEOUT)
+        )
+        return df
+
+    return await _load_dataframe_once(cache_key, load)
+
+
+async def _cache_get_indicator_state(key: str) -> indicators.IndicatorState | None:
+    redis_client = _redis()
+    if redis_client is not None:
+        try:
+            payload = await redis_client.get(key)
+        except Exception as exc:  # pragma: no cover
+            logger.debug("Redis get failed for %s: %s", key, exc)
+            payload = cache.get(key)
+    else:
+        payload = cache.get(key)
+    if not payload:
+        return None
     try:
-        return asyncio.run(func(*args, **kwargs))
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
+        return indicators.IndicatorState.from_dict(json.loads(payload))
+    except (TypeError, ValueError, KeyError):
+        cache.delete(key)
+        return None
+
+
+async def _cache_set_indicator_state(
+    key: str, state: indicators.IndicatorState, timeout: int
+) -> None:
+    payload = json.dumps(state.to_dict())
+    redis_client = _redis()
+    if redis_client is not None:
         try:
-            return loop.run_until_complete(func(*args, **kwargs))
-        finally:
-            loop.close()
+            await redis_client.set(key, payload, ex=timeout)
+        except Exception as exc:  # pragma: no cover
+            logger.debug("Redis set failed for %s: %s", key, exc)
+        else:
+            return
+    cache.set(key, payload, timeout=timeout)
 
 
-async def _get_full_daily_dataframe(symbol: str) -> pd.DataFrame:
-    cache_key = f"akshare:daily-full:{symbol}"
-    cached = await _cache_get_dataframe(cache_key)
+async def _get_daily_indicator_frame(symbol: str, bars: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Full-history daily bars with indicators, indexed by Date.
+
+    Served from the array store's memory-mapped columns while it holds a
+    current copy. Otherwise, or when the caller passes freshly synced
+    ``bars``, the persisted IndicatorState is advanced with only the bars that
+    arrived since the last refresh; a restated history falls back to a full
+    recompute.
+    """
+    if bars is None:
+        stored = _stored_daily_frame(symbol)
+        if stored is not None:
+            return stored.set_index("Date")
+        bars = await _get_full_daily_dataframe(symbol)
+    if bars.empty:
+        return pd.DataFrame()
+    bars = bars.set_index("Date")
+
+    frame_key = f"akshare:daily-indicators:{symbol}"
+    state_key = f"akshare:indicator-state:{symbol}:1d"
+    state = await _cache_get_indicator_state(state_key)
+    frame = None
+    if state is not None and state.can_extend(bars):
+        frame = await _cache_get_dataframe(frame_key)
+        if frame is not None and not frame.empty:
+            if "Date" in frame.columns:  # written before the binary codec kept the index
+                frame = frame.set_index("Date")
+            if frame.index[-1] != state.last_timestamp:
+                frame = None
+
+    if frame is None:
+        state = indicators.IndicatorState()
+        frame = indicators.extend_indicator_frame(None, state, bars)
+    else:
+        new_bars = bars[bars.index > state.last_timestamp]
+        if new_bars.empty:
+            return frame
+        frame = indicators.extend_indicator_frame(frame, state, new_bars)
+        logger.debug("Advanced indicator state for %s by %d bars", symbol, len(new_bars))
+
+    await _cache_set_dataframe(frame_key, frame, timeout=INDICATOR_STATE_CACHE_TIMEOUT)
+    await _cache_set_indicator_state(state_key, state, timeout=INDICATOR_STATE_CACHE_TIMEOUT)
+    return frame
+
+
+async def _get_resampled_indicator_frame(
+    symbol: str, interval: str, *, refresh: bool = False
+) -> pd.DataFrame:
+    """Full-history weekly/monthly bars with indicators, indexed by period end."""
+    frame_key = f"akshare:indicators:{symbol}:{interval}"
+    cached = None if refresh else await _cache_get_dataframe(frame_key)
     if cached is not None and not cached.empty:
         return cached
 
-    end_time = datetime.now(tz=UTC)
-    start_time = end_time - timedelta(days=FULL_DAILY_LOOKBACK_DAYS)
-    df = await asyncio.to_thread(get_daily_data, symbol, start_time, end_time)
+    full_df = await _get_full_daily_dataframe(symbol)
+    if full_df.empty:
+        return pd.DataFrame()
+    df = _resample_ohlc(full_df.set_index("Date"), "W" if interval == "1wk" else "ME")
     if df.empty:
         return df
-    df["Date"] = pd.to_datetime(df["Date"])
-    await _cache_set_dataframe(cache_key, df, timeout=FULL_DAILY_CACHE_TIMEOUT)
+    frame = VWAPCalculationService.calculate_all_indicators(df)
+    await _cache_set_dataframe(
+        frame_key, frame, timeout=market_calendar.daily_ttl(DAILY_CACHE_TIMEOUT)
+    )
+    return frame
+
+
+async def _get_minute_indicator_frame(symbol: str, interval: str) -> pd.DataFrame:
+    """
+    Latest minute bars at ``interval`` with indicators, indexed by bar end time.
+
+    Every interval is aggregated from the one cached 1-minute series, so
+    switching intervals costs no upstream call.
+    """
+    bars = await VWAPCalculationService._get_intraday_async(symbol, "CN")
+    if bars.empty:
+        logger.warning("No %s minute data available for %s via AkShare.", interval, symbol)
+        return pd.DataFrame()
+    df = minute_bars.aggregate_minute_bars(bars, minute_bars.MINUTE_INTERVALS[interval])
+    if len(df) > 21:
+        df = VWAPCalculationService.calculate_all_indicators(df)
+    logger.info("Intraday data: %d data points for %s at %s interval", len(df), symbol, interval)
     return df
 
 
+def _display_slice(frame: pd.DataFrame, rows: int, date_format: str) -> pd.DataFrame:
+    """
+    Last ``rows`` of a cached indicator frame in the display layout
+    (``Timestamp`` column, ``Date_Str``, 1-based ``Trading_Day``).
+
+    Indicator columns are taken straight from the slice without copying; only
+    the derived columns are materialized, and only for the requested rows.
+    """
+    tail = frame.iloc[len(frame) - rows :] if rows < len(frame) else frame
+    timestamps = tail.index
+    columns = {"Timestamp": timestamps.array}
+    columns.update({name: tail[name].array for name in tail.columns})
+    columns["Date_Str"] = timestamps.strftime(date_format)
+    columns["Trading_Day"] = np.arange(1, len(tail) + 1)
+    return pd.DataFrame(columns, copy=False)
+
+
 class VWAPCalculationService:
     """VWAP and technical indicators calculation service"""
 
     @staticmethod
     def get_latest_stock_score(symbol: str) -> dict | None:
-        """Fetch latest stored scoring snapshot for a ticker from stock_scores table."""
+        """Fetch the latest stored scoring snapshot for a ticker (primary-key read)."""
         if not symbol:
             return None
 
         try:
-            score = (
-                StockScore.objects.filter(ticker=symbol)
-                .order_by("-calculation_date", "-updated_at")
-                .first()
-            )
-            if not score:
-                return None
-
-            def to_float(value):
-                if value is None:
-                    return None
-                try:
-                    return float(value)
-                except (TypeError, ValueError):
-                    return None
-
-            return {
-                "calculation_date": score.calculation_date.isoformat()
-                if score.calculation_date
-                else None,
-                "total_score": to_float(score.total_score),
-                "recommended_action": score.recommended_action or "",
-                "recommended_action_detail": score.recommended_action_detail or "",
-                "last_trading_date": score.last_trading_date.isoformat()
-                if score.last_trading_date
-                else None,
-                "last_close": to_float(score.last_close),
-                "score_components": score.score_components or {},
-                "signal_date": score.signal_date.isoformat() if score.signal_date else None,
-                "execution_date": score.execution_date.isoformat()
-                if score.execution_date
-                else None,
-                "suggested_position_pct": to_float(score.suggested_position_pct),
-                "stop_loss_price": to_float(score.stop_loss_price),
-                "take_profit_price": to_float(score.take_profit_price),
-            }
+            return latest_scores.get(symbol)
         except Exception as exc:
             logger.warning("Unable to fetch stock score for %s: %s", symbol, exc)
             return None
@@ -213,10 +472,7 @@ class VWAPCalculationService:
             df.index = pd.to_datetime(df.index)
 
         times = df.index.time
-        morning_start = datetime_time(9, 15)
-        morning_end = datetime_time(11, 30)
-        afternoon_start = datetime_time(13, 0)
-        afternoon_end = datetime_time(15, 0)
+        (morning_start, morning_end), (afternoon_start, afternoon_end) = market_calendar.SESSIONS
 
         mask = ((times >= morning_start) & (times <= morning_end)) | (
             (times >= afternoon_start) & (times <= afternoon_end)
@@ -232,70 +488,66 @@ class VWAPCalculationService:
     @staticmethod
     def calculate_vwap(df: pd.DataFrame) -> pd.DataFrame:
         """Calculate VWAP Indicator"""
-        df = df.copy()
-        df["Typical_Price"] = (df["High"] + df["Low"] + df["Close"]) / 3
-        df["TP_Volume"] = df["Typical_Price"] * df["Volume"]
-        df["Cumulative_TP_Volume"] = df["TP_Volume"].cumsum()
-        df["Cumulative_Volume"] = df["Volume"].cumsum()
-        df["VWAP"] = df["Cumulative_TP_Volume"] / df["Cumulative_Volume"]
-        return df
+        high, low, close = df["High"].to_numpy(), df["Low"].to_numpy(), df["Close"].to_numpy()
+        volume = indicators.as_float_array(df["Volume"])
+        typical_price = (high + low + close) / 3
+        tp_volume = typical_price * volume
+        cumulative_tp_volume = np.cumsum(tp_volume)
+        cumulative_volume = np.cumsum(volume)
+        return df.assign(
+            Typical_Price=typical_price,
+            TP_Volume=tp_volume,
+            Cumulative_TP_Volume=cumulative_tp_volume,
+            Cumulative_Volume=cumulative_volume,
+            VWAP=cumulative_tp_volume / cumulative_volume,
+        )
 
     @staticmethod
     def calculate_ma(df: pd.DataFrame, periods: list[int] | None = None) -> pd.DataFrame:
         """Calculate Moving Averages"""
         periods = periods or [5, 10]
-        df = df.copy()
-        for period in periods:
-            df[f"MA{period}"] = df["Close"].rolling(window=period).mean()
-        return df
+        close = indicators.as_float_array(df["Close"])
+        return df.assign(
+            **{f"MA{period}": indicators.rolling_mean(close, period) for period in periods}
+        )
 
     @staticmethod
     def calculate_obv(df: pd.DataFrame) -> pd.DataFrame:
         """Calculate On-Balance Volume (OBV)"""
-        df = df.copy()
-        df["OBV"] = 0.0
-
-        for i in range(1, len(df)):
-            if df["Close"].iloc[i] > df["Close"].iloc[i - 1]:
-                df.loc[df.index[i], "OBV"] = df["OBV"].iloc[i - 1] + df["Volume"].iloc[i]
-            elif df["Close"].iloc[i] < df["Close"].iloc[i - 1]:
-                df.loc[df.index[i], "OBV"] = df["OBV"].iloc[i - 1] - df["Volume"].iloc[i]
-            else:
-                df.loc[df.index[i], "OBV"] = df["OBV"].iloc[i - 1]
-
-        df["OBV_MA5"] = df["OBV"].rolling(window=5).mean()
-        df["OBV_MA10"] = df["OBV"].rolling(window=10).mean()
-
-        return df
+        obv = indicators.on_balance_volume(df["Close"], df["Volume"])
+        return df.assign(
+            OBV=obv,
+            OBV_MA5=indicators.rolling_mean(obv, 5),
+            OBV_MA10=indicators.rolling_mean(obv, 10),
+        )
 
     @staticmethod
     def calculate_cmf(df: pd.DataFrame, period: int = 21) -> pd.DataFrame:
         """Calculate Chaikin Money Flow (CMF)"""
-        df = df.copy()
-
-        df["MF_Multiplier"] = ((df["Close"] - df["Low"]) - (df["High"] - df["Close"])) / (
-            df["High"] - df["Low"]
-        )
-        df.loc[df["High"] == df["Low"], "MF_Multiplier"] = 0
-        df["MF_Volume"] = df["MF_Multiplier"] * df["Volume"]
-        df["CMF"] = (
-            df["MF_Volume"].rolling(window=period).sum() / df["Volume"].rolling(window=period).sum()
+        multiplier = indicators.money_flow_multiplier(df["High"], df["Low"], df["Close"])
+        mf_volume = multiplier * indicators.as_float_array(df["Volume"])
+        return df.assign(
+            MF_Multiplier=multiplier,
+            MF_Volume=mf_volume,
+            CMF=indicators.chaikin_money_flow(
+                df["High"], df["Low"], df["Close"], df["Volume"], period
+            ),
         )
 
-        return df
-
     @staticmethod
     def calculate_all_indicators(df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate all technical indicators"""
-        df = VWAPCalculationService.calculate_ma(df, [5, 10])
-        df = VWAPCalculationService.calculate_obv(df)
-        df = VWAPCalculationService.calculate_cmf(df, 21)
-        return df
+        """Calculate all technical indicators (MA5/10, OBV + MAs, CMF21) in one pass"""
+        return indicators.apply_indicators(df, ma_periods=(5, 10), cmf_period=indicators.CMF_PERIOD)
 
     @staticmethod
     def get_intraday_data(symbol: str, market: str = "CN") -> pd.DataFrame | None:
+        return _run_async(VWAPCalculationService.aget_intraday_data, symbol, market)
+
+    @staticmethod
+    async def aget_intraday_data(symbol: str, market: str = "CN") -> pd.DataFrame | None:
+        """Async-native ``get_intraday_data`` for ASGI views."""
         try:
-            df = _run_async(VWAPCalculationService._get_intraday_async, symbol, market)
+            df = await VWAPCalculationService._get_intraday_async(symbol, market)
             if df is not None and df.empty:
                 return None
             return df
@@ -304,27 +556,37 @@ class VWAPCalculationService:
             return None
 
     @staticmethod
-    async def _get_intraday_async(symbol: str, market: str) -> pd.DataFrame:
+    async def _get_intraday_async(
+        symbol: str, market: str, *, refresh: bool = False
+    ) -> pd.DataFrame:
         cache_key = f"akshare:intraday:{symbol}:{market}"
-        cached = await _cache_get_dataframe(cache_key)
+        cached = None if refresh else await _cache_get_dataframe(cache_key)
         if cached is not None and not cached.empty:
             return cached
 
-        df = await asyncio.to_thread(get_minute_data, symbol, "1m")
-        if df.empty:
-            logger.warning("No intraday data available for %s via AkShare.", symbol)
-            return pd.DataFrame()
+        async def load() -> pd.DataFrame:
+            df = await asyncio.to_thread(get_minute_data, symbol, "1m")
+            if df.empty:
+                logger.warning("No intraday data available for %s via AkShare.", symbol)
+                return pd.DataFrame()
 
-        df = df[df["Volume"] > 0]
+            df = df[df["Volume"] > 0]
 
-        if market == "CN":
-            df = VWAPCalculationService.filter_trading_hours(df)
+            if market == "CN":
+                df = VWAPCalculationService.filter_trading_hours(df)
 
-        if df.empty:
-            logger.warning("Intraday data empty after market-hour filtering for %s.", symbol)
-            return pd.DataFrame()
+            if df.empty:
+                logger.warning("Intraday data empty after market-hour filtering for %s.", symbol)
+                return pd.DataFrame()
+
+            live_ttl = INTRADAY_WARM_CACHE_TIMEOUT if refresh else INTRADAY_CACHE_TIMEOUT
+            timeout = market_calendar.intraday_ttl(live_ttl)
+            await _cache_set_dataframe(cache_key, df, timeout=timeout)
+            return df
 
-        await _cache_set_dataframe(cache_key, df, timeout=INTRADAY_CACHE_TIMEOUT)
+        df = await _load_dataframe_once(cache_key, load)
+        if df.empty:
+            return df
 
         logger.info(
             "Intraday data for %s: %s to %s (%d bars)",
@@ -340,13 +602,18 @@ class VWAPCalculationService:
     def get_historical_data(
         symbol: str, days: int = 30, interval: str = "1d", period: str | None = None
     ) -> pd.DataFrame | None:
+        return _run_async(
+            VWAPCalculationService.aget_historical_data, symbol, days, interval, period
+        )
+
+    @staticmethod
+    async def aget_historical_data(
+        symbol: str, days: int = 30, interval: str = "1d", period: str | None = None
+    ) -> pd.DataFrame | None:
+        """Async-native ``get_historical_data`` for ASGI views."""
         try:
-            df_display = _run_async(
-                VWAPCalculationService._get_historical_async,
-                symbol,
-                days,
-                interval,
-                period,
+            df_display = await VWAPCalculationService._get_historical_async(
+                symbol, days, interval, period
             )
             if df_display is not None and df_display.empty:
                 return None
@@ -367,88 +634,46 @@ class VWAPCalculationService:
                 days,
             )
 
-        cache_key = f"akshare:hist:{symbol}:{interval}:{days}:{period or 'none'}"
-        cached = await _cache_get_dataframe(cache_key)
-        if cached is not None and not cached.empty:
-            return cached
-
-        if interval in MINUTE_PERIOD_MAP:
-            df = await asyncio.to_thread(get_minute_data, symbol, interval)
-            if df.empty:
-                logger.warning("No %s minute data available for %s via AkShare.", interval, symbol)
+        if interval in minute_bars.MINUTE_INTERVALS:
+            frame = await _get_minute_indicator_frame(symbol, interval)
+            if frame.empty:
                 return pd.DataFrame()
-            df = df[df["Volume"] > 0]
-
-            df_full = df.copy()
-            if len(df_full) > 21:
-                df_full = VWAPCalculationService.calculate_all_indicators(df_full)
-            logger.info(
-                "Intraday data: %d data points for %s at %s interval",
-                len(df_full),
-                symbol,
-                interval,
-            )
+            return _display_slice(frame, len(frame), "%Y-%m-%d %H:%M:%S")
 
-            df_display = df_full.reset_index()
-            if "Datetime" in df_display.columns:
-                df_display = df_display.rename(columns={"Datetime": "Timestamp"})
-            elif "index" in df_display.columns:
-                df_display = df_display.rename(columns={"index": "Timestamp"})
-            df_display["Date_Str"] = df_display["Timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
-            df_display["Trading_Day"] = range(1, len(df_display) + 1)
-            await _cache_set_dataframe(
-                cache_key, df_display, timeout=INTRADAY_INTERVAL_CACHE_TIMEOUT
-            )
-            return df_display
-
-        full_df = await _get_full_daily_dataframe(symbol)
-        if full_df.empty:
+        if interval in ("1wk", "1mo"):
+            frame = await _get_resampled_indicator_frame(symbol, interval)
+        else:
+            # Daily indicators are maintained incrementally over the full history,
+            # so a refresh only computes the bars that arrived since the last one.
+            frame = await _get_daily_indicator_frame(symbol)
+        if frame.empty:
             logger.warning("No historical data available for %s via AkShare.", symbol)
             return pd.DataFrame()
 
-        full_df = full_df.copy()
-        full_df["Date"] = pd.to_datetime(full_df["Date"])
-
         lookback_days = _determine_lookback_days(days, interval)
-        cutoff = datetime.now(tz=UTC) - timedelta(days=lookback_days)
-        df = full_df[full_df["Date"] >= cutoff].copy()
-        if df.empty:
-            df = full_df.tail(days * 2 or 60).copy()
-
-        df = df.set_index("Date")
-
-        if interval == "1wk":
-            df = _resample_ohlc(df, "W")
-        elif interval == "1mo":
-            df = _resample_ohlc(df, "M")
-
-        if df.empty:
-            logger.warning("Historical data empty after processing for %s.", symbol)
-            return pd.DataFrame()
-
+        # Bars carry naive exchange dates; compare against a naive cutoff.
+        cutoff = (datetime.now(tz=UTC) - timedelta(days=lookback_days)).replace(tzinfo=None)
         min_calc_days = 30
-        calculation_days = max(min_calc_days, min(days * 2, len(df)))
-        df_full = df.tail(calculation_days).copy()
-        df_full = VWAPCalculationService.calculate_all_indicators(df_full)
-        logger.info("Historical data: %d data points for %s", len(df_full), symbol)
-
-        df_display = df_full.reset_index()
-        if "Date" in df_display.columns:
-            df_display = df_display.rename(columns={"Date": "Timestamp"})
-        elif "index" in df_display.columns:
-            df_display = df_display.rename(columns={"index": "Timestamp"})
-        df_display["Date_Str"] = df_display["Timestamp"].dt.strftime("%Y-%m-%d")
-        df_display["Trading_Day"] = range(1, len(df_display) + 1)
-
-        await _cache_set_dataframe(cache_key, df_display, timeout=DAILY_CACHE_TIMEOUT)
-        return df_display
+        available = int((frame.index >= cutoff).sum()) or min(days * 2 or 60, len(frame))
+        calculation_days = min(available, max(min_calc_days, min(days * 2, available)))
+        logger.info("Historical data: %d data points for %s", calculation_days, symbol)
+
+        return _display_slice(frame, calculation_days, "%Y-%m-%d")
 
     @staticmethod
     def format_intraday_response(
-        df: pd.DataFrame, symbol: str, company_name: str, company_data: dict | None = None
+        df: pd.DataFrame,
+        symbol: str,
+        company_name: str,
+        company_data: dict | None = None,
+        *,
+        layout: str = "points",
     ) -> dict:
         """
         Format intraday data for API response
+
+        ``layout="columns"`` returns one list per field under ``columns``
+        instead of the per-bar ``data_points`` dicts.
         """
         if df is None or df.empty:
             return {"success": False, "message": "No data available", "data": None}
@@ -468,19 +693,10 @@ class VWAPCalculationService:
         else:
             previous_close = open_price
 
-        data_points = []
-        for idx, row in df.iterrows():
-            data_points.append(
-                {
-                    "time": idx.strftime("%Y-%m-%d %H:%M:%S"),
-                    "open": float(row["Open"]),
-                    "high": float(row["High"]),
-                    "low": float(row["Low"]),
-                    "close": float(row["Close"]),
-                    "volume": int(row["Volume"]),
-                    "vwap": float(row["VWAP"]),
-                }
-            )
+        if layout == "columns":
+            series = {"columns": _columnar(df, INTRADAY_COLUMNS)}
+        else:
+            series = {"data_points": _point_records(df, INTRADAY_COLUMNS)}
 
         latest = df.iloc[-1]
         current_price = float(latest["Close"])
@@ -502,7 +718,7 @@ class VWAPCalculationService:
             "low": float(df["Low"].min()),
             "volume": int(df["Volume"].sum()),
             "day_range": f"{float(df['Low'].min()):.2f} - {float(df['High'].max()):.2f}",
-            "data_points": data_points,
+            **series,
             "update_time": datetime.now(tz=UTC).strftime("%Y-%m-%d %H:%M:%S"),
             "price_52w_high": company_data.get("price_52w_high") if company_data else None,
             "price_52w_low": company_data.get("price_52w_low") if company_data else None,
@@ -512,43 +728,97 @@ class VWAPCalculationService:
             "stock_score": score_snapshot,
         }
 
+    @staticmethod
+    def get_historical_batch(symbols: list[str], days: int = 30, interval: str = "1d") -> dict:
+        """Historical frames for ``symbols`` fetched concurrently; failures map to the exception."""
+        return _run_async(VWAPCalculationService.aget_historical_batch, symbols, days, interval)
+
+    @staticmethod
+    async def aget_historical_batch(
+        symbols: list[str], days: int = 30, interval: str = "1d"
+    ) -> dict:
+        async def fetch(symbol: str) -> pd.DataFrame:
+            return await VWAPCalculationService._get_historical_async(symbol, days, interval, None)
+
+        return await _gather_bounded(symbols, fetch, limit=BATCH_CONCURRENCY)
+
+    @staticmethod
+    def get_intraday_batch(symbols: list[str], market: str = "CN") -> dict:
+        """Intraday 1m frames for ``symbols`` fetched concurrently; failures map to the exception."""
+        return _run_async(VWAPCalculationService.aget_intraday_batch, symbols, market)
+
+    @staticmethod
+    async def aget_intraday_batch(symbols: list[str], market: str = "CN") -> dict:
+        async def fetch(symbol: str) -> pd.DataFrame:
+            return await VWAPCalculationService._get_intraday_async(symbol, market)
+
+        return await _gather_bounded(symbols, fetch, limit=BATCH_CONCURRENCY)
+
+    @staticmethod
+    def format_batch_entry(
+        df: pd.DataFrame, kind: str, company_name: str, company_data: dict | None = None
+    ) -> dict:
+        """
+        Compact columnar entry for the batch endpoint: one list per field
+        instead of one dict per bar, plus the headline price summary.
+        """
+        if kind == "intraday":
+            df = VWAPCalculationService.calculate_vwap(df)
+            columns = INTRADAY_COLUMNS
+            fallback_previous = float(df["Open"].iloc[0])
+        else:
+            columns = HISTORICAL_COLUMNS
+            fallback_previous = float(df["Close"].iloc[-2] if len(df) > 1 else df["Close"].iloc[-1])
+
+        previous_close = fallback_previous
+        if company_data and company_data.get("previous_close"):
+            previous_close = float(company_data["previous_close"])
+        latest_close = float(df["Close"].iloc[-1])
+
+        return {
+            "company_name": company_name,
+            "previous_close": previous_close,
+            "latest_close": latest_close,
+            "change": latest_close - previous_close,
+            "change_pct": (latest_close - previous_close) / previous_close * 100
+            if previous_close != 0
+            else 0,
+            "points": len(df),
+            "columns": _columnar(df, columns),
+        }
+
     @staticmethod
     def format_historical_response(
-        df: pd.DataFrame, symbol: str, company_name: str, company_data: dict | None = None
+        df: pd.DataFrame,
+        symbol: str,
+        company_name: str,
+        company_data: dict | None = None,
+        *,
+        layout: str = "points",
+        max_points: int | None = None,
     ) -> dict:
         """
         Format historical data for API response
+
+        ``layout="columns"`` returns one list per field under ``columns``
+        instead of the per-bar ``data_points`` dicts. ``max_points`` caps the
+        series at that many bars (see ``stocks.downsample``) and adds its
+        length as ``points``; the summary fields are still computed from
+        every bar.
         """
         if df is None or df.empty:
             return {"success": False, "message": "No data available", "data": None}
 
-        data_points = []
-        for _, row in df.iterrows():
-            point = {
-                "date": row["Date_Str"],
-                "trading_day": int(row["Trading_Day"]),
-                "open": float(row["Open"]),
-                "high": float(row["High"]),
-                "low": float(row["Low"]),
-                "close": float(row["Close"]),
-                "volume": int(row["Volume"]),
+        chart_df = downsample.downsample_frame(df, max_points)
+        if layout == "columns":
+            series = {"columns": _columnar(chart_df, HISTORICAL_COLUMNS)}
+        else:
+            series = {
+                "data_points": _point_records(
+                    chart_df, HISTORICAL_COLUMNS, HISTORICAL_OPTIONAL_KEYS
+                )
             }
 
-            if pd.notna(row.get("MA5")):
-                point["ma5"] = float(row["MA5"])
-            if pd.notna(row.get("MA10")):
-                point["ma10"] = float(row["MA10"])
-            if pd.notna(row.get("OBV")):
-                point["obv"] = float(row["OBV"])
-            if pd.notna(row.get("OBV_MA5")):
-                point["obv_ma5"] = float(row["OBV_MA5"])
-            if pd.notna(row.get("OBV_MA10")):
-                point["obv_ma10"] = float(row["OBV_MA10"])
-            if pd.notna(row.get("CMF")):
-                point["cmf"] = float(row["CMF"])
-
-            data_points.append(point)
-
         latest = df.iloc[-1]
         prev = df.iloc[-2] if len(df) > 1 else latest
 
@@ -588,7 +858,9 @@ class VWAPCalculationService:
             "cmf": float(latest["CMF"]) if pd.notna(latest.get("CMF")) else 0,
             "obv": int(latest["OBV"]) if pd.notna(latest.get("OBV")) else 0,
             "trading_days": len(df),
-            "data_points": data_points,
+            # Only capped responses report their series length; the default payload is unchanged.
+            **({"points": len(chart_df)} if max_points is not None else {}),
+            **series,
             "price_52w_high": company_data.get("price_52w_high") if company_data else None,
             "price_52w_low": company_data.get("price_52w_low") if company_data else None,
             "last_trade_date": str(company_data.get("last_trade_date"))
@@ -0,0 +1,167 @@
+"""
+Single-Flight Request Coalescing
+Ensures only one upstream fetch per cache key is in flight at a time.
+
+Within a process, concurrent callers for the same key share one
+``concurrent.futures.Future`` (safe across threads and event loops). Across
+processes, the leader holds a short Redis lock while it loads and populates
+the cache; callers in other processes poll the cache until the value lands
+instead of issuing their own upstream request.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from typing import Any
+
+from observability import get_meter
+
+logger = logging.getLogger(__name__)
+
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_meter = get_meter(__name__)
+_calls_counter = _meter.create_counter(
+    name="stocks_singleflight_calls_total",
+    description="Single-flight outcomes for upstream stock data loads",
+    unit="1",
+)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent loads of the same key into one execution.
+
+    Outcomes recorded in ``stats()`` (and exported as the
+    ``stocks_singleflight_calls_total`` counter):
+        - ``executed``: this caller ran the loader
+        - ``coalesced_local``: waited on a loader running in this process
+        - ``coalesced_remote``: picked up a value loaded by another process
+        - ``lock_timeout``: gave up waiting on a remote leader and loaded itself
+    """
+
+    def __init__(
+        self,
+        name: str,
+        redis_client: Any = None,
+        *,
+        redis_factory: Callable[[], Any] | None = None,
+        lock_ttl: float = 30.0,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 0.1,
+    ):
+        self.name = name
+        self.redis_client = redis_client
+        self.redis_factory = redis_factory
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+
+    def _redis(self) -> Any:
+        """Explicit client, else one from ``redis_factory`` (e.g. per event loop)."""
+        if self.redis_client is not None or self.redis_factory is None:
+            return self.redis_client
+        return self.redis_factory()
+
+    def stats(self) -> dict[str, int]:
+        """Snapshot of per-outcome call counts since process start."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _record(self, outcome: str) -> None:
+        with self._lock:
+            self._stats[outcome] += 1
+        _calls_counter.add(1, {"flight": self.name, "outcome": outcome})
+
+    async def do(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        recheck: Callable[[], Awaitable[Any]] | None = None,
+    ) -> Any:
+        """
+        Return ``await loader()`` for ``key``, sharing the result with any
+        concurrent callers. ``recheck`` reads the cache and is used to pick up
+        values produced by a leader in another process.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            self._record("coalesced_local")
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await self._load_with_remote_lock(key, loader, recheck)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def _load_with_remote_lock(self, key, loader, recheck):
+        redis_client = self._redis()
+        if redis_client is None or recheck is None:
+            self._record("executed")
+            return await loader()
+
+        lock_key = f"singleflight:{self.name}:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis_client.set(
+                lock_key, token, nx=True, px=int(self.lock_ttl * 1000)
+            )
+        except Exception as exc:  # pragma: no cover - Redis outage
+            logger.debug("Single-flight lock unavailable for %s: %s", key, exc)
+            self._record("executed")
+            return await loader()
+
+        if acquired:
+            try:
+                self._record("executed")
+                return await loader()
+            finally:
+                try:
+                    await redis_client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                except Exception as exc:  # pragma: no cover
+                    logger.debug("Single-flight unlock failed for %s: %s", key, exc)
+
+        outcome = "lock_timeout"
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                lock_held = await redis_client.exists(lock_key)
+            except Exception:  # pragma: no cover
+                lock_held = False
+            value = await recheck()
+            if value is not None:
+                self._record("coalesced_remote")
+                return value
+            if not lock_held:
+                outcome = "executed"  # leader finished without populating the cache
+                break
+
+        self._record(outcome)
+        return await loader()
@@ -0,0 +1,15 @@
+"""
+Stock Cache
+The ``stocks`` cache alias used by the stock services, warmers and jobs.
+
+It is Redis whenever ``REDIS_URL`` or ``REDIS_HOST`` is configured (see
+``CACHES`` in settings), so cached frames, job locks and rotation cursors are
+shared by every web and Celery process. Other apps keep the default cache.
+"""
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+CACHE_ALIAS = "stocks"
+
+cache = ConnectionProxy(caches, CACHE_ALIAS)
@@ -0,0 +1,152 @@
+from celery import shared_task
+
+from observability import get_logger
+
+from . import locks, market_calendar, screener
+from .cache_warmer import archive_intraday, universe, warm_daily, warm_intraday
+from .correlation import compute_correlations
+from .scoring import run_scoring
+from .sector_index import update_sector_indices
+
+logger = get_logger(__name__)
+
+# Skip a run while the previous one still holds its lock (seconds).
+INTRADAY_LOCK_TIMEOUT = 60
+DAILY_LOCK_TIMEOUT = 15 * 60
+SCORING_LOCK_TIMEOUT = 40 * 60
+ARCHIVE_LOCK_TIMEOUT = 30 * 60
+SECTOR_LOCK_TIMEOUT = 20 * 60
+CORRELATION_LOCK_TIMEOUT = 20 * 60
+
+
+def _cache_reaches_web_workers() -> bool:
+    """Warming a per-process local-memory cache only fills the worker's own memory."""
+    if locks.cache_is_shared():
+        return True
+    logger.warning("Stock cache warm skipped: no shared cache (set REDIS_URL or REDIS_HOST)")
+    return False
+
+
+def _summarize(results: dict[str, bool]) -> dict:
+    warmed = sum(results.values())
+    return {"symbols": len(results), "warmed": warmed, "failed": len(results) - warmed}
+
+
+@shared_task(ignore_result=True, soft_time_limit=60, time_limit=90)
+def warm_intraday_caches():
+    """Refresh 1-minute intraday caches for the CSI300 universe during trading sessions."""
+    if not market_calendar.is_trading_session() or not _cache_reaches_web_workers():
+        return None
+    with locks.job_lock("stocks:warmer:intraday:lock", INTRADAY_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Intraday cache warm already running; skipping")
+            return None
+        summary = _summarize(warm_intraday(universe()))
+    logger.info("Intraday caches warmed", extra=summary)
+    return summary
+
+
+@shared_task(ignore_result=True, soft_time_limit=1800, time_limit=2400)
+def warm_daily_caches(after_close: bool = False):
+    """
+    Refresh daily bars and indicator caches for the CSI300 universe.
+
+    Args:
+        after_close: Post-close rebuild; runs outside the session and also
+                     rebuilds the weekly/monthly indicator frames.
+    """
+    if after_close:
+        if not market_calendar.is_trading_day(market_calendar.now().date()):
+            return None
+    elif not market_calendar.is_trading_session():
+        return None
+    with locks.job_lock("stocks:warmer:daily:lock", DAILY_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Daily cache warm already running; skipping")
+            return None
+        summary = _summarize(warm_daily(universe(), rebuild=after_close))
+    if after_close:
+        screener.refresh_snapshot()
+    logger.info("Daily caches warmed", extra={**summary, "after_close": after_close})
+    return summary
+
+
+@shared_task(ignore_result=True, soft_time_limit=1800, time_limit=2400)
+def archive_intraday_bars():
+    """Write the day's final 1-minute bars for the CSI300 universe to the intraday archive."""
+    if not market_calendar.is_trading_day(market_calendar.now().date()):
+        return None
+    with locks.job_lock("stocks:archive:intraday:lock", ARCHIVE_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Intraday archive already running; skipping")
+            return None
+        summary = _summarize(archive_intraday(universe()))
+    logger.info("Intraday bars archived", extra=summary)
+    return summary
+
+
+@shared_task(soft_time_limit=1800, time_limit=2400)
+def calculate_stock_scores(symbols: list[str] | None = None, after_close: bool = False):
+    """
+    Score the CSI300 universe (or ``symbols``) in-process and upsert ``StockScore``.
+
+    Progress is written to the day's ``ScoreCalculationLog`` after every batch.
+
+    Args:
+        symbols: Tickers to score; defaults to the CSI300 universe.
+        after_close: Scheduled daily run; skipped on non-trading days.
+    """
+    if after_close and not market_calendar.is_trading_day(market_calendar.now().date()):
+        return None
+    with locks.job_lock("stocks:scoring:lock", SCORING_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Score calculation already running; skipping")
+            return None
+        summary = run_scoring(symbols)
+    screener.refresh_snapshot()
+    logger.info(
+        "Stock scores calculated",
+        extra={key: summary[key] for key in ("total", "successful", "failed", "calculation_date")},
+    )
+    return {key: value for key, value in summary.items() if key != "symbols"}
+
+
+@shared_task(ignore_result=True, soft_time_limit=900, time_limit=1200)
+def compute_sector_indices(after_close: bool = False, rebuild: bool = False):
+    """
+    Recompute the trailing days of the sector indices from the daily bar store.
+
+    Args:
+        after_close: Scheduled daily run; skipped on non-trading days.
+        rebuild: Recompute the full history instead of only the trailing days.
+    """
+    if after_close and not market_calendar.is_trading_day(market_calendar.now().date()):
+        return None
+    with locks.job_lock("stocks:sectors:lock", SECTOR_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Sector index update already running; skipping")
+            return None
+        summaries = update_sector_indices(rebuild=rebuild)
+    for summary in summaries:
+        logger.info("Sector indices updated", extra=summary)
+    return summaries
+
+
+@shared_task(ignore_result=True, soft_time_limit=900, time_limit=1200)
+def compute_correlation_matrices(after_close: bool = False):
+    """
+    Recompute the universe return correlation matrices and betas for every window.
+
+    Args:
+        after_close: Scheduled daily run; skipped on non-trading days.
+    """
+    if after_close and not market_calendar.is_trading_day(market_calendar.now().date()):
+        return None
+    with locks.job_lock("stocks:correlations:lock", CORRELATION_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            logger.info("Correlation matrix update already running; skipping")
+            return None
+        summaries = compute_correlations()
+    for summary in summaries:
+        logger.info("Correlation matrix stored", extra=summary)
+    return summaries
@@ -0,0 +1,339 @@
+"""
+Upstream Call Guard
+Shared request budget, concurrency cap, timeouts and circuit breaking for
+calls to a third-party data source (AkShare).
+
+Every call takes a token from a token bucket shared by the whole process and,
+when Redis is available, by every process. It then runs on a bounded worker
+pool under a per-endpoint timeout that starts once a worker picks it up. A
+per-endpoint circuit breaker rejects calls outright after repeated network
+failures or timeouts until a probe succeeds, so callers fall back to stale
+data immediately instead of queueing behind a dead upstream.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any
+
+from opentelemetry.metrics import Observation
+
+from observability import get_meter
+
+try:  # Optional dependency for the cross-process budget
+    import redis  # type: ignore
+except ImportError:  # pragma: no cover - redis not installed
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Refill-and-take on a Redis hash using the server clock; returns the seconds
+# to wait before a token is available (0 when one was taken).
+_TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+_meter = get_meter(__name__)
+_calls_counter = _meter.create_counter(
+    name="stocks_upstream_calls_total",
+    description="Guarded upstream calls by endpoint and outcome",
+    unit="1",
+)
+_wait_histogram = _meter.create_histogram(
+    name="stocks_upstream_budget_wait_seconds",
+    description="Time spent waiting for the upstream rate budget",
+    unit="s",
+)
+_duration_histogram = _meter.create_histogram(
+    name="stocks_upstream_call_duration_seconds",
+    description="Upstream call duration",
+    unit="s",
+)
+_guards: list["UpstreamGuard"] = []
+
+
+def _observe_breakers(_options):
+    for guard in list(_guards):
+        for endpoint, breaker in guard.breakers().items():
+            yield Observation(
+                CircuitBreaker.STATE_VALUES[breaker.state],
+                {"upstream": guard.name, "endpoint": endpoint},
+            )
+
+
+_meter.create_observable_gauge(
+    name="stocks_upstream_breaker_state",
+    callbacks=[_observe_breakers],
+    description="Circuit breaker state (0=closed, 1=half_open, 2=open)",
+    unit="1",
+)
+
+
+class UpstreamUnavailableError(Exception):
+    """The call was rejected (open breaker, exhausted budget) or timed out."""
+
+
+class TokenBucket:
+    """In-process token bucket: ``rate`` tokens per second, up to ``burst`` saved."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        """Take a token if one is available; otherwise return the seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class RedisTokenBucket:
+    """Token bucket shared across processes; falls back to ``local`` if Redis fails."""
+
+    def __init__(self, client: Any, key: str, rate: float, burst: float, local: TokenBucket):
+        self.client = client
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.local = local
+
+    def take(self) -> float:
+        try:
+            return float(self.client.eval(_TAKE_TOKEN_SCRIPT, 1, self.key, self.rate, self.burst))
+        except Exception as exc:  # pragma: no cover - Redis outage
+            logger.debug("Shared rate budget unavailable (%s); using the local bucket", exc)
+            return self.local.take()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    ``closed`` passes calls; ``failure_threshold`` failures in a row open it.
+    After ``reset_timeout`` seconds one probe call is let through
+    (``half_open``): success closes the breaker, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release(self) -> None:
+        """Give back a half-open probe slot that was granted but not used."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class UpstreamGuard:
+    """
+    Runs upstream calls under a shared budget, a worker pool and per-endpoint breakers.
+
+    Outcomes recorded in ``stats()`` (and exported as the
+    ``stocks_upstream_calls_total`` counter):
+        - ``ok``: the call returned
+        - ``error``: the call raised
+        - ``timeout``: the call exceeded its endpoint timeout
+        - ``rejected_open``: short-circuited by an open breaker
+        - ``rejected_budget``: no token within ``max_wait`` seconds
+        - ``rejected_busy``: no free worker within ``max_wait`` seconds
+
+    Only timeouts and ``failure_exceptions`` (network errors by default)
+    count toward the breaker; other exceptions, such as a library rejecting
+    a bad symbol, say nothing about the upstream's health.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate: float,
+        burst: float,
+        max_workers: int,
+        max_wait: float,
+        timeouts: dict[str, float] | None = None,
+        default_timeout: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        failure_exceptions: tuple[type[BaseException], ...] = (OSError,),
+        redis_client: Any = None,
+    ):
+        self.name = name
+        self.failure_exceptions = failure_exceptions
+        self.max_wait = max_wait
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        local = TokenBucket(rate, burst)
+        self.bucket = (
+            RedisTokenBucket(redis_client, f"upstream:{name}:budget", rate, burst, local)
+            if redis_client is not None
+            else local
+        )
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+        _guards.append(self)
+
+    def breakers(self) -> dict[str, CircuitBreaker]:
+        with self._lock:
+            return dict(self._breakers)
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def stats(self) -> dict[str, int]:
+        """Snapshot of per-outcome call counts since process start."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _record(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            self._stats[outcome] += 1
+        _calls_counter.add(1, {"upstream": self.name, "endpoint": endpoint, "outcome": outcome})
+
+    def _acquire(self, endpoint: str) -> bool:
+        started = time.monotonic()
+        while True:
+            wait = self.bucket.take()
+            waited = time.monotonic() - started
+            if wait <= 0:
+                _wait_histogram.record(waited, {"upstream": self.name, "endpoint": endpoint})
+                return True
+            if waited + wait > self.max_wait:
+                return False
+            time.sleep(wait)
+
+    def call(self, endpoint: str, func: Callable[..., Any], /, *args, **kwargs) -> Any:
+        """
+        Run ``func(*args, **kwargs)`` as a call to ``endpoint``.
+
+        Raises ``UpstreamUnavailableError`` when the call is rejected or times out;
+        exceptions raised by ``func`` propagate unchanged.
+        """
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            self._record(endpoint, "rejected_open")
+            raise UpstreamUnavailableError(f"{self.name}.{endpoint}: circuit open")
+        if not self._acquire(endpoint):
+            breaker.release()
+            self._record(endpoint, "rejected_budget")
+            raise UpstreamUnavailableError(f"{self.name}.{endpoint}: rate budget exhausted")
+
+        running = threading.Event()
+
+        def run():
+            running.set()
+            return func(*args, **kwargs)
+
+        future = self._pool.submit(run)
+        # Time spent queued behind other calls is not the upstream's fault.
+        if not running.wait(self.max_wait) and future.cancel():
+            breaker.release()
+            self._record(endpoint, "rejected_busy")
+            raise UpstreamUnavailableError(f"{self.name}.{endpoint}: no free worker")
+
+        timeout = self.timeouts.get(endpoint, self.default_timeout)
+        started = time.monotonic()
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError as exc:
+            # The worker keeps running until the library returns; the caller moves on.
+            future.cancel()
+            breaker.record_failure()
+            self._record(endpoint, "timeout")
+            raise UpstreamUnavailableError(
+                f"{self.name}.{endpoint}: timed out after {timeout}s"
+            ) from exc
+        except Exception as exc:
+            if isinstance(exc, self.failure_exceptions):
+                breaker.record_failure()
+            else:
+                breaker.release()
+            self._record(endpoint, "error")
+            raise
+        finally:
+            _duration_histogram.record(
+                time.monotonic() - started, {"upstream": self.name, "endpoint": endpoint}
+            )
+        breaker.record_success()
+        self._record(endpoint, "ok")
+        return result
+
+
+def create_redis_client(url: str | None) -> Any:
+    """Synchronous Redis client for the shared budget, or None when unavailable."""
+    if redis is None or not url:
+        return None
+    return redis.Redis.from_url(url, socket_connect_timeout=1.5, socket_timeout=1.5)
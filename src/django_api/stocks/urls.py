@@ -1,6 +1,10 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+# ASGI 部署使用原生异步视图（STOCKS_ASYNC_VIEWS=true）
+chart_views = async_views if settings.STOCKS_ASYNC_VIEWS else views
 
 app_name = "stocks"
 
@@ -8,11 +12,21 @@ urlpatterns = [
     # Stock list endpoint - 读取数据库中的股票列表
     path("list/", views.stock_list, name="stock-list"),
     # Intraday data endpoint - 分时数据（1分钟K线）
-    path("intraday/", views.intraday_data, name="intraday-data"),
+    path("intraday/", chart_views.intraday_data, name="intraday-data"),
     # Historical data endpoint - 历史数据（日K线，带技术指标）
-    path("historical/", views.historical_data, name="historical-data"),
+    path("historical/", chart_views.historical_data, name="historical-data"),
+    # Batch endpoint - 多股票历史/分时数据（列式）
+    path("batch/", chart_views.batch_data, name="batch-data"),
     path("top-picks/", views.top_picks, name="top-picks"),
     path("top-picks-fast/", views.top_picks_with_sparklines, name="top-picks-fast"),
+    # Screener endpoint - 全市场横截面筛选
+    path("screener/", views.stock_screener, name="stock-screener"),
+    # Backtest endpoint - 评分信号回测
+    path("backtest/", views.stock_backtest, name="stock-backtest"),
+    # Sector index endpoint - 行业指数与市场宽度
+    path("sectors/", views.sector_indices, name="sector-indices"),
+    # Correlation endpoint - 收益相关性与Beta
+    path("correlations/", views.stock_correlations, name="stock-correlations"),
     path("score/generate/", views.generate_stock_score, name="generate-score"),
     path("score/generate-all/", views.generate_all_scores, name="generate-all-scores"),
     # Fund flow page - 资金流向页面
@@ -1,14 +1,8 @@
-import io
 import logging
-import subprocess
-import sys
-from contextlib import redirect_stdout
-from datetime import UTC, datetime
 from pathlib import Path
 
 import pandas as pd
 from csi300.models import CSI300Company
-from django.db.models import Max
 from django.views.decorators.csrf import csrf_exempt
 from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
 from rest_framework import serializers as drf_serializers
@@ -17,8 +11,19 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from . import (
+    backtest,
+    bar_store,
+    correlation,
+    downsample,
+    latest_scores,
+    scoring,
+    screener,
+    sector_index,
+)
 from .models import StockScore
-from .services import VWAPCalculationService
+from .services import BATCH_MAX_SYMBOLS, VWAPCalculationService
+from .tasks import calculate_stock_scores
 
 logger = logging.getLogger(__name__)
 
@@ -28,51 +33,107 @@ logger = logging.getLogger(__name__)
 _views_path = Path(__file__).resolve()
 PROJECT_ROOT = _views_path.parents[3] if len(_views_path.parents) > 3 else None
 
-# Only add to sys.path in local development
-if PROJECT_ROOT is not None and str(PROJECT_ROOT) not in sys.path:
-    sys.path.append(str(PROJECT_ROOT))
+SCREENER_DEFAULT_RESULTS = 50
+SCREENER_MAX_RESULTS = 300
+SECTOR_DEFAULT_DAYS = 250
+SECTOR_MAX_DAYS = 2500
+CORRELATION_DEFAULT_PEERS = 10
+CORRELATION_MAX_PEERS = 50
+ON_DEMAND_SYNC_TIMEOUT = 5.0  # seconds before a scoring request stops starting bar syncs
+
+
+def _sparkline_points(symbol: str, points: int = scoring.SPARKLINE_POINTS) -> list[dict]:
+    """Recent closes for a dashboard sparkline, read from the daily bar store."""
+    bars = bar_store.get_daily_bars(symbol, limit=points)
+    bars = bars.dropna(subset=["Close"])
+    return [
+        {"date": date_str, "close": float(close)}
+        for date_str, close in zip(bars["Date"].dt.strftime("%Y-%m-%d"), bars["Close"], strict=True)
+    ]
 
-# Scoring script is only available in local development (not in Docker)
-score_calculator = None
-if PROJECT_ROOT is not None:
-    try:  # pragma: no cover - optional dependency in Django runtime
-        from scripts.active import daily_score_calculator_db as score_calculator
-    except Exception as exc:  # pragma: no cover
-        logger.warning("Unable to import scoring script: %s", exc)
 
+def _score_sparkline(score: StockScore) -> list[dict]:
+    """The sparkline stored by the scoring run; read live only for rows scored without one."""
+    if len(score.sparkline or []) >= 2:
+        return score.sparkline
+    try:
+        points = _sparkline_points(score.ticker)
+    except Exception as exc:
+        logger.warning("Sparkline fetch failed for %s: %s", score.ticker, exc)
+        return []
+    return points if len(points) >= 2 else []
 
-def _run_scoring_subprocess(symbol: str):
-    """Fallback to running the scoring script via subprocess when import fails."""
-    if PROJECT_ROOT is None:
-        msg = "Scoring script not available in production environment"
-        raise RuntimeError(msg)
-    script_path = PROJECT_ROOT / "scripts" / "active" / "daily_score_calculator_db.py"
-    if not script_path.exists():
-        msg = f"Scoring script not found at {script_path}"
-        raise RuntimeError(msg)
-
-    cmd = [
-        sys.executable,
-        str(script_path),
-        "--symbol",
-        symbol,
-        "--batch-size",
-        "1",
-        "--fetch-workers",
-        "1",
-    ]
-    process = subprocess.run(cmd, check=False, capture_output=True, text=True, cwd=PROJECT_ROOT)
-    if process.returncode != 0:
-        raise RuntimeError(process.stderr or process.stdout or "Scoring process failed")
-    logs = process.stdout.splitlines()
-    summary = {
-        "total": 1,
-        "successful": 1,
-        "failed": 0,
-        "symbols": [symbol],
-        "calculation_date": datetime.now(tz=UTC).date().isoformat(),
+
+BATCH_COMPANY_FIELDS = ("ticker", "name", "previous_close", "price_local_currency")
+
+
+def company_price_data(company) -> dict:
+    """从数据库获取价格信息（intraday/historical 共用）"""
+    return {
+        "previous_close": company.previous_close,
+        "open": company.price_local_currency,
+        "price_52w_high": company.price_52w_high,
+        "price_52w_low": company.price_52w_low,
+        "last_trade_date": company.last_trade_date,
+    }
+
+
+def parse_batch_params(query_params) -> tuple[dict | None, str | None]:
+    """Validate batch query params; returns (params, error message)."""
+    raw_symbols = query_params.get("symbols") or ""
+    symbols = list(dict.fromkeys(s.strip() for s in raw_symbols.split(",") if s.strip()))
+    kind = (query_params.get("kind") or "historical").lower()
+    if not symbols:
+        return None, "Symbols parameter is required"
+    if len(symbols) > BATCH_MAX_SYMBOLS:
+        return None, f"At most {BATCH_MAX_SYMBOLS} symbols per request"
+    if kind not in ("historical", "intraday"):
+        return None, "kind must be historical or intraday"
+    try:
+        days = int(query_params.get("days", 30))
+    except ValueError:
+        return None, "days must be an integer"
+    return {
+        "symbols": symbols,
+        "kind": kind,
+        "days": days,
+        "interval": query_params.get("interval", "1d"),
+    }, None
+
+
+def build_batch_payload(params: dict, companies: dict, frames: dict) -> dict:
+    """Columnar batch response from resolved companies and fetched frames."""
+    kind = params["kind"]
+    errors = {
+        symbol: "Symbol not found in CSI300 database"
+        for symbol in params["symbols"]
+        if symbol not in companies
+    }
+    data = {}
+    for symbol, df in frames.items():
+        # gather(return_exceptions=True) also returns CancelledError, a BaseException
+        if isinstance(df, BaseException):
+            logger.warning("Batch %s fetch failed for %s: %r", kind, symbol, df)
+            errors[symbol] = str(df) or type(df).__name__
+            continue
+        if df is None or df.empty:
+            errors[symbol] = "No data available"
+            continue
+        company = companies[symbol]
+        data[symbol] = VWAPCalculationService.format_batch_entry(
+            df,
+            kind,
+            company.name,
+            {"previous_close": company.previous_close, "open": company.price_local_currency},
+        )
+    return {
+        "success": True,
+        "kind": kind,
+        "interval": "1m" if kind == "intraday" else params["interval"],
+        "count": len(data),
+        "data": data,
+        "errors": errors,
     }
-    return summary, logs
 
 
 @extend_schema(
@@ -125,7 +186,14 @@ def stock_list(request):
             location=OpenApiParameter.QUERY,
             description="Stock ticker symbol",
             required=True,
-        )
+        ),
+        OpenApiParameter(
+            name="layout",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="points (default) or columns for a compact array-of-columns payload",
+            required=False,
+        ),
     ],
     responses={
         200: inline_serializer(
@@ -137,6 +205,7 @@ def stock_list(request):
                 "data_points": drf_serializers.ListField(
                     child=drf_serializers.DictField(), required=False
                 ),
+                "columns": drf_serializers.DictField(required=False),
                 "previous_close": drf_serializers.FloatField(required=False),
                 "current_price": drf_serializers.FloatField(required=False),
                 "open_price": drf_serializers.FloatField(required=False),
@@ -152,6 +221,7 @@ def intraday_data(request):
     """获取分时数据（1分钟K线）"""
     try:
         symbol = request.query_params.get("symbol")
+        layout = request.query_params.get("layout", "points")  # columns: 列式紧凑格式
         if not symbol:
             return Response(
                 {"success": False, "error": "Symbol parameter is required"},
@@ -163,14 +233,7 @@ def intraday_data(request):
             company_name = company.name
             market = "CN"  # CSI300都是中国市场
 
-            # 从数据库获取价格信息
-            company_data = {
-                "previous_close": company.previous_close,
-                "open": company.price_local_currency,
-                "price_52w_high": company.price_52w_high,
-                "price_52w_low": company.price_52w_low,
-                "last_trade_date": company.last_trade_date,
-            }
+            company_data = company_price_data(company)
         except CSI300Company.DoesNotExist:
             return Response(
                 {"success": False, "error": f"Symbol {symbol} not found in CSI300 database"},
@@ -179,7 +242,7 @@ def intraday_data(request):
 
         df = VWAPCalculationService.get_intraday_data(symbol, market)
         result = VWAPCalculationService.format_intraday_response(
-            df, symbol, company_name, company_data
+            df, symbol, company_name, company_data, layout=layout
         )
 
         return Response(result)
@@ -221,6 +284,23 @@ def intraday_data(request):
             description="YFinance period",
             required=False,
         ),
+        OpenApiParameter(
+            name="layout",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="points (default) or columns for a compact array-of-columns payload",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="max_points",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Cap the series at this many points (min 3); candles are merged "
+                "preserving highs/lows, line series use LTTB"
+            ),
+            required=False,
+        ),
     ],
     responses={
         200: inline_serializer(
@@ -232,6 +312,7 @@ def intraday_data(request):
                 "data_points": drf_serializers.ListField(
                     child=drf_serializers.DictField(), required=False
                 ),
+                "columns": drf_serializers.DictField(required=False),
                 "previous_close": drf_serializers.FloatField(required=False),
                 "open_price": drf_serializers.FloatField(required=False),
                 "current_price": drf_serializers.FloatField(required=False),
@@ -241,6 +322,7 @@ def intraday_data(request):
                 "day_range": drf_serializers.CharField(required=False),
                 "volume": drf_serializers.IntegerField(required=False),
                 "trading_days": drf_serializers.IntegerField(required=False),
+                "points": drf_serializers.IntegerField(required=False),
                 "price_52w_high": drf_serializers.FloatField(required=False),
                 "price_52w_low": drf_serializers.FloatField(required=False),
                 "stock_score": drf_serializers.DictField(required=False),
@@ -258,6 +340,14 @@ def historical_data(request):
         days = int(request.query_params.get("days", 30))
         interval = request.query_params.get("interval", "1d")  # 默认日线
         period = request.query_params.get("period", None)  # 可选：直接指定yfinance period
+        layout = request.query_params.get("layout", "points")  # columns: 列式紧凑格式
+        try:
+            max_points = downsample.parse_max_points(request.query_params.get("max_points"))
+        except ValueError as exc:
+            return Response(
+                {"success": False, "error": f"Invalid max_points: {exc}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         if not symbol:
             return Response(
@@ -269,14 +359,7 @@ def historical_data(request):
             company = CSI300Company.objects.get(ticker=symbol)
             company_name = company.name
 
-            # 从数据库获取价格信息（与 intraday_data 保持一致）
-            company_data = {
-                "previous_close": company.previous_close,
-                "open": company.price_local_currency,
-                "price_52w_high": company.price_52w_high,
-                "price_52w_low": company.price_52w_low,
-                "last_trade_date": company.last_trade_date,
-            }
+            company_data = company_price_data(company)
         except CSI300Company.DoesNotExist:
             return Response(
                 {"success": False, "error": f"Symbol {symbol} not found in CSI300 database"},
@@ -288,7 +371,7 @@ def historical_data(request):
         )
         df = VWAPCalculationService.get_historical_data(symbol, days, interval, period)
         result = VWAPCalculationService.format_historical_response(
-            df, symbol, company_name, company_data
+            df, symbol, company_name, company_data, layout=layout, max_points=max_points
         )
 
         return Response(result)
@@ -300,6 +383,90 @@ def historical_data(request):
         )
 
 
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="symbols",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Comma-separated stock ticker symbols",
+            required=True,
+        ),
+        OpenApiParameter(
+            name="kind",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="historical (default) or intraday",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="days",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description="Number of days (historical only)",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="interval",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Data interval (historical only)",
+            required=False,
+        ),
+    ],
+    responses={
+        200: inline_serializer(
+            name="BatchStockDataResponse",
+            fields={
+                "success": drf_serializers.BooleanField(),
+                "kind": drf_serializers.CharField(required=False),
+                "interval": drf_serializers.CharField(required=False),
+                "count": drf_serializers.IntegerField(required=False),
+                "data": drf_serializers.DictField(
+                    child=drf_serializers.DictField(), required=False
+                ),
+                "errors": drf_serializers.DictField(
+                    child=drf_serializers.CharField(), required=False
+                ),
+                "error": drf_serializers.CharField(required=False),
+            },
+        )
+    },
+)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def batch_data(request):
+    """批量获取多只股票的历史/分时数据（列式返回，一次请求）"""
+    try:
+        params, error = parse_batch_params(request.query_params)
+        if error:
+            return Response({"success": False, "error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 一次查询解析所有公司
+        companies = {
+            company.ticker: company
+            for company in CSI300Company.objects.filter(ticker__in=params["symbols"]).only(
+                *BATCH_COMPANY_FIELDS
+            )
+        }
+        found = [symbol for symbol in params["symbols"] if symbol in companies]
+
+        if params["kind"] == "intraday":
+            frames = VWAPCalculationService.get_intraday_batch(found)
+        else:
+            frames = VWAPCalculationService.get_historical_batch(
+                found, params["days"], params["interval"]
+            )
+
+        return Response(build_batch_payload(params, companies, frames))
+
+    except Exception as e:
+        logger.exception("Error fetching batch stock data")
+        return Response(
+            {"success": False, "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @extend_schema(
     responses={
         200: inline_serializer(
@@ -343,6 +510,16 @@ def fund_flow_page(request):
             description="Chart type: intraday, cmf, obv",
             required=False,
         ),
+        OpenApiParameter(
+            name="max_points",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Cap the series at this many points (min 3); candles are merged "
+                "preserving highs/lows, line series use LTTB"
+            ),
+            required=False,
+        ),
     ],
     responses={
         200: inline_serializer(
@@ -371,6 +548,13 @@ def lightweight_chart(request):
     try:
         symbol = request.query_params.get("symbol")
         chart_type = request.query_params.get("type", "intraday")  # intraday, cmf, obv
+        try:
+            max_points = downsample.parse_max_points(request.query_params.get("max_points"))
+        except ValueError as exc:
+            return Response(
+                {"success": False, "error": f"Invalid max_points: {exc}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
         if not symbol:
             return Response(
@@ -439,7 +623,7 @@ def lightweight_chart(request):
             "symbol": symbol,
             "company_name": company_name,
             "chart_type": chart_type,
-            "data": df.to_dict("records"),
+            "data": downsample.downsample_frame(df, max_points).to_dict("records"),
             "message": "Chart data ready. Use TradingView Lightweight Charts JavaScript library on frontend.",
         }
 
@@ -505,68 +689,19 @@ def top_picks_with_sparklines(request):
         direction = (request.query_params.get("direction") or "buy").lower()
 
         # Get latest calculation date
-        latest_date = StockScore.objects.aggregate(latest=Max("calculation_date"))["latest"]
+        latest_date = latest_scores.latest_calculation_date()
 
         if not latest_date:
             return Response({"success": False, "error": "No score data available"})
 
         # Get scores
-        scores_qs = StockScore.objects.filter(calculation_date=latest_date)
+        scores_qs = StockScore.objects.current().filter(calculation_date=latest_date)
         if direction == "sell":
             scores_qs = scores_qs.order_by("total_score")[:limit]
         else:
             scores_qs = scores_qs.order_by("-total_score")[:limit]
 
         picks = []
-        symbols = [score.ticker for score in scores_qs]
-
-        # Batch fetch historical data for all symbols
-        sparklines = {}
-        for symbol in symbols:
-            try:
-                hist_data = VWAPCalculationService.get_historical_data(
-                    symbol=symbol, days=25, interval="1d", period=None
-                )
-
-                if hist_data is None or hist_data.empty:
-                    sparklines[symbol] = []
-                    continue
-
-                recent_rows = hist_data.tail(25)
-                sparkline_points = []
-
-                for _, row in recent_rows.iterrows():
-                    close_value = row.get("Close")
-                    if close_value is None or pd.isna(close_value):
-                        continue
-
-                    date_value = (
-                        row.get("Date_Str")
-                        or row.get("Timestamp")
-                        or row.get("Date")
-                        or row.get("date")
-                    )
-
-                    if isinstance(date_value, (int, float)):
-                        date_value = pd.to_datetime(date_value, errors="coerce")
-
-                    if hasattr(date_value, "strftime"):
-                        date_str = date_value.strftime("%Y-%m-%d")
-                    elif isinstance(date_value, str):
-                        date_str = date_value.split(" ")[0]
-                    else:
-                        continue
-
-                    try:
-                        sparkline_points.append({"date": date_str, "close": float(close_value)})
-                    except (TypeError, ValueError):
-                        continue
-
-                sparklines[symbol] = sparkline_points if len(sparkline_points) >= 2 else []
-            except Exception as e:
-                logger.warning(f"Failed to get sparkline for {symbol}: {e}")
-                sparklines[symbol] = []
-
         # Build response
         for score in scores_qs:
             pick = {
@@ -574,7 +709,7 @@ def top_picks_with_sparklines(request):
                 "name": score.company_name,
                 "total_score": float(score.total_score),
                 "last_close": float(score.last_close) if score.last_close else None,
-                "sparkline": sparklines.get(score.ticker, []),
+                "sparkline": _score_sparkline(score),
                 "last_trading_date": score.last_trading_date.isoformat()
                 if score.last_trading_date
                 else None,
@@ -636,12 +771,12 @@ def top_picks(request):
     except (TypeError, ValueError):
         limit = 5
 
-    latest_date = StockScore.objects.aggregate(latest=Max("calculation_date"))["latest"]
+    latest_date = latest_scores.latest_calculation_date()
     if not latest_date:
         return Response({"success": True, "calculation_date": None, "picks": []})
 
     direction = (request.query_params.get("direction") or "buy").lower()
-    scores_qs = StockScore.objects.filter(calculation_date=latest_date)
+    scores_qs = StockScore.objects.current().filter(calculation_date=latest_date)
     if direction == "sell":
         scores_qs = scores_qs.order_by("total_score")
     else:
@@ -649,26 +784,7 @@ def top_picks(request):
 
     picks = []
     for score in scores_qs[:limit]:
-        sparkline = []
-        try:
-            df = VWAPCalculationService.get_historical_data(score.ticker, 90, "1d")
-            if df is not None and not df.empty:
-                df_tail = df.tail(25)
-                sparkline = []
-                for _, row in df_tail.iterrows():
-                    close_value = row.get("Close") if hasattr(row, "get") else row["Close"]
-                    if close_value is None:
-                        continue
-                    date_value = None
-                    if hasattr(row, "get"):
-                        date_value = row.get("Date") or row.get("date") or row.get("Date_Str")
-                    else:
-                        date_value = row["Date"]
-                    if hasattr(date_value, "strftime"):
-                        date_value = date_value.strftime("%Y-%m-%d")
-                    sparkline.append({"date": date_value, "close": float(close_value)})
-        except Exception as exc:  # pragma: no cover - best-effort sparkline
-            logger.debug("Sparkline fetch failed for %s: %s", score.ticker, exc)
+        sparkline = _score_sparkline(score)
 
         picks.append(
             {
@@ -691,6 +807,376 @@ def top_picks(request):
     )
 
 
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="filter",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Conditions joined by 'and', e.g. 'CMF > 0.1 and Close > MA10'. "
+                "Any snapshot column works; append _pct for its cross-sectional percentile"
+            ),
+            required=False,
+        ),
+        OpenApiParameter(
+            name="sort",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Column to sort by (default: total_score)",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="order",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="desc (default) or asc",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="limit",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description=f"Number of results (max {SCREENER_MAX_RESULTS})",
+            required=False,
+        ),
+    ],
+    responses={
+        200: inline_serializer(
+            name="StockScreenerResponse",
+            fields={
+                "success": drf_serializers.BooleanField(),
+                "filter": drf_serializers.CharField(),
+                "as_of": drf_serializers.CharField(allow_null=True),
+                "universe": drf_serializers.IntegerField(),
+                "count": drf_serializers.IntegerField(),
+                "results": drf_serializers.ListField(child=drf_serializers.DictField()),
+                "columns": drf_serializers.ListField(
+                    child=drf_serializers.CharField(), required=False
+                ),
+                "error": drf_serializers.CharField(required=False),
+            },
+        )
+    },
+)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def stock_screener(request):
+    """Screen the CSI300 universe on the latest bar's indicators and scores."""
+    expression = request.query_params.get("filter", "")
+    sort = request.query_params.get("sort") or screener.DEFAULT_SORT
+    ascending = (request.query_params.get("order") or "desc").lower() == "asc"
+    try:
+        limit = int(request.query_params.get("limit", SCREENER_DEFAULT_RESULTS))
+        limit = max(1, min(limit, SCREENER_MAX_RESULTS))
+    except (TypeError, ValueError):
+        limit = SCREENER_DEFAULT_RESULTS
+
+    snapshot = screener.get_snapshot()
+    if snapshot.empty:
+        return Response(
+            {
+                "success": True,
+                "filter": expression,
+                "as_of": None,
+                "universe": 0,
+                "count": 0,
+                "results": [],
+            }
+        )
+
+    try:
+        matches, columns = screener.screen(snapshot, expression, sort=sort, ascending=ascending)
+    except screener.ScreenerError as exc:
+        return Response(
+            {"success": False, "error": str(exc), "columns": list(snapshot.columns[2:])},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return Response(
+        {
+            "success": True,
+            "filter": expression,
+            "as_of": snapshot["last_date"].max().date().isoformat(),
+            "universe": len(snapshot),
+            "count": len(matches),
+            "results": screener.to_records(matches.head(limit), columns),
+        }
+    )
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="start",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="First signal date, YYYY-MM-DD (default: one year before end)",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="end",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Last signal date, YYYY-MM-DD (default: today)",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="holding_days",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description=(
+                f"Maximum holding period in trading days "
+                f"(default {backtest.DEFAULT_HOLDING_DAYS}, max {backtest.MAX_HOLDING_DAYS})"
+            ),
+            required=False,
+        ),
+        OpenApiParameter(
+            name="min_score",
+            type=float,
+            location=OpenApiParameter.QUERY,
+            description=f"Minimum total_score to enter (default {scoring.BUY_THRESHOLD})",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="cost_bps",
+            type=float,
+            location=OpenApiParameter.QUERY,
+            description="Cost per side in basis points (default 0)",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="symbols",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Comma-separated tickers (default: every scored ticker)",
+            required=False,
+        ),
+    ],
+    responses={
+        200: inline_serializer(
+            name="StockBacktestResponse",
+            fields={
+                "success": drf_serializers.BooleanField(),
+                "params": drf_serializers.DictField(),
+                "summary": drf_serializers.DictField(),
+                "exit_reasons": drf_serializers.DictField(),
+                "equity": drf_serializers.DictField(),
+                "error": drf_serializers.CharField(required=False),
+            },
+        )
+    },
+)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def stock_backtest(request):
+    """Backtest stored score signals with T+1 entries and stop-loss/take-profit exits."""
+    try:
+        params = backtest.parse_params(request.query_params)
+    except backtest.BacktestError as exc:
+        return Response({"success": False, "error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"success": True, **backtest.get_backtest(params)})
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="grouping",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="im_sector (default) or industry",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="sector",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Sector name; omit for every sector's latest bar",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="days",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description=f"Bars of history for one sector (max {SECTOR_MAX_DAYS})",
+            required=False,
+        ),
+    ],
+    responses={
+        200: inline_serializer(
+            name="SectorIndicesResponse",
+            fields={
+                "success": drf_serializers.BooleanField(),
+                "grouping": drf_serializers.CharField(),
+                "as_of": drf_serializers.CharField(allow_null=True, required=False),
+                "sectors": drf_serializers.ListField(
+                    child=drf_serializers.DictField(), required=False
+                ),
+                "sector": drf_serializers.CharField(required=False),
+                "series": drf_serializers.DictField(required=False),
+                "error": drf_serializers.CharField(required=False),
+            },
+        )
+    },
+)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def sector_indices(request):
+    """Precomputed sector index levels and breadth (latest bar, or one sector's history)."""
+    grouping = request.query_params.get("grouping") or "im_sector"
+    if grouping not in sector_index.GROUPINGS:
+        return Response(
+            {"success": False, "error": "grouping must be im_sector or industry"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    sector = request.query_params.get("sector")
+    if not sector:
+        as_of, sectors = sector_index.latest_levels(grouping)
+        return Response(
+            {
+                "success": True,
+                "grouping": grouping,
+                "as_of": as_of.isoformat() if as_of else None,
+                "sectors": sectors,
+            }
+        )
+
+    try:
+        days = int(request.query_params.get("days", SECTOR_DEFAULT_DAYS))
+        days = max(1, min(days, SECTOR_MAX_DAYS))
+    except (TypeError, ValueError):
+        days = SECTOR_DEFAULT_DAYS
+    series = sector_index.load_series(grouping, sector, days)
+    if not series["dates"]:
+        return Response(
+            {"success": False, "error": f"No index data for {sector}"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return Response({"success": True, "grouping": grouping, "sector": sector, "series": series})
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name="symbol",
+            type=str,
+            location=OpenApiParameter.QUERY,
+            description="Stock symbol",
+            required=True,
+        ),
+        OpenApiParameter(
+            name="window",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description=(
+                f"Return window in trading days, one of {', '.join(map(str, correlation.WINDOWS))} "
+                f"(default {correlation.DEFAULT_WINDOW})"
+            ),
+            required=False,
+        ),
+        OpenApiParameter(
+            name="limit",
+            type=int,
+            location=OpenApiParameter.QUERY,
+            description=f"Peers per list (max {CORRELATION_MAX_PEERS})",
+            required=False,
+        ),
+    ],
+    responses={
+        200: inline_serializer(
+            name="StockCorrelationsResponse",
+            fields={
+                "success": drf_serializers.BooleanField(),
+                "symbol": drf_serializers.CharField(),
+                "window": drf_serializers.IntegerField(),
+                "as_of": drf_serializers.CharField(),
+                "exposures": drf_serializers.DictField(),
+                "most_correlated": drf_serializers.ListField(child=drf_serializers.DictField()),
+                "least_correlated": drf_serializers.ListField(child=drf_serializers.DictField()),
+                "error": drf_serializers.CharField(required=False),
+            },
+        )
+    },
+)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def stock_correlations(request):
+    """Return correlations with peers, plus betas against the universe and the sector index."""
+    symbol = request.query_params.get("symbol")
+    if not symbol:
+        return Response(
+            {"success": False, "error": "Symbol parameter is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        window = int(request.query_params.get("window", correlation.DEFAULT_WINDOW))
+    except (TypeError, ValueError):
+        window = 0
+    if window not in correlation.WINDOWS:
+        return Response(
+            {
+                "success": False,
+                "error": f"window must be one of {', '.join(map(str, correlation.WINDOWS))}",
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        limit = int(request.query_params.get("limit", CORRELATION_DEFAULT_PEERS))
+        limit = max(1, min(limit, CORRELATION_MAX_PEERS))
+    except (TypeError, ValueError):
+        limit = CORRELATION_DEFAULT_PEERS
+
+    # Other windows only contribute exposures; leave their packed triangles unloaded.
+    matrices = {
+        size: correlation.latest_matrix(size, exposures_only=size != window)
+        for size in correlation.WINDOWS
+    }
+    matrix = matrices[window]
+    peers = correlation.peer_correlations(matrix, symbol) if matrix is not None else None
+    if peers is None:
+        return Response(
+            {"success": False, "error": f"No correlation data for {symbol}"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    ranked = sorted(peers.items(), key=lambda item: item[1], reverse=True)
+    # With fewer than 2 * limit peers the most-correlated list keeps the overlap.
+    most = ranked[:limit]
+    least = ranked[max(limit, len(ranked) - limit) :][::-1]
+    names = dict(
+        CSI300Company.objects.filter(ticker__in=[ticker for ticker, _ in most + least]).values_list(
+            "ticker", "name"
+        )
+    )
+
+    def entries(items):
+        return [
+            {
+                "ticker": ticker,
+                "name": names.get(ticker, ""),
+                "correlation": value,
+                "sector": matrix.exposures.get(ticker, {}).get("sector"),
+            }
+            for ticker, value in items
+        ]
+
+    return Response(
+        {
+            "success": True,
+            "symbol": symbol,
+            "window": window,
+            "as_of": matrix.as_of.isoformat(),
+            "exposures": {
+                str(size): stored.exposures.get(symbol)
+                for size, stored in matrices.items()
+                if stored is not None and symbol in stored.exposures
+            },
+            "most_correlated": entries(most),
+            "least_correlated": entries(least),
+        }
+    )
+
+
 @extend_schema(
     request=inline_serializer(
         name="GenerateStockScoreRequest",
@@ -733,32 +1219,19 @@ def generate_stock_score(request):
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    logs = []
-    summary = None
-    if score_calculator is not None:
-        buffer = io.StringIO()
-        try:
-            with redirect_stdout(buffer):
-                summary = score_calculator.calculate_all_scores(
-                    batch_size=1,
-                    limit=1,
-                    fetch_workers=1,
-                    symbols=[symbol],
-                )
-        except Exception as exc:
-            logger.exception("On-demand scoring failed for %s", symbol)
-            return Response(
-                {"success": False, "error": str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-        logs = [line for line in buffer.getvalue().splitlines() if line.strip()]
-    else:
-        try:
-            summary, logs = _run_scoring_subprocess(symbol)
-        except Exception as exc:
-            logger.exception("Subprocess scoring failed for %s", symbol)
-            return Response(
-                {"success": False, "error": str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+    try:
+        summary = scoring.run_scoring(
+            [symbol], batch_size=1, sync_timeout=ON_DEMAND_SYNC_TIMEOUT, record_log=False
+        )
+    except Exception as exc:
+        logger.exception("On-demand scoring failed for %s", symbol)
+        return Response(
+            {"success": False, "error": str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    logs = [f"{ticker}: {error}" for ticker, error in summary["errors"].items()]
+    logs.append(
+        f"Scored {summary['successful']}/{summary['total']} for {summary['calculation_date']}"
+    )
 
     latest_score = VWAPCalculationService.get_latest_stock_score(symbol)
 
@@ -785,6 +1258,7 @@ def generate_stock_score(request):
                 "success": drf_serializers.BooleanField(),
                 "message": drf_serializers.CharField(required=False),
                 "status": drf_serializers.CharField(required=False),
+                "task_id": drf_serializers.CharField(required=False),
                 "estimated_time": drf_serializers.CharField(required=False),
                 "error": drf_serializers.CharField(required=False),
             },
@@ -794,71 +1268,21 @@ def generate_stock_score(request):
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def generate_all_scores(request):
-    """Trigger scoring calculation for all stocks."""
+    """Queue a scoring run for the whole CSI300 universe on the Celery workers."""
     try:
-        script_path = PROJECT_ROOT / "scripts" / "active" / "daily_score_calculator_db.py"
-        if not script_path.exists():
-            return Response(
-                {"success": False, "error": f"Scoring script not found at {script_path}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-        # Run the script with optimized parameters
-        cmd = [
-            sys.executable,
-            str(script_path),
-            "--batch-size",
-            "50",
-            "--fetch-workers",
-            "10",
-        ]
-
-        logger.info(f"Starting score generation: {' '.join(cmd)}")
-
-        # Run asynchronously in background (non-blocking)
-        import threading
-
-        def run_script():
-            try:
-                result = subprocess.run(
-                    cmd,
-                    check=False,
-                    cwd=PROJECT_ROOT,
-                    capture_output=True,
-                    text=True,
-                    timeout=600,  # 10 分钟超时
-                )
-
-                if result.returncode == 0:
-                    logger.info("✅ Score generation completed successfully")
-                    logger.info(f"Output: {result.stdout[-500:]}")  # 最后 500 字符
-                else:
-                    logger.error(f"❌ Score generation failed with code {result.returncode}")
-                    logger.error(f"Error: {result.stderr}")
-
-            except subprocess.TimeoutExpired:
-                logger.exception("❌ Score generation timeout after 10 minutes")
-            except Exception:
-                logger.exception("❌ Error running score generation")
-
-                logger.exception("Exception occurred")
-
-        thread = threading.Thread(target=run_script, daemon=True)
-        thread.start()
-
-        return Response(
-            {
-                "success": True,
-                "message": "Score generation started in background. Check server logs for progress.",
-                "status": "processing",
-                "estimated_time": "3-5 minutes for 250 stocks",
-            }
-        )
-
+        task = calculate_stock_scores.delay()
     except Exception as exc:
-        logger.exception("Error triggering score generation")
-
-        logger.exception("Exception occurred")
+        logger.exception("Error queueing score generation")
         return Response(
             {"success": False, "error": str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+    return Response(
+        {
+            "success": True,
+            "message": "Score generation queued. Progress is recorded in the calculation log.",
+            "status": "queued",
+            "task_id": task.id,
+            "estimated_time": "1-2 minutes for 300 stocks",
+        }
+    )
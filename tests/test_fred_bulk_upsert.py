@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+from fred_jp.data_fetcher import JapanFredDataFetcher
+from fred_jp.models import FredJpIndicator
+from fred_us.data_fetcher import UsFredDataFetcher
+from fred_us.models import FredUsIndicator
+
+from fred_common.bulk_upsert import BulkUpsertResult, bulk_upsert_observations
+
+DEFAULTS = {"indicator_name": "US Unemployment Rate", "indicator_type": "unemployment_rate"}
+
+
+@pytest.mark.django_db
+class TestBulkUpsertObservations:
+    def test_counts_inserts_updates_and_skips(self):
+        first = bulk_upsert_observations(
+            FredUsIndicator,
+            "UNRATE",
+            [
+                {"date": "2025-01-01", "value": "4.0"},
+                {"date": "2025-02-01", "value": "."},
+                {"date": "2025-03-01", "value": "4.2"},
+            ],
+            defaults=DEFAULTS,
+        )
+        assert first == BulkUpsertResult(inserted=2, updated=0, skipped=1)
+
+        second = bulk_upsert_observations(
+            FredUsIndicator,
+            "UNRATE",
+            [
+                {"date": "2025-03-01", "value": "4.1"},
+                {"date": "2025-04-01", "value": "4.3"},
+                {"date": "2025-05-01", "value": "4.4"},
+            ],
+            defaults=DEFAULTS,
+            chunk_size=2,
+        )
+        assert second == BulkUpsertResult(inserted=2, updated=1, skipped=0)
+
+        rows = FredUsIndicator.objects.filter(series_id="UNRATE")
+        assert rows.count() == 4
+        assert float(rows.get(date=date(2025, 3, 1)).value) == pytest.approx(4.1)
+
+    def test_fetchers_write_through_bulk_path(self, monkeypatch):
+        monkeypatch.setenv("FRED_API_KEY", "test")
+        observations = [{"date": "2025-01-01", "value": "1.5"}]
+
+        assert UsFredDataFetcher().save_observations("UNRATE", observations) == 1
+        assert UsFredDataFetcher().save_observations("UNRATE", observations) == 0
+        assert FredUsIndicator.objects.get(series_id="UNRATE").indicator_type == (
+            "unemployment_rate"
+        )
+
+        assert JapanFredDataFetcher().save_observations("JPNCCPIALLMINMEI", observations) == 1
+        row = FredJpIndicator.objects.get(series_id="JPNCCPIALLMINMEI")
+        assert row.indicator_type == "cpi"
+        assert row.unit == "Index"
@@ -0,0 +1,75 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from stocks import array_store, indicators
+
+
+def _bars(rows=5, start=10.0):
+    close = start + np.arange(rows, dtype=np.float64)
+    bars = pd.DataFrame(
+        {
+            "Date": pd.date_range("2024-01-02", periods=rows, freq="B"),
+            "Open": close - 0.5,
+            "High": close + 1.0,
+            "Low": close - 1.0,
+            "Close": close,
+            "Volume": np.arange(rows, dtype=np.int64) * 100,
+        }
+    )
+    frame = indicators.extend_indicator_frame(
+        None, indicators.IndicatorState(), bars.set_index("Date")
+    )
+    return frame.reset_index()
+
+
+def _is_mapped(array) -> bool:
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+class TestArrayStore:
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        bars = _bars()
+        assert array_store.write_symbol("600519", bars, root=tmp_path)
+
+        frame = array_store.read_symbol("600519", root=tmp_path)
+        pd.testing.assert_frame_equal(frame, bars[list(array_store.FIELDS)], check_dtype=False)
+        assert all(_is_mapped(frame[field].to_numpy()) for field in array_store.FIELDS)
+        assert array_store.read_symbol("600519", root=tmp_path) is frame
+
+    def test_rewrite_swaps_generation_and_keeps_open_readers_valid(self, tmp_path):
+        array_store.write_symbol("600519", _bars(), root=tmp_path)
+        old = array_store.read_symbol("600519", root=tmp_path)
+
+        array_store.write_symbol("600519", _bars(rows=6, start=20.0), root=tmp_path)
+        new = array_store.read_symbol("600519", root=tmp_path)
+
+        assert len(new) == 6
+        assert new["Close"].iat[0] == 20.0
+        assert old["Close"].iat[0] == 10.0
+        generations = [path.name for path in tmp_path.iterdir() if "@" in path.name]
+        assert len(generations) == 1
+
+    def test_rewrite_sweeps_orphaned_generations(self, tmp_path):
+        array_store.write_symbol("600519", _bars(), root=tmp_path)
+        stale = tmp_path / "600519@deadbeef0000"
+        in_progress = tmp_path / "600519@feedface0000"
+        stale.mkdir()
+        in_progress.mkdir()
+        old = time.time() - array_store.ORPHAN_GRACE_SECONDS - 1
+        os.utime(stale, (old, old))
+
+        array_store.write_symbol("600519", _bars(rows=6), root=tmp_path)
+
+        generations = {path.name for path in tmp_path.iterdir() if "@" in path.name}
+        assert generations == {in_progress.name, (tmp_path / "600519").readlink().name}
+
+    def test_missing_symbol_or_empty_bars(self, tmp_path):
+        assert array_store.read_symbol("000001", root=tmp_path) is None
+        assert array_store.written_at("000001", root=tmp_path) is None
+        assert not array_store.write_symbol("000001", _bars().iloc[:0], root=tmp_path)
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import pytest
+from stocks import async_bridge
+from stocks.async_bridge import AsyncBridge, LoopLocal
+
+
+class TestAsyncBridge:
+    def test_sync_calls_share_one_long_lived_loop(self):
+        bridge = AsyncBridge(name="test-bridge")
+
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        first = bridge.run(current_loop)
+        second = bridge.run(current_loop)
+
+        assert first is second
+        assert first.is_running()
+
+    def test_calls_from_many_threads(self):
+        bridge = AsyncBridge(name="test-bridge")
+        results = []
+
+        async def double(value):
+            await asyncio.sleep(0)
+            return value * 2
+
+        threads = [
+            threading.Thread(target=lambda v=v: results.append(bridge.run(double, v)))
+            for v in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(results) == [v * 2 for v in range(8)]
+
+    def test_refuses_to_block_its_own_loop(self):
+        bridge = AsyncBridge(name="test-bridge")
+
+        async def noop():
+            return None
+
+        async def reenter():
+            bridge.run(noop)
+
+        with pytest.raises(RuntimeError):
+            bridge.run(reenter)
+
+    def test_loop_local_values_are_per_loop(self):
+        created = []
+        local = LoopLocal(lambda: created.append(object()) or created[-1])
+        bridge = AsyncBridge(name="test-bridge")
+
+        async def get_twice():
+            return local.get(), local.get()
+
+        on_bridge = bridge.run(get_twice)
+        elsewhere = asyncio.run(get_twice())
+
+        assert on_bridge[0] is on_bridge[1]
+        assert elsewhere[0] is not on_bridge[0]
+        assert len(created) == 2
+
+    def test_run_db_closes_stale_connections_around_the_call(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(async_bridge, "close_old_connections", lambda: calls.append("close"))
+
+        def query(value):
+            calls.append(threading.current_thread().name)
+            return value + 1
+
+        bridge = AsyncBridge(name="test-bridge")
+        result = bridge.run(async_bridge.run_db, query, 1)
+
+        assert result == 2
+        assert calls[0] == calls[2] == "close"
+        assert calls[1] != "test-bridge"
@@ -0,0 +1,121 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from stocks import backtest
+from stocks.panel import build_panel
+
+DAYS = [date(2025, 6, 2) + timedelta(days=offset) for offset in range(6)]
+
+
+def _panel(bars_by_symbol):
+    rows = [
+        (symbol, DAYS[position], *bar, 1000)
+        for symbol, bars in sorted(bars_by_symbol.items())
+        for position, bar in enumerate(bars)
+    ]
+    return build_panel(rows, sorted(bars_by_symbol), bars=len(DAYS))
+
+
+def _signals(*signals):
+    return pd.DataFrame(
+        [
+            {
+                "ticker": ticker,
+                "signal_date": DAYS[day],
+                "weight": 0.1,
+                "stop_loss_price": stop,
+                "take_profit_price": take,
+            }
+            for ticker, day, stop, take in signals
+        ]
+    )
+
+
+FLAT = [(10.0, 10.5, 9.5, 10.0)] * 6  # open, high, low, close
+
+
+class TestSimulate:
+    def test_exits_on_take_profit_after_t_plus_one(self):
+        bars = list(FLAT)
+        bars[1] = (10.0, 10.5, 8.0, 10.0)  # entry bar: the stop cannot fire yet
+        bars[2] = (10.0, 12.5, 9.8, 12.0)
+        result = backtest.simulate(
+            _panel({"A": bars}), _signals(("A", 0, 9.0, 12.0)), holding_days=4
+        )
+
+        assert result["exit_reasons"] == {"stop_loss": 0, "take_profit": 1, "expired": 0, "open": 0}
+        assert result["summary"]["avg_trade_return"] == pytest.approx(0.2)
+        assert result["summary"]["avg_holding_days"] == 2
+        assert result["equity"]["strategy"][-1] == pytest.approx(1 + 0.1 / 4 * 0.2, rel=1e-3)
+
+    def test_stop_fills_first_and_at_gap_open(self):
+        both = list(FLAT)
+        both[2] = (10.0, 12.5, 8.5, 10.0)
+        gap = list(FLAT)
+        gap[2] = (8.0, 8.2, 7.5, 8.0)
+        result = backtest.simulate(
+            _panel({"A": both, "B": gap}),
+            _signals(("A", 0, 9.0, 12.0), ("B", 0, 9.0, 12.0)),
+            holding_days=4,
+        )
+
+        assert result["exit_reasons"]["stop_loss"] == 2
+        assert result["summary"]["avg_trade_return"] == pytest.approx((-0.1 - 0.2) / 2)
+
+    def test_expired_and_open_trades(self):
+        panel = _panel({"A": FLAT})
+        result = backtest.simulate(
+            panel, _signals(("A", 0, np.nan, np.nan), ("A", 3, 5.0, 20.0)), holding_days=3
+        )
+
+        assert result["exit_reasons"] == {"stop_loss": 0, "take_profit": 0, "expired": 1, "open": 1}
+        assert result["summary"]["trades"] == 2
+        assert result["equity"]["dates"][0] == "2025-06-02"
+
+    def test_new_sleeves_are_scaled_to_keep_gross_exposure_at_most_one(self):
+        signals = _signals(
+            *((ticker, 0, np.nan, np.nan) for ticker in "ABC"),
+            ("A", 1, np.nan, np.nan),
+            ("B", 2, np.nan, np.nan),
+        )
+        signals["weight"] = 1.0
+        result = backtest.simulate(_panel(dict.fromkeys("ABC", FLAT)), signals, holding_days=2)
+
+        # Day 1's three entries share one sleeve; later days each add one full sleeve.
+        assert result["equity"]["exposure"] == pytest.approx([0, 0.5, 1, 1, 0.5, 0])
+
+    def test_win_rate_counts_closed_trades_only(self):
+        rising = list(FLAT)
+        rising[5] = (10.0, 11.5, 9.5, 11.0)
+        result = backtest.simulate(
+            _panel({"A": FLAT, "B": rising}),
+            _signals(("A", 0, np.nan, np.nan), ("B", 3, np.nan, np.nan)),
+            holding_days=3,
+        )
+
+        assert result["exit_reasons"]["open"] == 1
+        assert result["summary"]["win_rate"] == 0.0
+
+    def test_signals_without_an_entry_bar_are_skipped(self):
+        result = backtest.simulate(
+            _panel({"A": FLAT}), _signals(("A", 5, 9.0, 12.0), ("Z", 0, 9.0, 12.0))
+        )
+
+        assert result["summary"]["signals"] == 2
+        assert result["summary"]["trades"] == 0
+
+
+class TestParams:
+    def test_parse_and_cache_key(self):
+        params = backtest.parse_params(
+            {"start": "2024-01-01", "end": "2024-12-31", "symbols": "B, A", "holding_days": "5"}
+        )
+
+        assert params.symbols == ("A", "B")
+        assert params.cache_key(date(2025, 1, 2)) != params.cache_key(date(2025, 1, 3))
+        with pytest.raises(backtest.BacktestError, match="holding_days"):
+            backtest.parse_params({"holding_days": "0"})
+        with pytest.raises(backtest.BacktestError, match="start"):
+            backtest.parse_params({"start": "2024-12-31", "end": "2024-01-01"})
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+from stocks import bar_store
+from stocks.models import DailyBar
+from stocks.stock_cache import cache
+
+
+def _bars(dates, close=10.0):
+    return pd.DataFrame(
+        {
+            "Date": pd.to_datetime(dates),
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": 1000,
+        }
+    )
+
+
+@pytest.mark.django_db
+class TestDailyBarStore:
+    SYMBOL = "600519.SS"
+
+    def test_sync_only_requests_bars_after_last_stored(self, monkeypatch):
+        today = bar_store.market_today()
+        history = [today - timedelta(days=offset) for offset in (3, 2, 1)]
+        bar_store.upsert_bars(self.SYMBOL, _bars(history))
+
+        requested = {}
+
+        def fake_daily(symbol, start, end):
+            requested["start"] = start.date()
+            return _bars([history[-1], today], close=11.0)
+
+        monkeypatch.setattr(bar_store, "get_daily_data", fake_daily)
+
+        assert bar_store.sync_symbol(self.SYMBOL) == 2
+        assert requested["start"] == history[-1]
+        assert DailyBar.objects.filter(ticker=self.SYMBOL).count() == 4
+        assert bar_store.is_current(self.SYMBOL)
+
+    def test_get_daily_bars_skips_upstream_when_current(self, monkeypatch):
+        today = bar_store.market_today()
+        bar_store.upsert_bars(self.SYMBOL, _bars([today - timedelta(days=1), today]))
+
+        def fail(*_args):
+            pytest.fail("store is current; AkShare must not be called")
+
+        monkeypatch.setattr(bar_store, "get_daily_data", fail)
+
+        bars = bar_store.get_daily_bars(self.SYMBOL, limit=1)
+
+        assert list(bars.columns) == bar_store.BAR_COLUMNS
+        assert bars["Date"].dt.date.tolist() == [today]
+        assert bars["Close"].dtype == "float64"
+
+    def test_stale_store_is_rechecked_at_most_once_per_window(self, monkeypatch):
+        cache.delete(f"stocks:bars:checked:{self.SYMBOL}")
+        stale = bar_store.market_today() - timedelta(days=30)
+        bar_store.upsert_bars(self.SYMBOL, _bars([stale]))
+        calls = []
+
+        def suspended(symbol, start, end):
+            calls.append(symbol)
+            return _bars([])
+
+        monkeypatch.setattr(bar_store, "get_daily_data", suspended)
+
+        for _ in range(3):
+            bars = bar_store.get_daily_bars(self.SYMBOL)
+
+        assert calls == [self.SYMBOL]
+        assert bars["Date"].dt.date.tolist() == [stale]
@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from csi300.models import CSI300Company
+from rest_framework.test import APIClient
+from stocks import services
+from stocks.services import VWAPCalculationService
+
+
+def _history(rows=5):
+    index = pd.date_range("2024-01-01", periods=rows, freq="B", name="Date")
+    close = np.linspace(10, 11, rows)
+    return pd.DataFrame(
+        {
+            "Timestamp": index,
+            "Open": close,
+            "High": close + 0.5,
+            "Low": close - 0.5,
+            "Close": close,
+            "Volume": np.arange(rows) * 100,
+            "MA5": [np.nan] * (rows - 1) + [close.mean()],
+            "Date_Str": index.strftime("%Y-%m-%d"),
+            "Trading_Day": range(1, rows + 1),
+        }
+    )
+
+
+def test_gather_bounded_limits_concurrency_and_captures_errors():
+    in_flight = 0
+    peak = 0
+
+    async def fetch(symbol):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if symbol == "bad":
+            raise ValueError("boom")
+        return symbol.upper()
+
+    symbols = ["a", "b", "c", "d", "bad"]
+    results = asyncio.run(services._gather_bounded(symbols, fetch, limit=2))
+
+    assert peak == 2
+    assert results["a"] == "A"
+    assert isinstance(results["bad"], ValueError)
+
+
+@pytest.mark.django_db
+class TestBatchDataAPI:
+    URL = "/api/stocks/batch/"
+
+    @pytest.fixture
+    def companies(self):
+        for ticker in ("600519.SS", "000001.SZ"):
+            CSI300Company.objects.create(
+                name=f"Company {ticker}", ticker=ticker, previous_close=10.0
+            )
+
+    def test_returns_columnar_payload_per_symbol(self, companies, monkeypatch):
+        requested = {}
+
+        def fake_batch(symbols, days, interval):
+            requested["symbols"] = symbols
+            return {"600519.SS": _history(), "000001.SZ": asyncio.CancelledError()}
+
+        monkeypatch.setattr(VWAPCalculationService, "get_historical_batch", fake_batch)
+
+        response = APIClient().get(self.URL, {"symbols": "600519.SS,000001.SZ,999999.SS"})
+        body = response.json()
+
+        assert response.status_code == 200
+        assert requested["symbols"] == ["600519.SS", "000001.SZ"]
+        entry = body["data"]["600519.SS"]
+        assert entry["columns"]["date"][0] == "2024-01-01"
+        assert entry["columns"]["ma5"][:4] == [None] * 4
+        assert entry["columns"]["volume"] == [0, 100, 200, 300, 400]
+        assert entry["latest_close"] == 11.0
+        assert set(body["errors"]) == {"000001.SZ", "999999.SS"}
+        assert body["errors"]["000001.SZ"] == "CancelledError"
+
+    def test_rejects_too_many_symbols(self):
+        symbols = ",".join(f"{n:06d}.SZ" for n in range(services.BATCH_MAX_SYMBOLS + 1))
+
+        response = APIClient().get(self.URL, {"symbols": symbols})
+
+        assert response.status_code == 400
+
+    def test_rejects_non_integer_days(self):
+        response = APIClient().get(self.URL, {"symbols": "600519.SS", "days": "abc"})
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "days must be an integer"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_batch_view_matches_columnar_payload(monkeypatch):
+    from django.test import RequestFactory
+    from stocks import async_views
+
+    CSI300Company.objects.create(name="Company", ticker="600519.SS", previous_close=10.0)
+
+    async def fake_batch(symbols, days, interval):
+        return dict.fromkeys(symbols, _history())
+
+    monkeypatch.setattr(VWAPCalculationService, "aget_historical_batch", fake_batch)
+    request = RequestFactory().get("/api/stocks/batch/", {"symbols": "600519.SS"})
+
+    response = asyncio.run(async_views.batch_data(request))
+    body = json.loads(response.content)
+
+    assert response.status_code == 200
+    assert body["data"]["600519.SS"]["columns"]["volume"] == [0, 100, 200, 300, 400]
+    assert body["errors"] == {}
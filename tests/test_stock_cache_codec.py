@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from stocks import cache_codec
+
+
+@pytest.fixture
+def display_frame():
+    timestamps = pd.date_range("2024-01-02 09:31", periods=50, freq="min")
+    close = np.linspace(10, 12, 50)
+    ma5 = pd.Series(close).rolling(5).mean().to_numpy()
+    return pd.DataFrame(
+        {
+            "Timestamp": timestamps,
+            "Open": close,
+            "Close": close,
+            "Volume": np.arange(50, dtype=np.int64) * 100,
+            "MA5": ma5,
+            "Date_Str": timestamps.strftime("%Y-%m-%d %H:%M:%S"),
+            "Trading_Day": range(1, 51),
+        }
+    )
+
+
+class TestCacheCodec:
+    @pytest.mark.parametrize("codec", [cache_codec.CODEC_NUMPY, cache_codec.CODEC_NUMPY_ZLIB])
+    def test_round_trip_preserves_dtypes(self, display_frame, codec):
+        payload = cache_codec.encode_dataframe(display_frame, codec=codec)
+
+        assert payload.startswith(cache_codec.MAGIC)
+        pd.testing.assert_frame_equal(cache_codec.decode_dataframe(payload), display_frame)
+
+    def test_round_trip_preserves_datetime_index(self, display_frame):
+        indexed = display_frame.set_index("Timestamp")
+        indexed.index = indexed.index.tz_localize("Asia/Shanghai")
+
+        decoded = cache_codec.decode_dataframe(cache_codec.encode_dataframe(indexed))
+
+        pd.testing.assert_frame_equal(decoded, indexed)
+
+    def test_decoded_columns_are_writable(self, display_frame):
+        decoded = cache_codec.decode_dataframe(cache_codec.encode_dataframe(display_frame))
+        decoded.loc[0, "Close"] = 99.0
+        assert decoded.loc[0, "Close"] == 99.0
+
+    def test_reads_legacy_json_payloads(self, display_frame):
+        legacy = display_frame.to_json(orient="split", date_format="epoch")
+
+        decoded = cache_codec.decode_dataframe(legacy)
+
+        assert pd.api.types.is_datetime64_any_dtype(decoded["Timestamp"])
+        np.testing.assert_allclose(decoded["Close"], display_frame["Close"])
+
+    def test_unsupported_frames_fall_back_to_json(self):
+        frame = pd.DataFrame({0: [1.0, 2.0]})
+
+        payload = cache_codec.encode_dataframe(frame)
+
+        assert not payload.startswith(cache_codec.MAGIC)
+        assert cache_codec.decode_dataframe(payload).iloc[:, 0].tolist() == [1.0, 2.0]
+
+    def test_corrupt_payload_raises_codec_error(self, display_frame):
+        payload = cache_codec.encode_dataframe(display_frame, codec=cache_codec.CODEC_NUMPY_ZLIB)
+
+        with pytest.raises(cache_codec.CacheCodecError, match="Corrupt"):
+            cache_codec.decode_dataframe(payload[:-8] + b"\x00" * 8)
@@ -0,0 +1,85 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+from stocks import cache_warmer, intraday_archive, market_calendar, services
+from stocks.stock_cache import cache
+
+
+class TestRotation:
+    def test_budget_rotates_through_universe(self):
+        cache.delete("stocks:warmer:test:cursor")
+        symbols = [f"S{i}" for i in range(5)]
+
+        batches = [cache_warmer.next_batch("test", symbols, 2) for _ in range(3)]
+
+        assert batches == [["S0", "S1"], ["S2", "S3"], ["S4", "S0"]]
+
+    def test_whole_universe_when_it_fits(self):
+        assert cache_warmer.next_batch("test", ["A", "B"], 5) == ["A", "B"]
+
+
+class TestPacing:
+    def test_failures_are_isolated_and_concurrency_is_bounded(self):
+        in_flight = 0
+        peak = 0
+
+        async def warm(symbol):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if symbol == "BAD":
+                raise RuntimeError("upstream down")
+            return True
+
+        results = asyncio.run(cache_warmer._paced(["A", "BAD", "B", "C"], warm, rate=1000, limit=2))
+
+        assert results == {"A": True, "BAD": False, "B": True, "C": True}
+        assert peak <= 2
+
+
+def test_archive_keeps_auction_and_zero_volume_minutes(tmp_path, monkeypatch):
+    today = market_calendar.now().date()
+    index = pd.to_datetime([f"{today} 09:25", f"{today} 09:31", f"{today} 15:00"])
+    raw = pd.DataFrame(
+        {"Open": 10.0, "High": 10.1, "Low": 9.9, "Close": 10.0, "Volume": [500, 0, 300]},
+        index=index,
+    )
+    monkeypatch.setattr(cache_warmer, "get_minute_data", lambda _symbol, _interval: raw)
+    monkeypatch.setattr(intraday_archive, "ARCHIVE_ROOT", tmp_path)
+
+    assert asyncio.run(cache_warmer._archive_intraday("600519.SS"))
+    archived = intraday_archive.read_day("600519.SS", today)
+    assert archived["Volume"].tolist() == [500, 0, 300]
+
+
+def test_daily_warm_publishes_indicator_frame_for_requests(tmp_path, settings, monkeypatch):
+    settings.STOCK_ARRAY_STORE_DIR = str(tmp_path)
+    cache.clear()
+    dates = pd.bdate_range(end=market_calendar.last_trading_day(), periods=30)
+    close = 10.0 + np.arange(len(dates), dtype=np.float64)
+    bars = pd.DataFrame(
+        {
+            "Date": dates,
+            "Open": close,
+            "High": close + 0.5,
+            "Low": close - 0.5,
+            "Close": close,
+            "Volume": np.full(len(dates), 1000, dtype=np.int64),
+        }
+    )
+
+    async def full_daily(_symbol, *, refresh=False):
+        return bars
+
+    monkeypatch.setattr(cache_warmer, "_get_full_daily_dataframe", full_daily)
+    assert asyncio.run(cache_warmer._warm_daily("600519.SS"))
+    cache.clear()
+
+    frame = asyncio.run(services._get_daily_indicator_frame("600519.SS"))
+
+    assert len(frame) == len(dates)
+    assert frame["MA5"].iat[-1] == close[-5:].mean()
+    assert not frame["CMF"].to_numpy().flags.writeable
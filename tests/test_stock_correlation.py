@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from csi300.models import Company
+from rest_framework.test import APIClient
+from stocks import bar_store, correlation
+from stocks.models import CorrelationMatrix
+
+
+class TestCorrelationMath:
+    def test_matrix_matches_corrcoef_and_packed_rows_round_trip(self):
+        returns = np.random.default_rng(0).normal(size=(120, 6))
+        matrix = correlation.correlation_matrix(returns)
+        np.testing.assert_allclose(matrix, np.corrcoef(returns.T), atol=1e-12)
+
+        packed = correlation.pack_upper(matrix)
+        assert packed.dtype == np.float32
+        assert len(packed) == 15
+        for position in range(6):
+            row = np.delete(matrix[position], position)
+            np.testing.assert_allclose(
+                packed[correlation.pair_offsets(position, 6)], row, atol=1e-6
+            )
+
+    def test_exposure_recovers_beta(self):
+        rng = np.random.default_rng(1)
+        market = rng.normal(0, 0.01, 250)
+        returns = np.column_stack([2 * market, -0.5 * market + rng.normal(0, 0.001, 250)])
+        corr, beta = correlation.exposure(returns, market)
+
+        assert beta == pytest.approx([2.0, -0.5], abs=0.02)
+        assert corr[0] == pytest.approx(1.0)
+
+    def test_thinly_traded_symbols_are_nan(self):
+        returns = np.random.default_rng(2).normal(size=(20, 3))
+        returns[:10, 2] = np.nan
+        matrix = correlation.correlation_matrix(returns)
+
+        assert np.isnan(matrix[2]).all()
+        assert not np.isnan(matrix[0, 1])
+
+
+@pytest.mark.django_db
+def test_nightly_job_and_peer_endpoint():
+    rng = np.random.default_rng(3)
+    today = bar_store.market_today()
+    dates = pd.to_datetime([today - timedelta(days=offset) for offset in range(89, -1, -1)])
+    base = rng.normal(0, 0.01, 90)
+    moves = {
+        "600519.SS": base,
+        "000858.SZ": base + rng.normal(0, 0.002, 90),
+        "600028.SS": rng.normal(0, 0.01, 90),
+    }
+    for ticker, move in moves.items():
+        Company.objects.create(
+            name=f"Company {ticker}", ticker=ticker, exchange="SSE", im_sector="Consumer"
+        )
+        close = 100 * np.cumprod(1 + move)
+        bar_store.upsert_bars(
+            ticker,
+            pd.DataFrame(
+                {"Date": dates, "Open": close, "High": close, "Low": close, "Close": close}
+            ).assign(Volume=1000),
+        )
+
+    summaries = correlation.compute_correlations(list(moves))
+    assert [summary["window"] for summary in summaries] == list(correlation.WINDOWS)
+    assert CorrelationMatrix.objects.count() == len(correlation.WINDOWS)
+
+    response = APIClient().get("/api/stocks/correlations/", {"symbol": "600519.SS", "limit": 1})
+    payload = response.json()
+    assert response.status_code == 200
+    assert payload["most_correlated"][0]["ticker"] == "000858.SZ"
+    assert payload["least_correlated"][0]["ticker"] == "600028.SS"
+    assert payload["exposures"]["60"]["sector"] == "Consumer"
+    assert payload["exposures"]["60"]["sector_corr"] > 0.5
+    # Two peers and limit=2: no ticker appears in both lists.
+    wide = APIClient().get("/api/stocks/correlations/", {"symbol": "600519.SS", "limit": 2}).json()
+    assert [row["ticker"] for row in wide["most_correlated"]] == ["000858.SZ", "600028.SS"]
+    assert wide["least_correlated"] == []
+
+    deferred = correlation.latest_matrix(correlation.WINDOWS[0], exposures_only=True)
+    assert deferred.get_deferred_fields() == {"upper_triangle"}
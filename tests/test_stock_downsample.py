@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from stocks import downsample
+from stocks.services import VWAPCalculationService
+
+
+def _bars(rows=1000):
+    index = pd.date_range("2020-01-01", periods=rows, freq="B")
+    close = 10 + np.sin(np.linspace(0, 20, rows))
+    df = pd.DataFrame(
+        {
+            "Timestamp": index,
+            "Open": close - 0.1,
+            "High": close + 0.2,
+            "Low": close - 0.2,
+            "Close": close,
+            "Volume": np.full(rows, 100, dtype=np.int64),
+            "MA5": pd.Series(close).rolling(5).mean().to_numpy(),
+            "Date_Str": index.strftime("%Y-%m-%d"),
+        }
+    )
+    df.loc[500, "High"] = 50.0  # one spike that must survive
+    return df
+
+
+class TestDownsample:
+    def test_ohlc_buckets_keep_extremes_and_align_indicators(self):
+        df = _bars()
+
+        result = downsample.downsample_frame(df, 100)
+
+        assert len(result) == 100
+        assert result["High"].max() == 50.0
+        assert result["Low"].min() == df["Low"].min()
+        assert result["Volume"].sum() == df["Volume"].sum()
+        assert result["Volume"].dtype == np.int64
+        assert result.iloc[0]["Open"] == df.iloc[0]["Open"]
+        last = result.iloc[-1]
+        assert (last["Close"], last["MA5"], last["Date_Str"]) == tuple(
+            df.iloc[-1][["Close", "MA5", "Date_Str"]]
+        )
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        y = np.zeros(1000)
+        y[123] = 10.0
+        y[777] = -10.0
+
+        kept = downsample.lttb_indices(y, 50)
+
+        assert len(kept) == 50
+        assert kept[0] == 0
+        assert kept[-1] == 999
+        assert np.all(np.diff(kept) > 0)
+        assert {123, 777} <= set(kept.tolist())
+
+    def test_line_frames_use_lttb_rows(self):
+        df = _bars()[["Timestamp", "Close", "MA5"]]
+
+        result = downsample.downsample_frame(df, 60)
+
+        assert len(result) == 60
+        pd.testing.assert_frame_equal(result, df.loc[result.index])
+
+    def test_small_frames_are_untouched(self):
+        df = _bars(20)
+        assert downsample.downsample_frame(df, 50) is df
+        assert downsample.downsample_frame(df, None) is df
+
+    @pytest.mark.parametrize(("value", "expected"), [(None, None), ("", None), ("300", 300)])
+    def test_parse_max_points(self, value, expected):
+        assert downsample.parse_max_points(value) == expected
+
+    @pytest.mark.parametrize(
+        ("value", "message"), [("2", "at least 3"), ("abc", "invalid literal")]
+    )
+    def test_parse_max_points_rejects(self, value, message):
+        with pytest.raises(ValueError, match=message):
+            downsample.parse_max_points(value)
+
+
+def test_historical_response_caps_series_but_not_summary(monkeypatch):
+    monkeypatch.setattr(VWAPCalculationService, "get_latest_stock_score", lambda _symbol: None)
+    df = _bars()
+
+    result = VWAPCalculationService.format_historical_response(
+        df, "600519.SS", "Moutai", layout="columns", max_points=200
+    )
+
+    assert result["trading_days"] == 1000
+    assert result["points"] == 200
+    assert len(result["columns"]["close"]) == 200
+    assert result["volume"] == 100 * 1000
+    assert result["day_range"].endswith("50.00")
+    uncapped = VWAPCalculationService.format_historical_response(
+        df, "600519.SS", "Moutai", layout="columns"
+    )
+    assert "points" not in uncapped
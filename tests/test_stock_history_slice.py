@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from stocks import indicators
+from stocks.services import _display_slice
+
+
+def test_display_slice_shares_cached_columns():
+    index = pd.date_range("2024-01-01", periods=100, freq="B", name="Date")
+    close = np.linspace(10, 20, 100)
+    bars = pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000},
+        index=index,
+    )
+    frame = indicators.apply_indicators(bars)
+
+    display = _display_slice(frame, 30, "%Y-%m-%d")
+
+    assert len(display) == 30
+    assert display["Timestamp"].iloc[0] == index[70]
+    assert display["Date_Str"].iloc[-1] == index[-1].strftime("%Y-%m-%d")
+    assert display["Trading_Day"].tolist() == list(range(1, 31))
+    assert np.shares_memory(display["CMF"].to_numpy(), frame["CMF"].to_numpy())
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+from stocks import indicators
+
+
+def _reference_indicators(df):
+    """Row-by-row pandas implementation the vectorized engine replaces."""
+    df = df.copy()
+    for period in (5, 10):
+        df[f"MA{period}"] = df["Close"].rolling(window=period).mean()
+
+    obv = [0.0]
+    for i in range(1, len(df)):
+        if df["Close"].iloc[i] > df["Close"].iloc[i - 1]:
+            obv.append(obv[-1] + df["Volume"].iloc[i])
+        elif df["Close"].iloc[i] < df["Close"].iloc[i - 1]:
+            obv.append(obv[-1] - df["Volume"].iloc[i])
+        else:
+            obv.append(obv[-1])
+    df["OBV"] = obv
+    df["OBV_MA5"] = df["OBV"].rolling(window=5).mean()
+    df["OBV_MA10"] = df["OBV"].rolling(window=10).mean()
+
+    multiplier = ((df["Close"] - df["Low"]) - (df["High"] - df["Close"])) / (df["High"] - df["Low"])
+    multiplier[df["High"] == df["Low"]] = 0
+    mf_volume = multiplier * df["Volume"]
+    df["CMF"] = mf_volume.rolling(window=21).sum() / df["Volume"].rolling(window=21).sum()
+    return df
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(42)
+    size = 300
+    close = 100 + rng.standard_normal(size).cumsum()
+    high = close + rng.random(size)
+    low = close - rng.random(size)
+    # Flat bars and unchanged closes exercise the zero-spread and carry-forward branches.
+    high[10] = low[10] = close[10]
+    close[20] = close[19]
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": high,
+            "Low": low,
+            "Close": close,
+            "Volume": rng.integers(1_000, 1_000_000, size),
+        },
+        index=pd.date_range("2020-01-01", periods=size, freq="B"),
+    )
+
+
+class TestIndicatorEngine:
+    COLUMNS = ("MA5", "MA10", "OBV", "OBV_MA5", "OBV_MA10", "CMF")
+
+    def test_matches_reference_implementation(self, bars):
+        expected = _reference_indicators(bars)
+        result = indicators.apply_indicators(bars)
+
+        for column in self.COLUMNS:
+            np.testing.assert_allclose(
+                result[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9, equal_nan=True
+            )
+
+    def test_does_not_mutate_input(self, bars):
+        original_columns = list(bars.columns)
+        indicators.apply_indicators(bars)
+        assert list(bars.columns) == original_columns
+
+    def test_panel_columns_match_single_symbol(self, bars):
+        shifted = bars * 1.5
+        panel = indicators.compute_indicators(
+            np.column_stack([bars["High"], shifted["High"]]),
+            np.column_stack([bars["Low"], shifted["Low"]]),
+            np.column_stack([bars["Close"], shifted["Close"]]),
+            np.column_stack([bars["Volume"], shifted["Volume"]]),
+        )
+        single = indicators.compute_indicators(
+            shifted["High"], shifted["Low"], shifted["Close"], shifted["Volume"]
+        )
+
+        for column in self.COLUMNS:
+            np.testing.assert_allclose(panel[column][:, 1], single[column], equal_nan=True)
+
+    def test_short_series_yields_nan_windows(self, bars):
+        result = indicators.apply_indicators(bars.head(4))
+        assert result["MA5"].isna().all()
+        assert result["CMF"].isna().all()
+        assert result["OBV"].iloc[0] == 0
+
+
+class TestIncrementalIndicatorState:
+    def test_incremental_matches_full_recompute(self, bars):
+        expected = indicators.apply_indicators(bars)
+
+        state = indicators.IndicatorState()
+        frame = None
+        for start, stop in ((0, 150), (150, 151), (151, 152), (152, 230), (230, len(bars))):
+            frame = indicators.extend_indicator_frame(frame, state, bars.iloc[:stop])
+            assert len(frame) == stop, f"chunk {start}:{stop}"
+
+        for column in TestIndicatorEngine.COLUMNS:
+            np.testing.assert_array_equal(frame[column].to_numpy(), expected[column].to_numpy())
+        assert state.bars == len(bars)
+        assert state.last_timestamp == bars.index[-1]
+
+    def test_state_round_trips_through_dict(self, bars):
+        state = indicators.IndicatorState()
+        state.advance(bars.iloc[:200])
+
+        restored = indicators.IndicatorState.from_dict(state.to_dict())
+        tail = bars.iloc[200:]
+        np.testing.assert_array_equal(
+            restored.advance(tail)["CMF"], indicators.apply_indicators(bars)["CMF"].iloc[200:]
+        )
+
+    def test_restated_history_cannot_be_extended(self, bars):
+        state = indicators.IndicatorState()
+        state.advance(bars.iloc[:100])
+
+        restated = bars.copy()
+        restated.iloc[99, restated.columns.get_loc("Close")] += 1
+        assert state.can_extend(bars)
+        assert not state.can_extend(restated)
@@ -0,0 +1,65 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from stocks import intraday_archive
+
+
+def _session(day: str, seed: int = 0):
+    morning = pd.date_range(f"{day} 09:30", f"{day} 11:30", freq="1min")
+    afternoon = pd.date_range(f"{day} 13:01", f"{day} 15:00", freq="1min")
+    index = morning.append(afternoon)
+    rng = np.random.default_rng(seed)
+    close = np.round(12.34 + np.cumsum(rng.integers(-3, 4, len(index))) * 0.01, 2)
+    return pd.DataFrame(
+        {
+            "Open": np.round(close + rng.integers(-2, 3, len(index)) * 0.01, 2),
+            "High": close + 0.03,
+            "Low": close - 0.02,
+            "Close": close,
+            "Volume": rng.integers(100, 500_000, len(index)),
+        },
+        index=index,
+    )
+
+
+class TestIntradayArchive:
+    def test_day_round_trips_exactly_and_compactly(self, tmp_path):
+        bars = _session("2024-05-06")
+        assert intraday_archive.write_day("600519", bars, root=tmp_path) == date(2024, 5, 6)
+
+        restored = intraday_archive.read_day("600519", date(2024, 5, 6), root=tmp_path)
+        pd.testing.assert_frame_equal(
+            restored, bars, check_names=False, check_freq=False, check_index_type=False
+        )
+        block = tmp_path / "600519" / "2024" / "20240506.bars"
+        assert block.stat().st_size < 4096
+
+    def test_write_keeps_only_the_last_day(self, tmp_path):
+        bars = pd.concat([_session("2024-05-06"), _session("2024-05-07", seed=1)])
+        intraday_archive.write_day("600519", bars, root=tmp_path)
+
+        assert intraday_archive.archived_days("600519", root=tmp_path) == [date(2024, 5, 7)]
+
+    def test_load_range_returns_last_n_days_up_to_end(self, tmp_path):
+        days = ["2024-05-06", "2024-05-07", "2024-05-08", "2024-05-09"]
+        for seed, day in enumerate(days):
+            intraday_archive.write_day("000001", _session(day, seed), root=tmp_path)
+
+        frame = intraday_archive.load_range("000001", 2, end=date(2024, 5, 8), root=tmp_path)
+        assert sorted(set(frame.index.date)) == [date(2024, 5, 7), date(2024, 5, 8)]
+        assert frame.index.is_monotonic_increasing
+        assert list(frame.columns) == intraday_archive.BAR_COLUMNS
+
+        assert intraday_archive.load_range("300750", 5, root=tmp_path).empty
+
+    def test_failed_encode_leaves_no_temp_file(self, tmp_path, monkeypatch):
+        def broken(_bars):
+            raise ValueError("cannot encode")
+
+        monkeypatch.setattr(intraday_archive, "encode_day", broken)
+
+        with pytest.raises(ValueError, match="cannot encode"):
+            intraday_archive.write_day("600519", _session("2024-05-06"), root=tmp_path)
+        assert not list(tmp_path.rglob("*.tmp"))
@@ -0,0 +1,96 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from django.contrib import admin
+from stocks import latest_scores, scoring
+from stocks.admin import StockScoreAdmin
+from stocks.models import LEGACY_SCORE_VERSION, LatestStockScore, StockScore
+from stocks.services import VWAPCalculationService
+from stocks.stock_cache import cache
+
+SYMBOL = "600519.SS"
+
+
+def _score(day, total, ticker=SYMBOL):
+    return StockScore(
+        calculation_date=day,
+        ticker=ticker,
+        company_name="Kweichow Moutai",
+        total_score=total,
+        recommended_action="Buy" if total > 0 else "Sell",
+        last_close=1500,
+    )
+
+
+@pytest.mark.django_db
+class TestLatestScores:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        cache.clear()
+
+    def test_upsert_keeps_the_newest_score_projected(self, django_assert_num_queries):
+        scoring.upsert_scores([_score(date(2025, 6, 4), 30)])
+        scoring.upsert_scores([_score(date(2025, 6, 3), -40)])  # backfill of an older day
+
+        with django_assert_num_queries(1):
+            snapshot = VWAPCalculationService.get_latest_stock_score(SYMBOL)
+
+        assert snapshot["calculation_date"] == "2025-06-04"
+        assert snapshot["total_score"] == 30.0
+        assert snapshot["last_close"] == 1500.0
+        assert StockScore.objects.count() == 2
+
+    def test_scores_without_a_projection_are_read_once_then_projected(self):
+        StockScore.objects.bulk_create([_score(date(2025, 6, 3), 10), _score(date(2025, 6, 4), 20)])
+
+        assert latest_scores.get(SYMBOL)["total_score"] == 20.0
+        assert LatestStockScore.objects.get(pk=SYMBOL).calculation_date == date(2025, 6, 4)
+        assert latest_scores.get("000001.SZ") is None
+
+    def test_latest_calculation_date_is_cached(self, django_assert_num_queries):
+        StockScore.objects.bulk_create([_score(date(2025, 6, 3), 10)])
+
+        assert latest_scores.latest_calculation_date() == date(2025, 6, 3)
+        with django_assert_num_queries(0):
+            assert latest_scores.latest_calculation_date() == date(2025, 6, 3)
+
+        scoring.upsert_scores([_score(date(2025, 6, 4), 10, ticker="000001.SZ")])
+        with django_assert_num_queries(0):
+            assert latest_scores.latest_calculation_date() == date(2025, 6, 4)
+
+    def test_admin_deletes_reproject_the_next_newest_score(self):
+        scoring.upsert_scores([_score(date(2025, 6, 3), 10), _score(date(2025, 6, 4), 20)])
+        model_admin = StockScoreAdmin(StockScore, admin.site)
+
+        model_admin.delete_model(None, StockScore.objects.get(calculation_date=date(2025, 6, 4)))
+        assert latest_scores.get(SYMBOL)["total_score"] == 10.0
+        assert latest_scores.latest_calculation_date() == date(2025, 6, 3)
+
+        model_admin.delete_queryset(None, StockScore.objects.all())
+        assert not LatestStockScore.objects.exists()
+        assert latest_scores.get(SYMBOL) is None
+
+    def test_admin_edits_reproject_old_and_new_ticker(self):
+        scoring.upsert_scores([_score(date(2025, 6, 3), 10), _score(date(2025, 6, 4), 20)])
+        model_admin = StockScoreAdmin(StockScore, admin.site)
+
+        edited = StockScore.objects.get(calculation_date=date(2025, 6, 4))
+        edited.calculation_date = date(2025, 6, 2)
+        model_admin.save_model(None, edited, SimpleNamespace(initial={"ticker": SYMBOL}), True)
+        assert latest_scores.get(SYMBOL)["total_score"] == 10.0
+
+        moved = StockScore.objects.get(calculation_date=date(2025, 6, 3))
+        moved.ticker = "000001.SZ"
+        model_admin.save_model(None, moved, SimpleNamespace(initial={"ticker": SYMBOL}), True)
+        assert latest_scores.get(SYMBOL)["calculation_date"] == "2025-06-02"
+        assert latest_scores.get("000001.SZ")["calculation_date"] == "2025-06-03"
+
+    def test_legacy_version_scores_are_never_read(self):
+        legacy = _score(date(2025, 6, 5), 90)
+        legacy.score_version = LEGACY_SCORE_VERSION
+        StockScore.objects.bulk_create([_score(date(2025, 6, 4), 20), legacy])
+
+        assert latest_scores.get(SYMBOL)["total_score"] == 20.0
+        assert latest_scores.latest_calculation_date() == date(2025, 6, 4)
+        assert latest_scores.record([legacy]) == 0
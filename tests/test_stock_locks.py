@@ -0,0 +1,32 @@
+from stocks import locks
+from stocks.stock_cache import cache
+
+
+class TestJobLock:
+    def test_excludes_concurrent_runs_and_releases(self):
+        cache.delete("stocks:test:lock")
+
+        with (
+            locks.job_lock("stocks:test:lock", 60) as first,
+            locks.job_lock("stocks:test:lock", 60) as second,
+        ):
+            assert first
+            assert not second
+        with locks.job_lock("stocks:test:lock", 60) as again:
+            assert again
+
+    def test_does_not_release_a_lock_taken_by_another_run(self):
+        cache.delete("stocks:test:lock")
+
+        with locks.job_lock("stocks:test:lock", 60):
+            # Our lock expired and another run took it.
+            cache.set("stocks:test:lock", "other", timeout=60)
+
+        assert cache.get("stocks:test:lock") == "other"
+        cache.delete("stocks:test:lock")
+
+
+def test_advance_cursor_returns_previous_position():
+    cache.delete("stocks:test:cursor")
+
+    assert [locks.advance_cursor("stocks:test:cursor", 3) for _ in range(3)] == [0, 3, 6]
@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+from django.utils import timezone
+from stocks import bar_store, market_calendar
+from stocks.market_calendar import MARKET_TZ
+
+
+def _market(*args):
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+def _bar(day):
+    return pd.DataFrame(
+        {
+            "Date": [pd.Timestamp(day)],
+            "Open": 10.0,
+            "High": 11.0,
+            "Low": 9.0,
+            "Close": 10.0,
+            "Volume": 1000,
+        }
+    )
+
+
+class TestSessions:
+    @pytest.mark.parametrize(
+        ("moment", "expected"),
+        [
+            (_market(2025, 6, 3, 9, 14), False),
+            (_market(2025, 6, 3, 9, 15), True),
+            (_market(2025, 6, 3, 11, 30), True),
+            (_market(2025, 6, 3, 12, 0), False),
+            (_market(2025, 6, 3, 14, 59), True),
+            (_market(2025, 6, 3, 15, 1), False),
+            (_market(2025, 6, 7, 10, 0), False),  # Saturday
+            (_market(2025, 10, 6, 10, 0), False),  # National Day holiday
+        ],
+    )
+    def test_is_trading_session(self, moment, expected):
+        assert market_calendar.is_trading_session(moment) is expected
+
+    def test_next_open_skips_weekend_and_holidays(self):
+        # Friday 2025-09-30 after the close -> next open after the Oct 1-8 closure.
+        assert market_calendar.next_open(_market(2025, 9, 30, 16, 0)) == _market(2025, 10, 9, 9, 15)
+        assert market_calendar.next_open(_market(2025, 6, 3, 12, 0)) == _market(2025, 6, 3, 13, 0)
+
+    def test_last_trading_day(self):
+        assert market_calendar.last_trading_day(_market(2025, 6, 3, 8, 0)) == date(2025, 5, 30)
+        assert market_calendar.last_trading_day(_market(2025, 6, 3, 9, 30)) == date(2025, 6, 3)
+
+
+class TestCacheTtl:
+    def test_intraday_ttl_is_short_only_while_live(self):
+        assert market_calendar.intraday_ttl(60, _market(2025, 6, 3, 10, 0)) == 60
+        assert market_calendar.intraday_ttl(60, _market(2025, 6, 3, 11, 31)) == 60  # grace
+        assert market_calendar.intraday_ttl(60, _market(2025, 6, 3, 12, 0)) == 3600
+        # Friday evening -> Monday open.
+        assert market_calendar.intraday_ttl(60, _market(2025, 6, 6, 21, 15)) == 60 * 3600
+
+    def test_daily_ttl_expires_at_settlement_then_next_open(self):
+        assert market_calendar.daily_ttl(3600, _market(2025, 6, 3, 10, 0)) == 3600
+        assert market_calendar.daily_ttl(3600, _market(2025, 6, 3, 15, 0)) == 600
+        assert market_calendar.daily_ttl(3600, _market(2025, 6, 3, 15, 15)) == 18 * 3600
+
+
+@pytest.mark.django_db
+class TestBarStoreCurrency:
+    SYMBOL = "600519.SS"
+
+    def test_settled_bar_is_current_until_next_trading_day(self, monkeypatch):
+        monkeypatch.setattr(timezone, "now", lambda: _market(2025, 6, 6, 15, 30))
+        bar_store.upsert_bars(self.SYMBOL, _bar(date(2025, 6, 6)))
+
+        monkeypatch.setattr(market_calendar, "now", lambda: _market(2025, 6, 8, 12, 0))
+        assert bar_store.is_current(self.SYMBOL)  # Sunday: no new bar can exist
+
+        monkeypatch.setattr(market_calendar, "now", lambda: _market(2025, 6, 9, 9, 20))
+        assert not bar_store.is_current(self.SYMBOL)
+
+    def test_forming_bar_goes_stale(self, monkeypatch):
+        written = _market(2025, 6, 3, 10, 0)
+        monkeypatch.setattr(timezone, "now", lambda: written)
+        bar_store.upsert_bars(self.SYMBOL, _bar(date(2025, 6, 3)))
+
+        monkeypatch.setattr(market_calendar, "now", lambda: written + timedelta(minutes=5))
+        assert bar_store.is_current(self.SYMBOL)
+        monkeypatch.setattr(market_calendar, "now", lambda: written + timedelta(minutes=20))
+        assert not bar_store.is_current(self.SYMBOL)
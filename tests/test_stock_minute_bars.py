@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from stocks import services
+from stocks.minute_bars import aggregate_minute_bars
+from stocks.services import VWAPCalculationService
+from stocks.stock_cache import cache
+
+
+def _session_minutes(day="2025-06-03"):
+    morning = pd.date_range(f"{day} 09:31", f"{day} 11:30", freq="min")
+    afternoon = pd.date_range(f"{day} 13:01", f"{day} 15:00", freq="min")
+    index = morning.append(afternoon)
+    close = np.arange(len(index), dtype=np.float64) + 10
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 100},
+        index=index,
+    )
+
+
+class TestAggregateMinuteBars:
+    def test_hourly_bars_never_span_lunch(self):
+        bars = aggregate_minute_bars(_session_minutes(), 60)
+
+        assert bars.index.strftime("%H:%M").tolist() == ["10:30", "11:30", "14:00", "15:00"]
+        assert bars["Volume"].tolist() == [6000] * 4
+        assert bars["Open"].iloc[2] == 130  # first afternoon minute, not a morning bar
+        assert bars["Close"].iloc[1] == 129
+
+    def test_true_two_minute_bars(self):
+        minutes = _session_minutes()
+        bars = aggregate_minute_bars(minutes, 2)
+
+        assert len(bars) == len(minutes) // 2
+        assert bars.index[0] == pd.Timestamp("2025-06-03 09:32")
+        first = bars.iloc[0]
+        assert (first["Open"], first["High"], first["Low"], first["Close"]) == (10, 12, 9, 11)
+
+    def test_opening_auction_folds_into_first_bar(self):
+        minutes = _session_minutes()
+        auction = minutes.iloc[[0]].set_axis([pd.Timestamp("2025-06-03 09:25")])
+        bars = aggregate_minute_bars(pd.concat([auction, minutes]), 5)
+
+        assert bars.index[0] == pd.Timestamp("2025-06-03 09:35")
+        assert bars["Volume"].iloc[0] == 600
+
+
+def test_every_minute_interval_shares_one_upstream_call(monkeypatch):
+    calls = []
+
+    def fake_minute_data(symbol, interval):
+        calls.append(interval)
+        return _session_minutes()
+
+    cache.clear()
+    monkeypatch.setattr(services, "get_minute_data", fake_minute_data)
+
+    for interval in ("1m", "2m", "5m", "15m", "30m", "60m"):
+        df = services._run_async(
+            VWAPCalculationService._get_historical_async, "600519.SS", 1, interval, None
+        )
+        assert not df.empty
+
+    assert calls == ["1m"]
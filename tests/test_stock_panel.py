@@ -0,0 +1,105 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from stocks import screener
+from stocks.panel import build_panel, percentile_rank
+
+D1, D2, D3 = date(2025, 6, 3), date(2025, 6, 4), date(2025, 6, 5)
+
+
+def _rows():
+    # 000001.SZ is suspended on D2.
+    return [
+        ("000001.SZ", D1, 10.0, 11.0, 9.0, 10.5, 100),
+        ("000001.SZ", D3, 10.5, 12.0, 10.0, 11.5, 300),
+        ("600519.SS", D1, 20.0, 21.0, 19.0, 20.5, 100),
+        ("600519.SS", D2, 20.5, 22.0, 20.0, 21.5, 200),
+        ("600519.SS", D3, 21.5, 23.0, 21.0, 22.5, 300),
+    ]
+
+
+class TestPanel:
+    def test_aligns_dates_and_carries_suspensions_forward(self):
+        panel = build_panel(_rows(), ["600519.SS", "000001.SZ", "600000.SS"])
+
+        assert panel.symbols == ["600519.SS", "000001.SZ"]
+        assert panel.dates.tolist() == [D1, D2, D3]
+        assert panel["Close"][:, 1].tolist() == [10.5, 10.5, 11.5]
+        assert panel["High"][1, 1] == 10.5
+        assert panel["Volume"][:, 1].tolist() == [100, 0, 300]
+        assert panel.last_dates == [D3, D3]
+        assert panel.latest("Close").tolist() == [22.5, 11.5]
+
+    def test_bars_keeps_latest_dates(self):
+        panel = build_panel(_rows(), ["600519.SS", "000001.SZ"], bars=2)
+
+        assert panel.dates.tolist() == [D2, D3]
+        assert panel["Close"][:, 1].tolist() == [10.5, 11.5]  # carried from D1
+
+    def test_percentile_rank_is_cross_sectional(self):
+        values = np.array([[1.0, 3.0, 2.0, np.nan], [4.0, 4.0, 1.0, 2.0]])
+
+        ranked = percentile_rank(values)
+
+        np.testing.assert_allclose(ranked[0, :3], [100 / 3, 100, 200 / 3])
+        assert np.isnan(ranked[0, 3])
+        np.testing.assert_allclose(ranked[1], [87.5, 87.5, 25, 50])
+        np.testing.assert_allclose(percentile_rank(values[0]), ranked[0])
+
+
+class TestScreener:
+    @pytest.fixture
+    def snapshot(self):
+        frame = pd.DataFrame(
+            {
+                "name": ["A", "B", "C"],
+                "last_date": pd.to_datetime([D3, D3, D2]),
+                "Close": [10.0, 20.0, 30.0],
+                "MA10": [9.0, 21.0, 25.0],
+                "CMF": [0.2, 0.3, np.nan],
+                "total_score": [5.0, 40.0, 10.0],
+            },
+            index=pd.Index(["A.SS", "B.SS", "C.SS"], name="symbol"),
+        )
+        frame["total_score_pct"] = percentile_rank(frame["total_score"].to_numpy())
+        return frame
+
+    def test_filters_sorts_and_reports_columns(self, snapshot):
+        matches, columns = screener.screen(snapshot, "cmf > 0.1 AND Close > ma10")
+
+        assert matches.index.tolist() == ["A.SS"]  # NaN CMF never matches
+        assert columns == ["CMF", "Close", "MA10", "total_score"]
+
+        matches, _ = screener.screen(
+            snapshot, "total_score_pct >= 50", sort="Close", ascending=True
+        )
+        assert matches.index.tolist() == ["B.SS", "C.SS"]
+
+        records = screener.to_records(matches, ["CMF"])
+        assert records[1] == {
+            "symbol": "C.SS",
+            "name": "C",
+            "last_date": "2025-06-04",
+            "Close": 30.0,
+            "total_score": 10.0,
+            "CMF": None,
+        }
+
+    @pytest.mark.parametrize(
+        ("expression", "sort"),
+        [("Close > ", "total_score"), ("PE > 10", "total_score"), ("", "__class__")],
+    )
+    def test_rejects_invalid_input(self, snapshot, expression, sort):
+        with pytest.raises(screener.ScreenerError):
+            screener.screen(snapshot, expression, sort=sort)
+
+    def test_refresh_replaces_the_cached_snapshot(self, snapshot, monkeypatch):
+        monkeypatch.setattr(screener, "build_snapshot", lambda: snapshot.iloc[:1])
+        screener.get_snapshot(refresh=True)
+        monkeypatch.setattr(screener, "build_snapshot", lambda: snapshot)
+
+        assert len(screener.get_snapshot()) == 1
+        screener.refresh_snapshot()
+        assert len(screener.get_snapshot()) == 3
@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from stocks import indicators, services
+from stocks.services import VWAPCalculationService
+
+
+def _iterrows_points(df):
+    """Row-by-row formatter the columnar serializer replaces."""
+    points = []
+    for _, row in df.iterrows():
+        point = {
+            "date": row["Date_Str"],
+            "trading_day": int(row["Trading_Day"]),
+            "open": float(row["Open"]),
+            "high": float(row["High"]),
+            "low": float(row["Low"]),
+            "close": float(row["Close"]),
+            "volume": int(row["Volume"]),
+        }
+        for key, column in (
+            ("ma5", "MA5"),
+            ("ma10", "MA10"),
+            ("obv", "OBV"),
+            ("obv_ma5", "OBV_MA5"),
+            ("obv_ma10", "OBV_MA10"),
+            ("cmf", "CMF"),
+        ):
+            if pd.notna(row.get(column)):
+                point[key] = float(row[column])
+        points.append(point)
+    return points
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range("2023-01-02", periods=120, name="Date")
+    close = 50 + rng.standard_normal(120).cumsum()
+    bars = pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + 1,
+            "Low": close - 1,
+            "Close": close,
+            "Volume": rng.integers(0, 10**6, 120),
+        },
+        index=index,
+    )
+    return services._display_slice(indicators.apply_indicators(bars), 60, "%Y-%m-%d")
+
+
+@pytest.fixture(autouse=True)
+def no_score_lookup(monkeypatch):
+    monkeypatch.setattr(VWAPCalculationService, "get_latest_stock_score", lambda _symbol: None)
+
+
+class TestColumnarSerializer:
+    def test_points_serialize_identically_to_iterrows(self, history):
+        history.loc[3, "CMF"] = np.nan
+
+        points = services._point_records(
+            history, services.HISTORICAL_COLUMNS, services.HISTORICAL_OPTIONAL_KEYS
+        )
+
+        assert json.dumps(points) == json.dumps(_iterrows_points(history))
+
+    def test_columns_layout_replaces_data_points(self, history):
+        result = VWAPCalculationService.format_historical_response(
+            history, "600519.SS", "Test", layout="columns"
+        )
+
+        assert "data_points" not in result
+        columns = result["columns"]
+        assert columns["date"] == history["Date_Str"].tolist()
+        assert columns["volume"] == history["Volume"].tolist()
+        assert all(len(values) == len(history) for values in columns.values())
+        assert (columns["cmf"][0] is None) == bool(np.isnan(history["CMF"].iloc[0]))
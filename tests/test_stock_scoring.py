@@ -0,0 +1,160 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from csi300.models import Company
+from rest_framework.test import APIClient
+from stocks import bar_store, scoring, screener, views
+from stocks.models import ScoreCalculationLog, StockScore
+from stocks.panel import load_panel
+
+RISING = "600519.SS"
+FALLING = "000001.SZ"
+
+
+def _trend(step, days=80):
+    today = bar_store.market_today()
+    dates = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    close = 100 + step * np.arange(days, dtype=float)
+    return pd.DataFrame(
+        {
+            "Date": pd.to_datetime(dates),
+            "Open": close - step / 2,
+            "High": close + 0.5,
+            "Low": close - 0.5,
+            "Close": close,
+            "Volume": 1000,
+        }
+    )
+
+
+@pytest.mark.django_db
+class TestScoring:
+    @pytest.fixture(autouse=True)
+    def bars(self):
+        for ticker in (RISING, FALLING):
+            Company.objects.create(name=f"Company {ticker}", ticker=ticker, exchange="SSE")
+        bar_store.upsert_bars(RISING, _trend(0.5))
+        bar_store.upsert_bars(FALLING, _trend(-0.5))
+
+    def test_panel_scores_match_single_symbol_scores(self):
+        panel = load_panel([RISING, FALLING])
+        raw, _latest = scoring.score_components(panel)
+
+        for position, symbol in enumerate(panel.symbols):
+            single_raw, _ = scoring.score_components(load_panel([symbol]))
+            for name, values in raw.items():
+                assert values[position] == pytest.approx(single_raw[name][0])
+
+        assert raw["momentum"][0] > 0 > raw["momentum"][1]
+        assert raw["dual_ma"][0] > 0 > raw["dual_ma"][1]
+
+    def test_short_history_leaves_long_lookback_components_undefined(self):
+        listed = "601127.SS"
+        Company.objects.create(name="Recently listed", ticker=listed, exchange="SSE")
+        bar_store.upsert_bars(listed, _trend(0.5, days=10))
+
+        raw, _latest = scoring.score_components(load_panel([listed]))
+        summary = scoring.run_scoring([listed], sync=False)
+
+        assert np.isnan(raw["momentum"][0])
+        assert np.isnan(raw["grid"][0])
+        assert not np.isnan(raw["dual_ma"][0])
+        assert summary["successful"] == 1
+        components = StockScore.objects.get(ticker=listed).score_components
+        assert components["momentum"] == {"raw": None, "weighted": None, "reasons": []}
+
+    def test_run_upserts_scores_and_records_progress(self):
+        calls = []
+        summary = scoring.run_scoring(
+            [RISING, FALLING, "600000.SS"],
+            batch_size=2,
+            sync=False,
+            progress=lambda log: calls.append(log.processed_stocks),
+        )
+        scoring.run_scoring([RISING], sync=False)  # re-run updates in place
+
+        assert calls == [2, 3]
+        assert summary["successful"] == 2
+        assert summary["errors"] == {"600000.SS": "No daily bars available"}
+        assert StockScore.objects.count() == 2
+
+        rising = StockScore.objects.get(ticker=RISING)
+        falling = StockScore.objects.get(ticker=FALLING)
+        assert rising.total_score > falling.total_score
+        assert set(rising.score_components) == set(scoring.COMPONENT_WEIGHTS)
+        assert rising.signal_date == bar_store.market_today()
+        assert rising.execution_date > rising.signal_date
+        assert rising.company_name == f"Company {RISING}"
+        assert len(rising.sparkline) == scoring.SPARKLINE_POINTS
+        assert rising.sparkline[-1] == {
+            "date": bar_store.market_today().isoformat(),
+            "close": float(rising.last_close),
+        }
+
+        log = ScoreCalculationLog.objects.get()
+        assert log.status == "completed"
+        assert (log.total_stocks, log.processed_stocks) == (1, 1)
+
+    def test_screener_serves_the_stored_total_score(self):
+        scoring.run_scoring([RISING], sync=False)
+        StockScore.objects.filter(ticker=RISING).update(total_score=12.5)
+        scoring.upsert_scores(list(StockScore.objects.filter(ticker=RISING)))
+
+        snapshot = screener.build_snapshot([RISING, FALLING])
+
+        assert snapshot.loc[RISING, "total_score"] == 12.5
+        assert np.isnan(snapshot.loc[FALLING, "total_score"])  # never scored
+
+    def test_on_demand_run_leaves_the_universe_log_alone(self, monkeypatch):
+        scoring.run_scoring([RISING, FALLING], sync=False)
+        synced = []
+        monkeypatch.setattr(scoring, "_sync_bars", lambda _batch, **kw: synced.append(kw))
+
+        response = APIClient().post("/api/stocks/score/generate/", {"symbol": RISING})
+
+        assert response.status_code == 200
+        assert synced == [{"timeout": views.ON_DEMAND_SYNC_TIMEOUT}]
+        log = ScoreCalculationLog.objects.get()
+        assert (log.total_stocks, log.processed_stocks, log.status) == (2, 2, "completed")
+
+    def test_bar_sync_cancels_queued_symbols_and_joins_running_ones(self, monkeypatch):
+        synced = []
+
+        def sync_symbol(symbol):
+            time.sleep(0.2)
+            synced.append(symbol)
+
+        monkeypatch.setattr(bar_store, "is_current", lambda _symbol: False)
+        monkeypatch.setattr(bar_store, "sync_symbol", sync_symbol)
+
+        scoring._sync_bars(["A", "B", "C"], workers=1, timeout=0.05)
+
+        assert synced == ["A"]
+
+    def test_top_picks_serve_stored_sparklines(self, monkeypatch):
+        scoring.run_scoring([RISING], sync=False)
+        StockScore.objects.create(
+            calculation_date=bar_store.market_today(),
+            ticker=FALLING,
+            company_name="Scored without a sparkline",
+            total_score=-50,
+        )
+        live = []
+
+        def fetch(symbol, **_kwargs):
+            live.append(symbol)
+            return [{"date": "2025-06-03", "close": 1.0}, {"date": "2025-06-04", "close": 2.0}]
+
+        monkeypatch.setattr(views, "_sparkline_points", fetch)
+        client = APIClient()
+
+        picks = client.get("/api/stocks/top-picks/", {"limit": 2}).json()["picks"]
+        fast = client.get("/api/stocks/top-picks-fast/", {"limit": 2}).json()["picks"]
+
+        assert [pick["symbol"] for pick in picks] == [RISING, FALLING]
+        assert picks[0]["sparkline"] == StockScore.objects.get(ticker=RISING).sparkline
+        assert fast[0]["sparkline"] == picks[0]["sparkline"]
+        assert live == [FALLING, FALLING]  # the live read is only a fallback
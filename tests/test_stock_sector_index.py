@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from csi300.models import Company
+from rest_framework.test import APIClient
+from stocks import bar_store, sector_index
+from stocks.models import DailyBar, SectorIndexBar
+
+DAYS = 60
+COMPANIES = {
+    # ticker: (sector, market cap, daily growth)
+    "600519.SS": ("Tech", 300, 0.01),
+    "000001.SZ": ("Tech", 100, 0.0),
+    "600028.SS": ("Energy", None, -0.01),
+}
+
+
+def _bars(growth):
+    today = bar_store.market_today()
+    dates = [today - timedelta(days=offset) for offset in range(DAYS - 1, -1, -1)]
+    close = 100 * (1 + growth) ** np.arange(DAYS)
+    return pd.DataFrame(
+        {
+            "Date": pd.to_datetime(dates),
+            "Open": close,
+            "High": close,
+            "Low": close,
+            "Close": close,
+            "Volume": 1000,
+        }
+    )
+
+
+def _levels(grouping="im_sector"):
+    levels = {}
+    for row in SectorIndexBar.objects.filter(grouping=grouping):
+        levels[row.sector, row.trade_date, "cap"] = float(row.cap_weighted)
+        levels[row.sector, row.trade_date, "equal"] = float(row.equal_weighted)
+    return levels
+
+
+@pytest.mark.django_db
+class TestSectorIndex:
+    @pytest.fixture(autouse=True)
+    def companies(self):
+        for ticker, (sector, cap, growth) in COMPANIES.items():
+            Company.objects.create(
+                name=f"Company {ticker}",
+                ticker=ticker,
+                exchange="SSE",
+                im_sector=sector,
+                market_cap_local=cap,
+            )
+            bar_store.upsert_bars(ticker, _bars(growth))
+
+    def test_full_build_weights_and_breadth(self):
+        summary = sector_index.update_grouping("im_sector")
+        assert summary == {"grouping": "im_sector", "sectors": 2, "days": DAYS}
+
+        last = SectorIndexBar.objects.filter(sector="Tech").latest("trade_date")
+        equal = 1000 * 1.005 ** (DAYS - 1)
+        assert float(last.equal_weighted) == pytest.approx(equal, rel=1e-6)
+        assert equal < float(last.cap_weighted) < 1000 * 1.01 ** (DAYS - 1)
+        assert float(last.breadth) == 0.5  # the flat member sits on its MA10
+        assert last.members == 2
+
+        energy = SectorIndexBar.objects.filter(sector="Energy").latest("trade_date")
+        # No market cap: the cap-weighted index falls back to equal weights.
+        assert float(energy.cap_weighted) == pytest.approx(float(energy.equal_weighted))
+        assert float(energy.breadth) == 0.0
+
+    def test_incremental_update_matches_full_build(self):
+        sector_index.update_grouping("im_sector")
+        full = _levels()
+        last_days = sorted({day for _, day, _ in full})[-3:]
+        SectorIndexBar.objects.filter(trade_date__in=last_days).delete()
+
+        summary = sector_index.update_grouping("im_sector")
+
+        assert summary["days"] == sector_index.INCREMENTAL_LOOKBACK_DAYS + 3
+        assert _levels() == pytest.approx(full)
+
+    def test_incremental_update_corrects_restated_bars(self):
+        sector_index.update_grouping("im_sector")
+        restated = _bars(0.0).iloc[-5:].assign(Close=50.0)
+        bar_store.upsert_bars("600028.SS", restated)
+
+        sector_index.update_grouping("im_sector")
+        incremental = _levels()
+        sector_index.update_grouping("im_sector", rebuild=True)
+
+        assert incremental == pytest.approx(_levels())
+
+    def test_suspended_members_are_not_counted(self):
+        suspended = _bars(0.01)
+        suspended = suspended[suspended["Date"] < suspended["Date"].iat[-3]]
+        DailyBar.objects.filter(ticker="000001.SZ").delete()
+        bar_store.upsert_bars("000001.SZ", suspended)
+
+        sector_index.update_grouping("im_sector")
+
+        last = SectorIndexBar.objects.filter(sector="Tech").latest("trade_date")
+        previous = SectorIndexBar.objects.filter(sector="Tech").order_by("-trade_date")[1]
+        assert last.members == 1
+        assert float(last.equal_weighted) == pytest.approx(float(previous.equal_weighted) * 1.01)
+
+    def test_endpoint_serves_latest_and_series(self):
+        sector_index.update_grouping("im_sector")
+        client = APIClient()
+
+        latest = client.get("/api/stocks/sectors/").json()
+        assert [row["sector"] for row in latest["sectors"]] == ["Energy", "Tech"]
+
+        series = client.get("/api/stocks/sectors/", {"sector": "Tech", "days": 5}).json()
+        assert len(series["series"]["dates"]) == 5
+        assert series["series"]["members"] == [2] * 5
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from stocks.singleflight import SingleFlight
+
+
+class FakeRedis:
+    """Minimal async stand-in for the lock commands SingleFlight issues."""
+
+    def __init__(self):
+        self.store = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def exists(self, key):
+        return int(key in self.store)
+
+    async def eval(self, _script, _numkeys, key, token):
+        if self.store.get(key) == token:
+            del self.store[key]
+            return 1
+        return 0
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_load(self):
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "bars"
+
+        async def run():
+            return await asyncio.gather(*(flight.do("600519", loader) for _ in range(10)))
+
+        assert asyncio.run(run()) == ["bars"] * 10
+        assert calls == 1
+        assert flight.stats() == {"executed": 1, "coalesced_local": 9}
+
+    def test_errors_propagate_to_waiters_and_clear_the_key(self):
+        flight = SingleFlight("test")
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do("600519", failing) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        async def ok():
+            return "bars"
+
+        assert asyncio.run(flight.do("600519", ok)) == "bars"
+
+    def test_remote_waiter_reads_cache_instead_of_loading(self):
+        redis = FakeRedis()
+        redis.store["singleflight:test:600519"] = "other-process"
+        cache = {}
+        flight = SingleFlight("test", redis_client=redis, poll_interval=0.01)
+
+        async def loader():
+            pytest.fail("loader should not run while another process holds the lock")
+
+        async def recheck():
+            return cache.get("600519")
+
+        async def run():
+            waiter = asyncio.create_task(flight.do("600519", loader, recheck=recheck))
+            await asyncio.sleep(0.03)
+            cache["600519"] = "bars"
+            return await waiter
+
+        assert asyncio.run(run()) == "bars"
+        assert flight.stats() == {"coalesced_remote": 1}
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+from stocks import akshare_client
+from stocks.stock_cache import cache
+from stocks.upstream import CircuitBreaker, UpstreamGuard, UpstreamUnavailableError
+
+
+def _guard(**overrides):
+    options = {
+        "rate": 1000.0,
+        "burst": 1000.0,
+        "max_workers": 2,
+        "max_wait": 1.0,
+        "failure_threshold": 2,
+        "reset_timeout": 0.05,
+    }
+    options.update(overrides)
+    return UpstreamGuard("test", **options)
+
+
+def _boom():
+    raise ConnectionError("upstream down")
+
+
+class TestUpstreamGuard:
+    def test_breaker_opens_then_recovers_through_a_probe(self):
+        guard = _guard()
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                guard.call("minute", _boom)
+        assert guard.breaker("minute").state == CircuitBreaker.OPEN
+
+        with pytest.raises(UpstreamUnavailableError):
+            guard.call("minute", lambda: "never called")
+
+        time.sleep(0.06)
+        assert guard.call("minute", lambda: "ok") == "ok"
+        assert guard.breaker("minute").state == CircuitBreaker.CLOSED
+        assert guard.stats() == {"error": 2, "rejected_open": 1, "ok": 1}
+
+    def test_breakers_are_per_endpoint(self):
+        guard = _guard(failure_threshold=1)
+        with pytest.raises(ConnectionError):
+            guard.call("hist", _boom)
+
+        assert guard.call("minute", lambda: 1) == 1
+
+    def test_timeout_frees_the_caller(self):
+        guard = _guard(timeouts={"slow": 0.05})
+        release = threading.Event()
+
+        with pytest.raises(UpstreamUnavailableError, match="timed out"):
+            guard.call("slow", release.wait, 5)
+        release.set()
+
+        assert guard.stats()["timeout"] == 1
+
+    def test_queueing_and_caller_errors_do_not_open_the_breaker(self):
+        guard = _guard(max_workers=1, max_wait=0.05, failure_threshold=1)
+        release = threading.Event()
+        blocker = threading.Thread(target=guard.call, args=("slow", release.wait, 5))
+        blocker.start()
+        time.sleep(0.01)
+
+        with pytest.raises(UpstreamUnavailableError, match="no free worker"):
+            guard.call("slow", lambda: "queued")
+        release.set()
+        blocker.join()
+
+        with pytest.raises(KeyError):
+            guard.call("slow", {}.__getitem__, "bad symbol")
+
+        assert guard.breaker("slow").state == CircuitBreaker.CLOSED
+        assert guard.call("slow", lambda: "ok") == "ok"
+
+    def test_budget_paces_and_rejects(self):
+        guard = _guard(rate=20.0, burst=1.0, max_wait=0.2)
+
+        started = time.monotonic()
+        for _ in range(3):
+            guard.call("minute", lambda: None)
+        assert time.monotonic() - started >= 0.09  # two refills at 20 tokens/s
+
+        strict = _guard(rate=1.0, burst=1.0, max_wait=0.1)
+        strict.call("minute", lambda: None)
+        with pytest.raises(UpstreamUnavailableError, match="budget"):
+            strict.call("minute", lambda: None)
+
+
+def test_minute_data_serves_stale_while_upstream_fails(monkeypatch):
+    cache.clear()
+    raw = pd.DataFrame(
+        {
+            "day": ["2025-06-03 09:31:00", "2025-06-03 09:32:00"],
+            "open": [10.0, 10.1],
+            "high": [10.2, 10.3],
+            "low": [9.9, 10.0],
+            "close": [10.1, 10.2],
+            "volume": [100, 200],
+        }
+    )
+    guard = _guard(failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(akshare_client, "upstream", guard)
+    monkeypatch.setattr(akshare_client.ak, "stock_zh_a_minute", lambda **_kwargs: raw)
+
+    fresh = akshare_client.get_minute_data("600519.SS")
+
+    monkeypatch.setattr(akshare_client.ak, "stock_zh_a_minute", lambda **_kwargs: _boom())
+    failed = akshare_client.get_minute_data("600519.SS")
+    rejected = akshare_client.get_minute_data("600519.SS")
+
+    pd.testing.assert_frame_equal(failed, fresh, check_freq=False)
+    pd.testing.assert_frame_equal(rejected, fresh, check_freq=False)
+    assert guard.stats() == {"ok": 1, "error": 1, "rejected_open": 1}
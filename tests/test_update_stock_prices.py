@@ -0,0 +1,95 @@
+import json
+from decimal import Decimal
+from io import StringIO
+
+import pandas as pd
+import pytest
+from csi300.management.commands.update_stock_prices import Command
+from csi300.models import Company
+from django.core.management import call_command
+from stocks import bar_store
+
+TICKERS = ["600000.SS", "600001.SS", "000001.SZ"]
+
+
+def _hist(ticker):
+    base = float(TICKERS.index(ticker) + 10)
+    df = pd.DataFrame(
+        {
+            "trade_date": pd.to_datetime(["2025-06-02", "2025-06-03"]),
+            "open": [base, base + 1],
+            "high": [base + 2, base + 3],
+            "low": [base - 2, base - 1],
+            "close": [base, base + 0.5],
+            "vol": [100, 200],
+        }
+    )
+    df["pre_close"] = df["close"].shift(1)
+    return df
+
+
+@pytest.mark.django_db(transaction=True)
+class TestUpdateStockPrices:
+    @pytest.fixture(autouse=True)
+    def companies(self):
+        for ticker in TICKERS:
+            Company.objects.create(name=f"Company {ticker}", ticker=ticker, exchange="SSE")
+
+    def test_concurrent_run_bulk_writes_price_fields(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(Command, "fetch_daily_bars", staticmethod(_hist))
+        checkpoint = tmp_path / "checkpoint.json"
+
+        call_command(
+            "update_stock_prices",
+            workers=3,
+            batch_size=2,
+            checkpoint=checkpoint,
+            stdout=StringIO(),
+        )
+
+        company = Company.objects.get(ticker="600001.SS")
+        assert company.price_local_currency == Decimal("12")
+        assert company.previous_close == Decimal("11")
+        assert company.price_52w_high == Decimal("14")
+        assert company.price_52w_low == Decimal("9")
+        assert str(company.last_trade_date) == "2025-06-03"
+        assert not checkpoint.exists()  # clean runs leave no checkpoint
+
+    def test_resume_skips_checkpointed_tickers(self, monkeypatch, tmp_path):
+        fetched = []
+
+        def fetch(ticker):
+            fetched.append(ticker)
+            return _hist(ticker)
+
+        monkeypatch.setattr(Command, "fetch_daily_bars", staticmethod(fetch))
+        checkpoint = tmp_path / "checkpoint.json"
+        state = {
+            "selection": {"symbol": None, "exchange": None},
+            "run_date": bar_store.market_today().isoformat(),
+            "done": TICKERS[:2],
+        }
+        checkpoint.write_text(json.dumps(state))
+
+        call_command("update_stock_prices", resume=True, checkpoint=checkpoint, stdout=StringIO())
+
+        assert fetched == [TICKERS[2]]
+        assert Company.objects.get(ticker=TICKERS[0]).price_local_currency is None
+
+        # A checkpoint from an earlier market day is ignored.
+        fetched.clear()
+        checkpoint.write_text(json.dumps({**state, "run_date": "2000-01-03"}))
+        call_command("update_stock_prices", resume=True, checkpoint=checkpoint, stdout=StringIO())
+        assert sorted(fetched) == sorted(TICKERS)
+
+    def test_unsupported_tickers_are_skipped_not_failed(self, monkeypatch, tmp_path):
+        Company.objects.create(name="Tencent", ticker="0700.HK", exchange="HKEX")
+        monkeypatch.setattr(Command, "fetch_daily_bars", staticmethod(_hist))
+        checkpoint = tmp_path / "checkpoint.json"
+        out = StringIO()
+
+        call_command("update_stock_prices", checkpoint=checkpoint, stdout=out)
+
+        assert "Skipped: 1" in out.getvalue()
+        assert "Failed" not in out.getvalue()
+        assert not checkpoint.exists()